@@ -0,0 +1,292 @@
+"""
+Analysis session is a module with a session object that holds the file names and correction dictionaries of the
+analysis and computes the preparation stages lazily. Every stage is computed the first time it is needed and kept
+until it is invalidated, so a notebook or a service only pays for the stages its queries touch. For example, polity
+score plots never read the WEO workbook, and the polity dataset alone never reads the athlete events file.
+"""
+import pandas as pd
+import constants
+import distinct_athletes
+import helper_function
+import medal_table
+import regime_spells
+
+# Stages each stage is computed from. When a stage is invalidated, the stages computed from it are invalidated too.
+DEPENDENCIES = {"noc": [], "prepared_olympic": [], "split_noc": ["noc"], "olympic": ["prepared_olympic"],
+                "polity": ["noc", "split_noc"], "gdp": ["polity"], "athletes": ["noc"],
+                "polity_cube": ["olympic", "polity", "athletes"], "cube": ["olympic", "gdp", "athletes"],
+                "spells": ["polity"], "medal_table": ["olympic"]}
+# Stages computed from each setting of the session
+SETTINGS = {"olympic_file_name": ["prepared_olympic", "athletes"], "region_file_name": ["noc", "prepared_olympic"],
+            "polity_file_name": ["polity"], "mapper": ["gdp"], "gdp_string": ["gdp"], "gdp_series": ["gdp"],
+            "countries": ["split_noc", "olympic", "athletes"], "country_dict": ["polity"], "sport_dict": ["olympic"]}
+
+
+class AnalysisSession:
+    """
+    Session of the olympic analysis. The datasets are available as the noc_df, split_noc_df, olympic_df, polity_df,
+    gdp_df and athletes_df attributes, the country year cube through country_year_cube and the plots as methods taking
+    the country, the year range and the flag.
+
+    >>> session = AnalysisSession(region_file_name="noc_regions.csv", countries={"GDR": "GERMANY EAST"})
+    >>> session.split_noc_df[session.split_noc_df.NOC == "GDR"].region.tolist()
+    ['GERMANY EAST']
+    >>> sorted(session.computed_stages())
+    ['noc', 'split_noc']
+    >>> session.update(countries={})
+    >>> session.computed_stages()
+    ['noc']
+    """
+
+    def __init__(self, olympic_file_name: str = "athlete_events.csv", region_file_name: str = "noc_regions.csv",
+                 polity_file_name: str = "p5v2018.xls", mapper: str = "Mapper_GDP.xlsx",
+                 gdp_string: str = "WEOOct2021all_new.xlsx", countries: dict = None, country_dict: dict = None,
+                 sport_dict: dict = None, gdp_series: list = None):
+        """
+        :param olympic_file_name: File name that contains olympics data
+        :param region_file_name: File name that contains country to country code mapping
+        :param polity_file_name: File name of the polity dataset
+        :param mapper: name of the mapper dataset file
+        :param gdp_string: name of the GDP dataset file
+        :param countries: Dictionary of countries that have split up with key as the country code and value as the
+        country name
+        :param country_dict: Dictionary of country name in polity dataset and country code of olympic dataset
+        :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
+        :param gdp_series: Names of the WEO series added to the political dataset, keys of constants.WEO_SERIES, by
+        default the GDP in the value column
+        """
+        self.olympic_file_name = olympic_file_name
+        self.region_file_name = region_file_name
+        self.polity_file_name = polity_file_name
+        self.mapper = mapper
+        self.gdp_string = gdp_string
+        self.countries = countries or {}
+        self.country_dict = country_dict or {}
+        self.sport_dict = sport_dict or {}
+        self.gdp_series = gdp_series or constants.GDP_SERIES
+        self._stages = {}
+
+    def update(self, **settings):
+        """
+        Changes the given settings of the session and invalidates the stages computed from them
+
+        :param settings: New values of the settings, for example sport_dict={...}
+        :return:
+        """
+        for name, value in settings.items():
+            if name not in SETTINGS:
+                raise ValueError("{} is not a setting of the session".format(name))
+            setattr(self, name, value)
+            self.invalidate(*SETTINGS[name])
+
+    def invalidate(self, *stages):
+        """
+        Discards the given stages and every stage computed from them. All the stages are discarded if none is given.
+
+        :param stages: Names of the stages to be discarded
+        :return:
+        """
+        stale = set(stages or DEPENDENCIES)
+        while True:
+            dependents = {stage for stage, dependencies in DEPENDENCIES.items() if stale.intersection(dependencies)}
+            if dependents <= stale:
+                break
+            stale |= dependents
+        for stage in stale:
+            self._stages.pop(stage, None)
+
+    def computed_stages(self) -> list:
+        """
+        Returns the names of the stages that are computed and kept by the session
+
+        :return: List of stage names
+        """
+        return list(self._stages)
+
+    def _stage(self, name: str):
+        """
+        Returns the output of the stage, computing it the first time
+
+        :param name: Name of the stage
+        :return: Output of the stage
+        """
+        if name not in self._stages:
+            output = getattr(self, "_build_" + name)()
+            if output is None:
+                raise ValueError("The {} stage could not be computed".format(name))
+            self._stages[name] = output
+        return self._stages[name]
+
+    def _build_noc(self) -> pd.DataFrame:
+        """Reads the country code dataset with the regions in upper case"""
+        noc_df = pd.read_csv(self.region_file_name)
+        noc_df["region"] = noc_df["region"].str.upper()
+        return noc_df
+
+    def _build_prepared_olympic(self):
+        """Prepares the olympic dataset and the country code dataset from the files"""
+        return helper_function.prepare_olympic_dataset(self.olympic_file_name, self.region_file_name)
+
+    def _build_split_noc(self) -> pd.DataFrame:
+        """Corrects the country code dataset for the countries that have split up"""
+        return helper_function.correct_country_codes(self.countries, self._stage("noc").copy())
+
+    def _build_olympic(self) -> pd.DataFrame:
+        """Corrects the olympic dataset for the countries that have split up and for team games"""
+        olympic_df, noc_df = self._stage("prepared_olympic")
+        olympic_df = helper_function.handle_countries_that_split(self.countries, olympic_df.copy(), noc_df.copy())
+        return helper_function.correct_team_medals_won(olympic_df, self.sport_dict)
+
+    def _build_polity(self) -> pd.DataFrame:
+        """Prepares the political dataset and maps it to the olympic regions"""
+        polity_df = helper_function.prepare_polity_dataset(self.polity_file_name, self._stage("noc").copy())
+        if polity_df is None:
+            return
+        split_noc_df = self._stage("split_noc")
+        return helper_function.map_polity_region_dataset(self.country_dict, polity_df,
+                                                         dict(zip(split_noc_df.NOC, split_noc_df.region)))
+
+    def _build_gdp(self) -> pd.DataFrame:
+        """Adds the GDP column to the political dataset"""
+        return helper_function.map_polity_gdp(self._stage("polity"), self.mapper, self.gdp_string, self.gdp_series)
+
+    def _build_athletes(self) -> pd.DataFrame:
+        """Counts the distinct athletes of each region and year, corrected for the countries that have split up"""
+        athletes = pd.read_csv(self.olympic_file_name, usecols=["ID", "NOC", "Year"])
+        return distinct_athletes.count_distinct_athletes(athletes, self._stage("noc"), ["region", "Year"],
+                                                         self.countries)
+
+    def _build_polity_cube(self) -> pd.DataFrame:
+        """Builds the country year cube without the GDP data"""
+        return helper_function.build_country_year_cube(self._stage("olympic"), self._stage("polity"),
+                                                       self._stage("athletes"))
+
+    def _build_cube(self) -> pd.DataFrame:
+        """Builds the country year cube with the GDP data"""
+        return helper_function.build_country_year_cube(self._stage("olympic"), self._stage("gdp"),
+                                                       self._stage("athletes"))
+
+    def _build_spells(self) -> pd.DataFrame:
+        """Builds the regime spells of every country from the political dataset"""
+        return regime_spells.build_spells(self._stage("polity"))
+
+    def _build_medal_table(self) -> pd.DataFrame:
+        """Builds the medal table of every Games from the olympic dataset"""
+        return medal_table.build_medal_table(self._stage("olympic"))
+
+    @property
+    def noc_df(self) -> pd.DataFrame:
+        """Country code dataset"""
+        return self._stage("noc")
+
+    @property
+    def split_noc_df(self) -> pd.DataFrame:
+        """Country code dataset corrected for the countries that have split up"""
+        return self._stage("split_noc")
+
+    @property
+    def olympic_df(self) -> pd.DataFrame:
+        """Olympic dataset corrected for the countries that have split up and for team games"""
+        return self._stage("olympic")
+
+    @property
+    def polity_df(self) -> pd.DataFrame:
+        """Political dataset mapped to the olympic regions"""
+        return self._stage("polity")
+
+    @property
+    def gdp_df(self) -> pd.DataFrame:
+        """Political dataset with the GDP column"""
+        return self._stage("gdp")
+
+    @property
+    def athletes_df(self) -> pd.DataFrame:
+        """Distinct athletes of each region and year, see distinct_athletes.count_distinct_athletes"""
+        return self._stage("athletes")
+
+    @property
+    def spells(self) -> pd.DataFrame:
+        """Regime spells of every country, see regime_spells.build_spells"""
+        return self._stage("spells")
+
+    @property
+    def medal_table(self) -> pd.DataFrame:
+        """Medal table of every Games, see medal_table.build_medal_table"""
+        return self._stage("medal_table")
+
+    def country_year_cube(self, flag: str = constants.GDP) -> pd.DataFrame:
+        """
+        Returns the country year cube. The GDP data is read only for GDP plots. The flag is not case sensitive.
+
+        :param flag: variable to indicate if it's polity score plot or GDP plot
+        :return: The country year cube
+
+        >>> session = AnalysisSession(region_file_name="noc_regions.csv")
+        >>> session._stages.update(cube="GDP cube", polity_cube="polity cube")
+        >>> session.country_year_cube("gdp"), session.country_year_cube("POLITY SCORE")
+        ('GDP cube', 'polity cube')
+        """
+        return self._stage("cube" if flag.upper() == constants.GDP else "polity_cube")
+
+    def plot_data(self, country: str, start_year: int, end_year: int, agg_dict: dict,
+                  flag: str = constants.GDP) -> pd.DataFrame:
+        """
+        Returns the values of the country between the given years, like modify_data_for_plot
+
+        :param country: Country for which the values are returned
+        :param start_year: The start year
+        :param end_year: The end year
+        :param agg_dict: The values to be returned
+        :param flag: variable to indicate if the GDP values are needed
+        :return: The dataset with values to be plotted
+        """
+        return helper_function.modify_data_for_plot(None, None, country, start_year, end_year, agg_dict,
+                                                    self.country_year_cube(flag))
+
+    def _plot(self, func, country, start_year: int, end_year: int, flag: str, show: bool):
+        """
+        Plots the metric function with the country year cube needed for the flag
+
+        :return: The plotted figure
+        """
+        return func(None, None, country, start_year, end_year, flag, self.country_year_cube(flag), show)
+
+    def plot_country_medal_polity(self, country, start_year: int, end_year: int, flag: str, show: bool = True):
+        """Plots the medals won along with the polity score or GDP, see helper_function.plot_country_medal_polity"""
+        return self._plot(helper_function.plot_country_medal_polity, country, start_year, end_year, flag, show)
+
+    def plot_perc_of_medals_to_participant(self, country, start_year: int, end_year: int, flag: str,
+                                           show: bool = True):
+        """Plots the medals won as a percentage of participants, see plot_perc_of_medals_to_participant"""
+        return self._plot(helper_function.plot_perc_of_medals_to_participant, country, start_year, end_year, flag,
+                          show)
+
+    def plot_country_medal_to_participants_ratio(self, country, start_year: int, end_year: int, flag: str,
+                                                 show: bool = True):
+        """Plots the medals to participants ratio, see helper_function.plot_country_medal_to_participants_ratio"""
+        return self._plot(helper_function.plot_country_medal_to_participants_ratio, country, start_year, end_year,
+                          flag, show)
+
+    def plot_country_age_polity(self, country, start_year: int, end_year: int, flag: str, show: bool = True):
+        """Plots the average age of participants, see helper_function.plot_country_age_polity"""
+        return self._plot(helper_function.plot_country_age_polity, country, start_year, end_year, flag, show)
+
+    def plot_country_season_wise_participants(self, country, start_year: int, end_year: int, flag: str,
+                                              show: bool = True):
+        """Plots the participants of each season, see helper_function.plot_country_season_wise_participants"""
+        return self._plot(helper_function.plot_country_season_wise_participants, country, start_year, end_year, flag,
+                          show)
+
+    def country_male_female_ratio(self, country, start_year: int, end_year: int, flag: str, show: bool = True):
+        """Plots the male and female participants, see helper_function.country_male_female_ratio"""
+        return self._plot(helper_function.country_male_female_ratio, country, start_year, end_year, flag, show)
+
+    def plot_graphs_for_country(self, country: str, start_year: int, end_year: int, flag: str,
+                                executor: str = "thread", max_workers: int = None) -> list:
+        """
+        Plots every metric for the country, see helper_function.plot_graphs_for_country
+
+        :return: List of dictionaries with the name, figure, error and seconds taken by each plot
+        """
+        return helper_function.plot_graphs_for_country(None, None, country, start_year, end_year, flag, executor,
+                                                       max_workers, self.country_year_cube(flag))
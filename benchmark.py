@@ -0,0 +1,257 @@
+"""
+Benchmark is a command line module that times every stage of the analysis pipeline on synthetic data and reports the
+peak memory allocated by each stage. The results can be stored as a json baseline, and later runs are compared with
+the baseline to flag stages that became slower or use more memory than the allowed tolerance. The import time of the
+data modules is checked against a fixed budget.
+
+Example:
+    python benchmark.py --scale 1 --save-baseline
+    python benchmark.py --scale 1 --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import pandas as pd
+import constants
+import helper_function
+import synthetic_data
+
+BASELINE_FILE = "benchmark_baseline.json"
+DATA_DIR = "benchmark_data"
+# Changes smaller than these are treated as noise whatever the tolerance
+MIN_SECONDS = 0.01
+MIN_PEAK_MB = 1.0
+# Seconds allowed for importing each data module in a fresh interpreter, on top of pandas and numpy which every module
+# needs anyway. Worker processes and command line runs pay this time at start up.
+IMPORT_BUDGET_SECONDS = {"helper_function": 0.1, "analysis_session": 0.1, "source_loader": 0.1,
+                         "incremental_update": 0.1}
+# Modules that the data modules should not import, as only the plotting functions and process pools need them
+HEAVY_MODULES = ["plotly", "multiprocessing", "openpyxl"]
+
+
+def measure(func, setup=None, repeat: int = 3) -> dict:
+    """
+    Measures a pipeline stage. The stage is run repeat times and the fastest wall time is kept, then it is run once
+    more while tracing the memory allocations to find its peak memory. The setup function is run before every call
+    and is not measured, it returns the arguments of the stage so that stages modifying their input get a fresh copy.
+
+    :param func: Pipeline stage to be measured
+    :param setup: Function without arguments returning the tuple of arguments of the stage
+    :param repeat: Number of timed runs
+    :return: Dictionary with the seconds, the peak memory in MB and the number of rows returned by the stage
+
+    >>> result = measure(lambda frame: frame.groupby("a").sum(), lambda: (pd.DataFrame({"a": [1, 1, 2]}),))
+    >>> sorted(result)
+    ['peak_mb', 'rows', 'seconds']
+    >>> result["rows"]
+    2
+    """
+    setup = setup or tuple
+    seconds = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        output = func(*args)
+        seconds.append(time.perf_counter() - start)
+    args = setup()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if isinstance(output, tuple):
+        output = output[0]
+    return {"seconds": round(min(seconds), 4), "peak_mb": round(peak / 2 ** 20, 2),
+            "rows": len(output) if hasattr(output, "__len__") else None}
+
+
+def run_benchmarks(files: dict, sport_dict: dict, repeat: int = 3, country: str = None) -> dict:
+    """
+    Measures the pipeline stages one after the other on the given files, using the output of each stage as the input
+    of the next one.
+
+    :param files: Dictionary with the olympic, region, polity, mapper and gdp file names
+    :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
+    :param repeat: Number of timed runs of every stage
+    :param country: Country used for the plotting stages, by default the first country of the cube
+    :return: Dictionary with key as the stage name and value as the measurements of the stage
+    """
+    results = {}
+    olympic_df, noc_df = helper_function.prepare_olympic_dataset(files["olympic"], files["region"])
+    results["prepare_olympic_dataset"] = measure(helper_function.prepare_olympic_dataset,
+                                                 lambda: (files["olympic"], files["region"]), repeat)
+    polity_df = helper_function.prepare_polity_dataset(files["polity"], noc_df.copy())
+    results["prepare_polity_dataset"] = measure(helper_function.prepare_polity_dataset,
+                                                lambda: (files["polity"], noc_df.copy()), repeat)
+    country_mapper = dict(zip(noc_df.NOC, noc_df.region))
+    results["map_polity_region_dataset"] = measure(helper_function.map_polity_region_dataset,
+                                                   lambda: ({}, polity_df.copy(), country_mapper), repeat)
+    polity_df = helper_function.map_polity_region_dataset({}, polity_df, country_mapper)
+    results["correct_team_medals_won"] = measure(helper_function.correct_team_medals_won,
+                                                 lambda: (olympic_df.copy(), sport_dict), repeat)
+    olympic_df = helper_function.correct_team_medals_won(olympic_df, sport_dict)
+    results["map_polity_gdp"] = measure(helper_function.map_polity_gdp,
+                                        lambda: (polity_df, files["mapper"], files["gdp"]), repeat)
+    polity_df = helper_function.map_polity_gdp(polity_df, files["mapper"], files["gdp"])
+    results["build_country_year_cube"] = measure(helper_function.build_country_year_cube,
+                                                 lambda: (olympic_df, polity_df), repeat)
+    cube = helper_function.build_country_year_cube(olympic_df, polity_df)
+
+    country = country or cube.index[0]
+    agg_dict = {"Medal_Bronze": "sum", "Medal_Silver": "sum", "Medal_Gold": "sum", "polity2": "mean", "value": "mean"}
+    results["modify_data_for_plot"] = measure(helper_function.modify_data_for_plot,
+                                              lambda: (None, None, country, 1896, 2016, agg_dict, cube), repeat)
+    results["plot_country_medal_polity"] = measure(
+        helper_function.plot_country_medal_polity,
+        lambda: (None, None, country, 1896, 2016, constants.GDP, cube, False), repeat)
+    return results
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """
+    Measures the time taken to import the module in a fresh interpreter in which pandas and numpy are already imported,
+    and finds which of the heavy modules it imported
+
+    :param module: Name of the module
+    :param repeat: Number of fresh interpreters, the fastest import is kept
+    :return: Dictionary with the seconds taken and the list of heavy modules imported
+
+    >>> measure_import("country_alias")["heavy_modules"]
+    []
+    """
+    code = ("import json, sys, time\nimport numpy, pandas\nstart = time.perf_counter()\nimport {}\n"
+            "print(json.dumps([time.perf_counter() - start, [name for name in {} if name in sys.modules]]))"
+            ).format(module, HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {"seconds": round(min(run[0] for run in runs), 4), "heavy_modules": runs[0][1]}
+
+
+def check_import_budget(budget: dict = None, repeat: int = 3) -> list:
+    """
+    Measures the import of every module of the budget and returns the modules that are slower than their budget or
+    import one of the heavy modules
+
+    :param budget: Dictionary with key as the module name and value as the seconds allowed, by default
+    IMPORT_BUDGET_SECONDS
+    :param repeat: Number of fresh interpreters for every module
+    :return: List of messages describing the modules over budget
+
+    >>> check_import_budget({"helper_function": 5.0}, repeat=1)
+    []
+    """
+    messages = []
+    for module, seconds in (budget or IMPORT_BUDGET_SECONDS).items():
+        result = measure_import(module, repeat)
+        if result["seconds"] > seconds:
+            messages.append("{}: import took {}s, the budget is {}s".format(module, result["seconds"], seconds))
+        if result["heavy_modules"]:
+            messages.append("{}: imports {}".format(module, ", ".join(result["heavy_modules"])))
+    return messages
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Compares the measurements with the baseline and returns the stages whose time or peak memory grew by more than the
+    tolerance. Changes below MIN_SECONDS and MIN_PEAK_MB are ignored since they are within the measurement noise.
+
+    :param results: Measurements returned by run_benchmarks
+    :param baseline: Measurements of the baseline run
+    :param tolerance: Allowed growth as a fraction of the baseline value
+    :return: List of messages describing the regressions
+
+    >>> baseline_test = {"map_polity_gdp": {"seconds": 2.0, "peak_mb": 50.0, "rows": 10}}
+    >>> compare_to_baseline({"map_polity_gdp": {"seconds": 2.1, "peak_mb": 80.0, "rows": 10}}, baseline_test)
+    ['map_polity_gdp: peak_mb 50.0 -> 80.0 (+60%)']
+    >>> compare_to_baseline({"map_polity_gdp": {"seconds": 1.5, "peak_mb": 50.0, "rows": 10}}, baseline_test)
+    []
+    """
+    regressions = []
+    for stage, measurements in results.items():
+        if stage not in baseline:
+            continue
+        for metric, noise in (("seconds", MIN_SECONDS), ("peak_mb", MIN_PEAK_MB)):
+            before, after = baseline[stage][metric], measurements[metric]
+            if after - before > max(before * tolerance, noise):
+                regressions.append("{}: {} {} -> {} ({:+.0%})".format(stage, metric, before, after,
+                                                                     (after - before) / before if before else 1))
+    return regressions
+
+
+def summary_table(results: dict, baseline: dict = None) -> pd.DataFrame:
+    """
+    Returns the measurements as a table with one row per stage, along with the baseline time when it is given
+
+    :param results: Measurements returned by run_benchmarks
+    :param baseline: Measurements of the baseline run
+    :return: Dataframe of the measurements
+
+    >>> summary_table({"map_polity_gdp": {"seconds": 2.0, "peak_mb": 50.0, "rows": 10}})
+                    seconds  peak_mb  rows
+    map_polity_gdp      2.0     50.0    10
+    """
+    table = pd.DataFrame.from_dict(results, orient="index")
+    if baseline:
+        table["baseline_seconds"] = [baseline.get(stage, {}).get("seconds") for stage in table.index]
+    return table
+
+
+def main(argv: list = None):
+    """
+    Command line entry point. Generates the synthetic data for the given scale if it is not there yet, measures the
+    pipeline stages and compares them with the baseline file. The exit status is 1 when a regression is found.
+
+    :param argv: List of command line arguments, by default the arguments of the script
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the olympic analysis pipeline on synthetic data")
+    parser.add_argument("--scale", type=float, default=1, help="size of the data relative to the real datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs of every stage")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory of the generated data")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="json file with the baseline results")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth over the baseline")
+    args = parser.parse_args(argv)
+
+    data_dir = os.path.join(args.data_dir, "scale-{:g}-seed-{}".format(args.scale, args.seed))
+    files = {name: os.path.join(data_dir, file_name) for name, file_name in synthetic_data.FILE_NAMES.items()}
+    if not all(os.path.exists(file_name) for file_name in files.values()):
+        files = synthetic_data.generate_datasets(data_dir, args.scale, args.seed)
+    results = run_benchmarks(files, synthetic_data.synthetic_sport_dict(), args.repeat)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline["scale"] != args.scale:
+            print("The baseline was measured at scale {}, hence it is not compared".format(baseline["scale"]))
+            baseline = None
+    print(summary_table(results, baseline and baseline["stages"]).to_string())
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump({"scale": args.scale, "seed": args.seed, "python": platform.python_version(),
+                       "pandas": pd.__version__, "stages": results}, file, indent=2)
+        print("Baseline stored in {}".format(args.baseline))
+    regressions = check_import_budget(repeat=args.repeat)
+    if baseline and not args.save_baseline:
+        regressions += compare_to_baseline(results, baseline["stages"], args.tolerance)
+    for regression in regressions:
+        print("Regression in {}".format(regression))
+    if regressions:
+        raise SystemExit(1)
+    print(constants.PLOT_END)
+
+
+if __name__ == "__main__":
+    main()
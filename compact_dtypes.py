@@ -0,0 +1,111 @@
+"""
+Compact dtypes is a module that converts the prepared olympic, political and country code datasets to a memory optimised
+representation. Country names and codes become categorical columns sharing one dictionary across the three datasets,
+the other text keys become categorical columns and counts use the narrowest integer type that holds their values.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns of each dataset holding country names or country codes. The columns of a group share one dictionary.
+REGION_COLUMNS = {"olympic": ["region"], "polity": ["alternate_region"], "noc": ["region"]}
+NOC_COLUMNS = {"olympic": ["NOC"], "polity": ["alternate_noc"], "noc": ["NOC"]}
+CATEGORY_COLUMNS = {"olympic": ["City", "Sport", "Event"],
+                    "polity": ["scode", "scode_x", "scode_y", "country", "Map", "ISO", "Country"], "noc": []}
+COUNT_COLUMNS = {"olympic": ["Name", "Sex_F", "Sex_M", "Medal_Bronze", "Medal_Silver", "Medal_Gold", "Season_Summer",
+                             "Season_Winter", "Year"],
+                 "polity": ["year", "polity", "polity2", "durable"], "noc": []}
+
+
+def shared_categories(frames: dict, columns: dict) -> pd.CategoricalDtype:
+    """
+    Builds one categorical dtype holding the sorted values of the given columns of all the datasets
+
+    :param frames: Dictionary with key as the dataset name and value as the dataset
+    :param columns: Dictionary with key as the dataset name and value as the list of columns
+    :return: Categorical dtype shared by the columns
+
+    >>> frames_test = {"olympic": pd.DataFrame({"region": ["UK", "USA"]}), "noc": pd.DataFrame({"region": ["CHINA"]})}
+    >>> shared_categories(frames_test, REGION_COLUMNS).categories.tolist()
+    ['CHINA', 'UK', 'USA']
+    """
+    values = [frames[name][column].dropna().unique() for name, frame_columns in columns.items() if name in frames
+              for column in frame_columns if column in frames[name].columns]
+    return pd.CategoricalDtype(np.unique(np.concatenate(values).astype(str)) if values else [])
+
+
+def downcast_counts(frame: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Converts the given count columns to the narrowest integer type that holds their values. Float columns are
+    converted only when all the values are whole numbers.
+
+    :param frame: Dataset to be converted
+    :param columns: List of count columns
+    :return: Dataset with the converted columns
+
+    >>> downcast_counts(pd.DataFrame({"Name": [1, 300], "polity2": [-10, 10], "Sex_F": [1.0, 2.0]}),
+    ...                 ["Name", "polity2", "Sex_F"]).dtypes.tolist()
+    [dtype('uint16'), dtype('int8'), dtype('uint8')]
+    """
+    for column in columns:
+        if column not in frame.columns:
+            continue
+        values = frame[column]
+        if values.dtype.kind == "f":
+            if values.isnull().any() or not np.array_equal(values, np.floor(values)):
+                continue
+            values = values.astype(np.int64)
+        if values.dtype.kind in "iu":
+            frame[column] = pd.to_numeric(values, downcast="unsigned" if (values >= 0).all() else "integer")
+    return frame
+
+
+def compact_datasets(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, noc_df: pd.DataFrame) -> tuple:
+    """
+    Returns memory optimised copies of the prepared olympic, political and country code datasets. The values of the
+    datasets are not changed.
+
+    :param olympic_df: Olympic dataset
+    :param polity_df: Political dataset
+    :param noc_df: Country code dataset
+    :return: Compact olympic dataset, political dataset and country code dataset
+    """
+    frames = {"olympic": olympic_df.copy(), "polity": polity_df.copy(), "noc": noc_df.copy()}
+    for group in (REGION_COLUMNS, NOC_COLUMNS):
+        dtype = shared_categories(frames, group)
+        for name, columns in group.items():
+            for column in columns:
+                if column in frames[name].columns:
+                    frames[name][column] = frames[name][column].astype(dtype)
+    for name, columns in CATEGORY_COLUMNS.items():
+        for column in columns:
+            if column in frames[name].columns:
+                frames[name][column] = frames[name][column].astype("category")
+    for name, columns in COUNT_COLUMNS.items():
+        downcast_counts(frames[name], columns)
+    return frames["olympic"], frames["polity"], frames["noc"]
+
+
+def memory_report(before: dict, after: dict) -> pd.DataFrame:
+    """
+    Reports the bytes used by every column of the datasets before and after the conversion
+
+    :param before: Dictionary with key as the dataset name and value as the dataset before the conversion
+    :param after: Dictionary with key as the dataset name and value as the dataset after the conversion
+    :return: Dataframe with the bytes of every column before and after the conversion
+
+    >>> frame_test = pd.DataFrame({"region": ["UK"] * 100, "Name": [1] * 100})
+    >>> report = memory_report({"olympic": frame_test},
+    ...                        {"olympic": frame_test.astype({"region": "category", "Name": "uint8"})})
+    >>> report[report.column == "Name"]
+       dataset column  bytes_before  bytes_after  ratio
+    2  olympic   Name           800          100  0.125
+    """
+    rows = []
+    for name, frame in before.items():
+        before_usage = frame.memory_usage(deep=True)
+        after_usage = after[name].memory_usage(deep=True)
+        for column, bytes_before in before_usage.items():
+            rows.append([name, column, bytes_before, after_usage.get(column, 0)])
+    report = pd.DataFrame(rows, columns=["dataset", "column", "bytes_before", "bytes_after"])
+    report["ratio"] = round(report.bytes_after / report.bytes_before, 3)
+    return report
@@ -4,4 +4,14 @@ GDP = "GDP"
 POLITY_SCORE = "POLITY SCORE"
 CORRECT_METRIC_ERROR  = "ENTER THE CORRECT METRIC !"
 PLOT_END = "================================================================================================="
-
+CACHE_DIR = ".olympic_cache"
+# Version of the outputs of the pipeline stages, which is part of every cache key. It must be increased whenever a stage
+# returns different columns or values, so that the files cached by older code are not used.
+CACHE_VERSION = 2
+# WEO series that can be joined to the political dataset, with the WEO subject code, the scale and the divisor applied
+# to the values of each series
+WEO_SERIES = {"value": ("NGDPD", "Billions", 1000), "ppp_gdp": ("PPPGDP", "Billions", 1000),
+              "gdp_per_capita": ("NGDPDPC", "Units", 1), "population": ("LP", "Millions", 1)}
+GDP_SERIES = ["value"]
+# Number of points above which figures are drawn with compact WebGL traces
+WEBGL_MIN_POINTS = 5000
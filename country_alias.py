@@ -0,0 +1,154 @@
+"""
+Country alias is a module that reconciles the country names and codes of the olympic and polity datasets through one
+alias index. The index holds every country code and region name of the country code dataset along with the corrections
+for countries that split up, which can be limited to a range of years. A dataset is resolved against the index with a
+single vectorized lookup, so the cost of the reconciliation does not grow with the number of corrections.
+"""
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ["alias", "kind", "region", "noc", "start_year", "end_year"]
+
+
+def match_aliases(keys, aliases) -> tuple:
+    """
+    Finds the position of every alias equal to each key, the aliases of a key being returned in their order. A key
+    matching several aliases is repeated once for each of them and a key without any alias is kept once with the
+    position -1, which gives the same rows as a left join of the keys with the aliases.
+
+    :param keys: Values to be looked up
+    :param aliases: Values of the alias index, which may contain duplicates
+    :return: Array with the position of the key of each row and array with the position of the alias of each row
+
+    >>> rows, positions = match_aliases(pd.Series(["UK", "GERMANY", "NARNIA"]), pd.Series(["GERMANY", "UK", "GERMANY"]))
+    >>> rows.tolist(), positions.tolist()
+    ([0, 1, 1, 2], [1, 0, 2, -1])
+    """
+    codes, uniques = pd.factorize(np.asarray(aliases, dtype=object))
+    key_codes = pd.Index(uniques, dtype=object).get_indexer(np.asarray(keys, dtype=object))
+    if len(uniques) == 0:
+        return np.arange(len(key_codes)), np.full(len(key_codes), -1)
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid], kind="stable")]
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+    starts = np.cumsum(counts) - counts
+    found = key_codes >= 0
+    key_codes = np.where(found, key_codes, 0)
+    repeats = np.where(found, counts[key_codes], 1)
+    rows = np.repeat(np.arange(len(key_codes)), repeats)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    positions = np.where(found[rows], order[starts[key_codes[rows]] + offsets], -1)
+    return rows, positions
+
+
+def build_alias_index(noc_df: pd.DataFrame, countries: dict = None) -> pd.DataFrame:
+    """
+    Builds the alias index from the country code dataset and the corrections for countries that split up. Every country
+    code is an alias of kind "code" and every region name an alias of kind "name" of its country. A correction is an
+    alias of kind "split" and its value is either the country name, or a list of the country name, the first year and
+    the last year in which the name applies. Either year can be None to leave the range open.
+
+    :param noc_df: Country code dataset
+    :param countries: Dictionary of countries that have split up with key as the country code and value as the
+    country name, or as a list of the country name, the first year and the last year
+    :return: Alias index with the alias, kind, region, noc, start_year and end_year columns
+
+    >>> noc_test = pd.DataFrame({"NOC": ["FRG", "GDR"], "region": ["GERMANY", "GERMANY"]})
+    >>> build_alias_index(noc_test, {"GDR": "GERMANY EAST", "FRG": ["GERMANY WEST", 1949, 1990]})
+         alias   kind        region  noc  start_year  end_year
+    0      FRG   code       GERMANY  FRG         NaN       NaN
+    1      GDR   code       GERMANY  GDR         NaN       NaN
+    2  GERMANY   name       GERMANY  FRG         NaN       NaN
+    3  GERMANY   name       GERMANY  GDR         NaN       NaN
+    4      GDR  split  GERMANY EAST  GDR         NaN       NaN
+    5      FRG  split  GERMANY WEST  FRG      1949.0    1990.0
+    """
+    codes = pd.DataFrame({"alias": noc_df["NOC"], "kind": "code", "region": noc_df["region"], "noc": noc_df["NOC"]})
+    names = pd.DataFrame({"alias": noc_df["region"], "kind": "name", "region": noc_df["region"], "noc": noc_df["NOC"]})
+    splits = []
+    for code, value in (countries or {}).items():
+        name, start_year, end_year = (value, None, None) if isinstance(value, str) else value
+        splits.append([code, "split", name, code, start_year, end_year])
+    splits = pd.DataFrame(splits, columns=INDEX_COLUMNS)
+    index = pd.concat([codes, names, splits.astype({"start_year": float, "end_year": float})], ignore_index=True)
+    return index[INDEX_COLUMNS]
+
+
+def resolve_splits(index: pd.DataFrame, codes, years=None) -> np.ndarray:
+    """
+    Looks up the corrected country name of each country code. When the years are given, a correction limited to a
+    range of years applies only to the rows of those years, otherwise only the corrections without a range apply. If
+    several corrections apply to a row, the last one is used.
+
+    :param index: Alias index built with build_alias_index
+    :param codes: Country codes to be resolved
+    :param years: Year of each country code
+    :return: Array with the corrected country name of each code, None where no correction applies
+
+    >>> index_test = build_alias_index(pd.DataFrame({"NOC": ["YUG"], "region": ["SERBIA"]}),
+    ...                                {"YUG": ["YUGOSLAVIA", None, 1991]})
+    >>> resolve_splits(index_test, ["YUG", "YUG", "USA"], [1984, 2000, 1984]).tolist()
+    ['YUGOSLAVIA', None, None]
+    >>> resolve_splits(index_test, ["YUG"]).tolist()
+    [None]
+    """
+    splits = index[index["kind"] == "split"]
+    rows, positions = match_aliases(codes, splits["alias"])
+    matched = positions >= 0
+    rows, positions = rows[matched], positions[matched]
+    start_year = splits["start_year"].to_numpy()[positions]
+    end_year = splits["end_year"].to_numpy()[positions]
+    if years is None:
+        applies = np.isnan(start_year) & np.isnan(end_year)
+    else:
+        row_years = np.asarray(years, dtype=float)[rows]
+        applies = ~(row_years < start_year) & ~(row_years > end_year)
+    resolved = np.full(len(codes), None, dtype=object)
+    # With repeated rows numpy keeps the last assigned value, hence the last correction wins
+    resolved[rows[applies]] = splits["region"].to_numpy()[positions[applies]]
+    return resolved
+
+
+def resolve_polity_countries(index: pd.DataFrame, polity: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finds the region and country code of every row of the polity dataset. A row whose country name is a region name of
+    the index takes the region and code of each country of that region, hence it is repeated once for each of them.
+    Other rows take the region and code of the country whose code is the polity scode.
+
+    :param index: Alias index built with build_alias_index
+    :param polity: Polity dataset with the country names in upper case
+    :return: Polity dataset with the alternate_region and alternate_noc columns
+
+    >>> index_test = build_alias_index(pd.DataFrame({"NOC": ["FRG", "GDR", "BIH"],
+    ...                                              "region": ["GERMANY", "GERMANY", "BOSNIA AND HERZEGOVINA"]}))
+    >>> polity_test = pd.DataFrame({"scode": ["GMY", "BIH", "OFS"], "country": ["GERMANY", "BOSNIA", "ORANGE"]})
+    >>> resolve_polity_countries(index_test, polity_test)
+      scode  country        alternate_region alternate_noc
+    0   GMY  GERMANY                 GERMANY           FRG
+    1   GMY  GERMANY                 GERMANY           GDR
+    2   BIH   BOSNIA  BOSNIA AND HERZEGOVINA           BIH
+    3   OFS   ORANGE                     NaN           NaN
+    """
+    names = index[index["kind"] == "name"]
+    codes = index[index["kind"] == "code"]
+    rows, positions = match_aliases(polity["country"], names["alias"])
+    resolved = polity.take(rows).reset_index(drop=True)
+    region = _take(names["region"], positions)
+    noc = _take(names["noc"], positions)
+    by_code = pd.Index(codes["alias"], dtype=object).get_indexer(np.asarray(resolved["scode"], dtype=object))
+    missing = pd.isnull(region)
+    resolved["alternate_region"] = np.where(missing, _take(codes["region"], by_code), region)
+    resolved["alternate_noc"] = np.where(missing, _take(codes["noc"], by_code), noc)
+    return resolved
+
+
+def _take(values: pd.Series, positions: np.ndarray) -> np.ndarray:
+    """
+    Takes the values at the given positions, with NaN for the position -1
+
+    :param values: Values of a column of the index
+    :param positions: Positions returned by a lookup
+    :return: Array of the values
+    """
+    values = np.append(np.asarray(values, dtype=object), np.nan)
+    return values[np.where(positions >= 0, positions, len(values) - 1)]
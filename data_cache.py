@@ -0,0 +1,197 @@
+"""
+Data cache is a module that stores the prepared olympic and political datasets on disk as parquet files so that a
+restarted notebook kernel or a batch run does not have to parse and clean the raw files again.
+"""
+import glob
+import hashlib
+import json
+import os
+import pandas as pd
+import compact_dtypes
+import constants
+import helper_function
+
+
+def file_fingerprint(file_name: str, use_mtime: bool = False) -> str:
+    """
+    Returns a fingerprint of the given source file. By default the fingerprint is the sha256 hash of the file content.
+    If use_mtime is set, the file size and modification time are used instead which is cheaper for very large files.
+
+    :param file_name: Name of the source file
+    :param use_mtime: Variable to indicate if the modification time should be used instead of the content hash
+    :return: Fingerprint of the file
+
+    >>> len(file_fingerprint("noc_regions.csv"))
+    64
+    >>> file_fingerprint("noc_regions.csv") == file_fingerprint("noc_regions.csv")
+    True
+    """
+    if use_mtime:
+        stat = os.stat(file_name)
+        return "{}-{}".format(stat.st_size, stat.st_mtime_ns)
+    sha = hashlib.sha256()
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def build_cache_key(stage: str, source_files: list, params: dict = None, depends_on: list = None,
+                    use_mtime: bool = False) -> str:
+    """
+    Builds the cache key of a pipeline stage from the fingerprint of its source files, the correction dictionaries
+    passed to it, the keys of the stages it depends on and constants.CACHE_VERSION. Any change in these values results
+    in a new key.
+
+    :param stage: Name of the pipeline stage
+    :param source_files: List of file names read by the stage
+    :param params: Dictionary of correction dictionaries or other arguments passed to the stage
+    :param depends_on: List of cache keys of the stages whose output is used by this stage
+    :param use_mtime: Variable to indicate if the modification time should be used instead of the content hash
+    :return: Cache key of the stage
+
+    >>> key = build_cache_key("olympic", ["noc_regions.csv"], {"countries": {"GDR": "GERMANY EAST"}})
+    >>> key == build_cache_key("olympic", ["noc_regions.csv"], {"countries": {"GDR": "GERMANY EAST"}})
+    True
+    >>> key == build_cache_key("olympic", ["noc_regions.csv"], {"countries": {"FRG": "GERMANY WEST"}})
+    False
+    >>> constants.CACHE_VERSION += 1
+    >>> key == build_cache_key("olympic", ["noc_regions.csv"], {"countries": {"GDR": "GERMANY EAST"}})
+    False
+    >>> constants.CACHE_VERSION -= 1
+    """
+    payload = {"stage": stage, "version": constants.CACHE_VERSION,
+               "sources": [file_fingerprint(file_name, use_mtime) for file_name in source_files],
+               "params": params or {},
+               "depends_on": depends_on or []}
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def load_or_build(stage: str, key: str, builder, cache_dir: str = constants.CACHE_DIR):
+    """
+    Loads the output of a pipeline stage from the cache directory if it was stored with the same key, otherwise runs the
+    builder and stores its output. The builder can return a single dataframe or a tuple of dataframes. Files stored for
+    the same stage with an older key are removed.
+
+    :param stage: Name of the pipeline stage
+    :param key: Cache key of the stage built with build_cache_key
+    :param builder: Function without arguments which computes the output of the stage
+    :param cache_dir: Directory where the parquet files are stored
+    :return: Output of the stage
+
+    >>> import tempfile
+    >>> cache = tempfile.mkdtemp()
+    >>> load_or_build("noc", "k1", lambda: pd.read_csv("noc_regions.csv"), cache).shape
+    (230, 3)
+    >>> load_or_build("noc", "k1", lambda: None, cache).shape
+    (230, 3)
+    """
+    paths = sorted(glob.glob(os.path.join(cache_dir, "{}-{}-*.parquet".format(stage, key))))
+    if paths:
+        frames = tuple(pd.read_parquet(path) for path in paths)
+        return frames[0] if paths[0].endswith("-single.parquet") else frames
+    result = builder()
+    if result is None:
+        # The builder failed (for example the source file was not found), so there is nothing to cache
+        return result
+    os.makedirs(cache_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(cache_dir, "{}-*.parquet".format(stage))):
+        os.remove(path)
+    if isinstance(result, tuple):
+        for index, frame in enumerate(result):
+            _write_frame(frame, os.path.join(cache_dir, "{}-{}-{}.parquet".format(stage, key, index)))
+    else:
+        _write_frame(result, os.path.join(cache_dir, "{}-{}-single.parquet".format(stage, key)))
+    return result
+
+
+def _write_frame(frame: pd.DataFrame, path: str):
+    """
+    Writes the dataframe to a temporary file and moves it to the given path so that an interrupted write never leaves a
+    partial file in the cache.
+
+    :param frame: Dataframe to be stored
+    :param path: Name of the parquet file
+    :return:
+    """
+    temp_path = path + ".tmp"
+    frame.to_parquet(temp_path, index=True)
+    os.replace(temp_path, path)
+
+
+def prepare_datasets_cached(olympic_file_name: str, region_file_name: str, polity_file_name: str, mapper: str,
+                            gdp_string: str, countries: dict, country_dict: dict, sport_dict: dict,
+                            cache_dir: str = constants.CACHE_DIR, use_mtime: bool = False,
+                            compact: bool = False) -> tuple:
+    """
+    Runs the complete preparation chain of the analysis, that is prepare_olympic_dataset, prepare_polity_dataset,
+    handle_countries_that_split, map_polity_region_dataset, correct_team_medals_won and map_polity_gdp, and caches the
+    output of every stage. A stage is computed again only if one of its source files or correction dictionaries changed.
+    In compact mode the datasets are returned with categorical keys and narrow integer counts.
+
+    :param olympic_file_name: File name that contains olympics data
+    :param region_file_name: File name that contains country to country code mapping
+    :param polity_file_name: File name of the polity dataset
+    :param mapper: name of the mapper dataset file
+    :param gdp_string: name of the GDP dataset file
+    :param countries: Dictionary of countries that have split up with key as the country code and value as the
+    country name
+    :param country_dict: Dictionary of country name in polity dataset and country code of olympic dataset
+    :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
+    :param cache_dir: Directory where the parquet files are stored
+    :param use_mtime: Variable to indicate if the modification time should be used instead of the content hash
+    :param compact: Variable to indicate if the memory optimised datasets should be returned
+    :return: Olympic dataset, political dataset with GDP column and the country code dataset
+    """
+    olympic_key = build_cache_key("olympic", [olympic_file_name, region_file_name], use_mtime=use_mtime)
+    prepared = load_or_build("olympic", olympic_key,
+                             lambda: helper_function.prepare_olympic_dataset(olympic_file_name, region_file_name),
+                             cache_dir)
+    if prepared is None:
+        return
+    olympic_df, noc_df = prepared
+
+    polity_key = build_cache_key("polity", [polity_file_name], depends_on=[olympic_key], use_mtime=use_mtime)
+    polity_df = load_or_build("polity", polity_key,
+                              lambda: helper_function.prepare_polity_dataset(polity_file_name, noc_df.copy()),
+                              cache_dir)
+    if polity_df is None:
+        return
+
+    split_key = build_cache_key("split", [], {"countries": countries}, [olympic_key])
+    olympic_df, noc_df = load_or_build(
+        "split", split_key,
+        lambda: _split_countries(countries, olympic_df.copy(), noc_df.copy()), cache_dir)
+
+    region_key = build_cache_key("region", [], {"country_dict": country_dict}, [polity_key, split_key])
+    polity_df = load_or_build(
+        "region", region_key,
+        lambda: helper_function.map_polity_region_dataset(country_dict, polity_df.copy(),
+                                                          dict(zip(noc_df.NOC, noc_df.region))), cache_dir)
+
+    team_key = build_cache_key("team", [], {"sport_dict": sport_dict}, [split_key])
+    olympic_df = load_or_build("team", team_key,
+                               lambda: helper_function.correct_team_medals_won(olympic_df.copy(), sport_dict),
+                               cache_dir)
+
+    gdp_key = build_cache_key("gdp", [mapper, gdp_string], depends_on=[region_key], use_mtime=use_mtime)
+    polity_df = load_or_build("gdp", gdp_key,
+                              lambda: helper_function.map_polity_gdp(polity_df, mapper, gdp_string), cache_dir)
+    if compact:
+        return compact_dtypes.compact_datasets(olympic_df, polity_df, noc_df)
+    return olympic_df, polity_df, noc_df
+
+
+def _split_countries(countries: dict, olympic_df: pd.DataFrame, noc_df: pd.DataFrame) -> tuple:
+    """
+    Applies handle_countries_that_split and returns both corrected datasets, since the function corrects the country
+    code dataset in place.
+
+    :param countries: Dictionary of countries that have split up
+    :param olympic_df: Olympic dataset
+    :param noc_df: Country code dataset
+    :return: Corrected olympic dataset and country code dataset
+    """
+    olympic_df = helper_function.handle_countries_that_split(countries, olympic_df, noc_df)
+    return olympic_df, noc_df
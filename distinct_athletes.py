@@ -0,0 +1,216 @@
+"""
+Distinct athletes is a module that counts the athletes of each group of the olympic data by their ID, instead of
+counting their entries: an athlete taking part in five events of the same games counts once for the country and year.
+The exact counts are computed from the athlete rows at any level of keys, for example region, Year, Sport and Event or
+only region and Year. The approximate counts are HyperLogLog sketches of the IDs of each group. Sketches of different
+chunks of the athlete rows, or of different games, are merged by keeping the largest register, and a sketch is rolled
+up to coarser keys the same way, so distinct counts are combined without keeping the sets of IDs in memory. Every
+sketch holds a fixed number of registers, so the sketches are kept for coarse groups such as region and Year, where
+they are much smaller than the sets of IDs, while the small groups of single events are counted exactly.
+"""
+import numpy as np
+import pandas as pd
+import country_alias
+import helper_function
+
+DEFAULT_KEYS = ["region", "Year", "Sport", "Event"]
+# Keys of the sketches by default. A sketch of 2 ** PRECISION registers is larger than the set of IDs of a single event,
+# which holds a handful of athletes, hence the sketches are kept for countries and years.
+SKETCH_KEYS = ["region", "Year"]
+# Number of index bits of the sketches. Every group holds 2 ** precision one byte registers and the standard error of
+# the estimates is about 1.04 / sqrt(2 ** precision), that is 3% for a precision of 10.
+PRECISION = 10
+
+
+def count_distinct_athletes(athletes: pd.DataFrame, noc_df: pd.DataFrame, keys: list = None,
+                            countries: dict = None) -> pd.DataFrame:
+    """
+    Counts the distinct athletes of each group exactly
+
+    :param athletes: Rows of the athlete events file, with the ID, NOC and Year columns
+    :param noc_df: Country code dataset with the region in upper case
+    :param keys: Columns to group by, region being taken from the country code dataset, by default region, Year, Sport
+    and Event
+    :param countries: Dictionary of countries that have split up, as in handle_countries_that_split, which are applied
+    to the regions
+    :return: Dataframe with the keys and the number of distinct athletes in the Athletes column
+
+    >>> athletes_test = pd.DataFrame({"ID": [1, 1, 2, 3], "NOC": ["GBR", "GBR", "GBR", "USA"],
+    ...                               "Year": [1948, 1948, 1948, 1948], "Sport": ["Rowing"] * 4,
+    ...                               "Event": ["Eights", "Pairs", "Eights", "Eights"]})
+    >>> noc_test = pd.DataFrame({"NOC": ["GBR", "USA"], "region": ["UK", "USA"]})
+    >>> count_distinct_athletes(athletes_test, noc_test, ["region", "Year"])
+      region  Year  Athletes
+    0     UK  1948         2
+    1    USA  1948         1
+    >>> count_distinct_athletes(athletes_test, noc_test, ["region", "Year"], {"GBR": ["GREAT BRITAIN", 1940, 1950]})
+              region  Year  Athletes
+    0  GREAT BRITAIN  1948         2
+    1            USA  1948         1
+    """
+    keys = keys or DEFAULT_KEYS
+    key_values, ids = _keyed_rows(athletes, noc_df, keys, countries)
+    groups, first_rows = helper_function.factorize_groups(key_values)
+    kept = (groups >= 0) & pd.notnull(ids)
+    id_codes, id_uniques = pd.factorize(ids[kept])
+    # Every distinct pair of group and athlete is counted once for its group
+    pairs = np.unique(groups[kept] * max(len(id_uniques), 1) + id_codes)
+    counts = np.bincount(pairs // max(len(id_uniques), 1), minlength=len(first_rows))
+    frame = pd.DataFrame({key: values[first_rows] for key, values in zip(keys, key_values)})
+    frame["Athletes"] = counts
+    return frame
+
+
+class AthleteSketch:
+    """
+    HyperLogLog sketches of the athlete IDs of each group. The keys attribute holds the key values of the groups and
+    the registers attribute one row of registers for each group.
+
+    >>> athletes_test = pd.DataFrame({"ID": [1, 1, 2, 3], "NOC": ["GBR", "GBR", "GBR", "USA"],
+    ...                               "Year": [1948, 1948, 1948, 1948], "Sport": ["Rowing"] * 4,
+    ...                               "Event": ["Eights", "Pairs", "Eights", "Eights"]})
+    >>> noc_test = pd.DataFrame({"NOC": ["GBR", "USA"], "region": ["UK", "USA"]})
+    >>> first = sketch_athletes(athletes_test[:2], noc_test)
+    >>> second = sketch_athletes(athletes_test[2:], noc_test)
+    >>> first.merge(second).estimate().round()
+      region  Year  Athletes
+    0     UK  1948       2.0
+    1    USA  1948       1.0
+    >>> first.merge(second).rollup(["Year"]).estimate().round()
+       Year  Athletes
+    0  1948       3.0
+    """
+
+    def __init__(self, keys: pd.DataFrame, registers: np.ndarray, precision: int = PRECISION):
+        """
+        :param keys: Key values of the groups, one row for each group
+        :param registers: Array of shape (groups, 2 ** precision) of the registers
+        :param precision: Number of index bits of the sketches
+        """
+        self.keys = keys.reset_index(drop=True)
+        self.registers = registers
+        self.precision = precision
+
+    def merge(self, other):
+        """
+        Returns the sketches of the union of the athletes of both sketches, for every group of either sketch
+
+        :param other: Sketch with the same keys and precision
+        :return: The merged sketch
+        """
+        if other.precision != self.precision or list(other.keys.columns) != list(self.keys.columns):
+            raise ValueError("Only sketches with the same keys and precision can be merged")
+        return _combine(pd.concat([self.keys, other.keys], ignore_index=True),
+                        np.concatenate([self.registers, other.registers]), list(self.keys.columns), self.precision)
+
+    def rollup(self, keys: list):
+        """
+        Returns the sketches of the coarser groups of the given keys, for example from events to countries and years
+
+        :param keys: Columns to group by, a subset of the keys of the sketch
+        :return: The rolled up sketch
+        """
+        return _combine(self.keys, self.registers, keys, self.precision)
+
+    def estimate(self) -> pd.DataFrame:
+        """
+        Estimates the number of distinct athletes of each group
+
+        :return: Dataframe with the keys and the estimated number of distinct athletes in the Athletes column
+        """
+        size = 2 ** self.precision
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(size, 0.7213 / (1 + 1.079 / size))
+        powers = 2.0 ** -np.arange(65)
+        estimates = np.empty(len(self.registers))
+        # The registers are read in blocks of groups to bound the size of the temporary arrays
+        for start in range(0, len(self.registers), 4096):
+            block = self.registers[start:start + 4096]
+            raw = alpha * size * size / powers[block].sum(axis=1)
+            zeros = (block == 0).sum(axis=1)
+            # Small counts are estimated from the share of empty registers, which is more accurate
+            with np.errstate(divide="ignore"):
+                linear = size * np.log(size / np.maximum(zeros, 1))
+            estimates[start:start + 4096] = np.where((raw <= 2.5 * size) & (zeros > 0), linear, raw)
+        frame = self.keys.copy()
+        frame["Athletes"] = estimates
+        return frame
+
+
+def sketch_athletes(athletes: pd.DataFrame, noc_df: pd.DataFrame, keys: list = None, precision: int = PRECISION,
+                    countries: dict = None) -> AthleteSketch:
+    """
+    Builds the sketches of the athlete IDs of each group. The IDs are hashed with a fixed key, hence sketches built
+    from different chunks or runs can be merged.
+
+    :param athletes: Rows of the athlete events file, with the ID, NOC and Year columns
+    :param noc_df: Country code dataset with the region in upper case
+    :param keys: Columns to group by, region being taken from the country code dataset, by default region and Year. Each
+    group holds 2 ** precision registers, hence fine keys such as Sport and Event are better counted exactly with
+    count_distinct_athletes.
+    :param precision: Number of index bits of the sketches
+    :param countries: Dictionary of countries that have split up, as in handle_countries_that_split, which are applied
+    to the regions
+    :return: The sketches of the groups
+    """
+    keys = keys or SKETCH_KEYS
+    key_values, ids = _keyed_rows(athletes, noc_df, keys, countries)
+    groups, first_rows = helper_function.factorize_groups(key_values)
+    kept = (groups >= 0) & pd.notnull(ids)
+    hashes = pd.util.hash_array(np.asarray(ids[kept], dtype=object))
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes & np.uint64(2 ** (64 - precision) - 1)
+    # Position of the first set bit of the remaining hash bits, computed from the exact float exponents of the two
+    # 32 bit halves
+    high = np.frexp((rest >> np.uint64(32)).astype(np.float64))[1]
+    low = np.frexp((rest & np.uint64(2 ** 32 - 1)).astype(np.float64))[1]
+    rank = (64 - precision) - np.where(high > 0, high + 32, low) + 1
+    registers = np.zeros((len(first_rows), 2 ** precision), dtype=np.uint8)
+    np.maximum.at(registers, (groups[kept], index), rank.astype(np.uint8))
+    keys_frame = pd.DataFrame({key: values[first_rows] for key, values in zip(keys, key_values)})
+    return AthleteSketch(keys_frame, registers, precision)
+
+
+def _combine(keys_frame: pd.DataFrame, registers: np.ndarray, keys: list, precision: int) -> AthleteSketch:
+    """
+    Merges the registers of the rows with the same values of the keys
+
+    :param keys_frame: Key values of each row of registers
+    :param registers: Registers of each row
+    :param keys: Columns to group by
+    :param precision: Number of index bits of the sketches
+    :return: Sketch with one row of registers for each group
+    """
+    key_values = [keys_frame[key].to_numpy() for key in keys]
+    groups, first_rows = helper_function.factorize_groups(key_values)
+    # The rows are sorted by group so that the registers of each group are reduced over one contiguous block
+    order = np.argsort(groups, kind="stable")
+    order = order[groups[order] >= 0]
+    starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0]) if len(order) else order
+    merged = np.maximum.reduceat(registers[order], starts) if len(order) else \
+        np.zeros((0, registers.shape[1]), dtype=np.uint8)
+    return AthleteSketch(pd.DataFrame({key: values[first_rows] for key, values in zip(keys, key_values)}), merged,
+                         precision)
+
+
+def _keyed_rows(athletes: pd.DataFrame, noc_df: pd.DataFrame, keys: list, countries: dict = None) -> tuple:
+    """
+    Looks up the region of the athlete rows, corrected for the countries that have split up in the year of each row
+    like in handle_countries_that_split, and returns the key values and the ID of the rows with a known country code
+
+    :param athletes: Rows of the athlete events file
+    :param noc_df: Country code dataset with the region in upper case
+    :param keys: Columns to group by
+    :param countries: Dictionary of countries that have split up
+    :return: List of the arrays of key values and array of IDs
+    """
+    rows, positions = country_alias.match_aliases(athletes["NOC"], noc_df["NOC"])
+    matched = positions >= 0
+    rows, positions = rows[matched], positions[matched]
+    region = noc_df["region"].to_numpy()[positions]
+    if countries and "region" in keys:
+        index = country_alias.build_alias_index(noc_df, countries)
+        resolved = country_alias.resolve_splits(index, athletes["NOC"].to_numpy()[rows],
+                                                athletes["Year"].to_numpy()[rows])
+        region = np.where(pd.isnull(resolved), region, resolved)
+    key_values = [region if key == "region" else athletes[key].to_numpy()[rows] for key in keys]
+    return key_values, athletes["ID"].to_numpy()[rows]
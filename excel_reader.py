@@ -0,0 +1,101 @@
+"""
+Excel reader is a module that reads the first sheet of an excel workbook row by row and keeps only the rows and columns
+needed for the analysis, instead of loading the complete sheet into a dataframe.
+"""
+import os
+import numpy as np
+import pandas as pd
+import xlrd
+
+# Strings that pd.read_excel treats as missing values by default
+NA_STRINGS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A",
+              "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+
+def read_excel_filtered(file_name: str, columns, filters: dict = None) -> pd.DataFrame:
+    """
+    Streams the rows of the first sheet of the workbook and materialises only the given columns of the rows that pass
+    every filter. The first row of the sheet is used as header. Like pd.read_excel, whole number cells are returned as
+    integers and empty cells as missing values.
+
+    :param file_name: Name of the .xls or .xlsx file
+    :param columns: List of column names to keep, or a function that returns True for the column names to keep
+    :param filters: Dictionary with key as the column name and value as the collection of allowed values or a function
+    that returns True for the allowed values
+    :return: Dataframe with the filtered rows and columns
+
+    >>> gdp = read_excel_filtered("WEOOct2021all_new.xlsx", ["ISO", "Country", 2016],
+    ...                           {"WEO Subject Code": {"NGDPD"}, "Scale": {"Billions"}})
+    >>> gdp[gdp.ISO == "USA"]
+         ISO        Country     2016
+    186  USA  United States  18695.1
+    >>> read_excel_filtered("Mapper_GDP.xlsx", ["scode", "Map"], {"country": lambda x: x.startswith("Ger")})
+      scode      Map
+    0   GDR      NaN
+    1   GFR  Germany
+    2   GMY  Germany
+    """
+    filters = filters or {}
+    rows = _iterate_rows(file_name)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(columns=columns if isinstance(columns, list) else [])
+    header = [_convert_cell(name) for name in header]
+    if callable(columns):
+        keep = [index for index, name in enumerate(header) if columns(name)]
+    else:
+        keep = [header.index(name) for name in columns]
+    checks = []
+    for name, allowed in filters.items():
+        check = allowed if callable(allowed) else allowed.__contains__
+        checks.append((header.index(name), check))
+
+    records = []
+    for row in rows:
+        row = [_convert_cell(value) for value in row]
+        if all(not pd.isna(row[index]) and check(row[index]) for index, check in checks):
+            records.append([row[index] for index in keep])
+    return pd.DataFrame(records, columns=[header[index] for index in keep])
+
+
+def _iterate_rows(file_name: str):
+    """
+    Yields the cell values of the first sheet one row at a time. Xlsx files are read with openpyxl in read only mode so
+    that the sheet is never loaded completely. Xls files are read with xlrd.
+
+    :param file_name: Name of the .xls or .xlsx file
+    :return: Generator of lists of cell values
+    """
+    if os.path.splitext(file_name)[1].lower() == ".xls":
+        book = xlrd.open_workbook(file_name, on_demand=True)
+        try:
+            sheet = book.sheet_by_index(0)
+            for index in range(sheet.nrows):
+                yield [np.nan if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR)
+                       else cell.value for cell in sheet.row(index)]
+        finally:
+            book.release_resources()
+    else:
+        # Imported here as it takes most of the import time of the data modules, and only xlsx files need it
+        import openpyxl
+        book = openpyxl.load_workbook(file_name, read_only=True, data_only=True)
+        try:
+            for row in book.worksheets[0].iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            book.close()
+
+
+def _convert_cell(value):
+    """
+    Converts a cell value the same way pd.read_excel does: whole number floats become integers while empty cells and
+    the default missing value strings like "n/a" become missing values.
+
+    :param value: Cell value read from the workbook
+    :return: Converted cell value
+    """
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if value is None or (isinstance(value, str) and value in NA_STRINGS):
+        return np.nan
+    return value
@@ -0,0 +1,227 @@
+"""
+Export reports is a command line module that writes the figures of every metric for every country to an output directory
+as plotly json or self-contained html files, without a notebook. Every run writes to a sub directory named after its
+flag and year range, and records its completed countries in a checkpoint file of that directory for its format, so
+that an interrupted run resumes where it stopped while runs with other settings are exported again.
+
+Example:
+    python export_reports.py --corrections corrections.json --output reports --format html --flag GDP
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import argparse
+import contextvars
+import json
+import os
+import re
+import pandas as pd
+import constants
+import data_cache
+import helper_function
+import instrumentation
+import shared_datasets
+
+METRIC_FUNCTIONS = [helper_function.plot_country_medal_polity, helper_function.plot_perc_of_medals_to_participant,
+                    helper_function.plot_country_medal_to_participants_ratio, helper_function.plot_country_age_polity,
+                    helper_function.country_male_female_ratio, helper_function.plot_country_season_wise_participants]
+# Checkpoint file of a run, for each format
+CHECKPOINT_FILE = "completed_{}.txt"
+
+
+def load_corrections(file_name: str) -> tuple:
+    """
+    Loads the correction dictionaries used while preparing the datasets from a json file with the keys "countries",
+    "country_dict" and "sport_dict".
+
+    :param file_name: Name of the json file
+    :return: Dictionary of countries that have split up, dictionary of country name in polity dataset and country code
+    of olympic dataset and dictionary of team sports
+    """
+    with open(file_name) as file:
+        corrections = json.load(file)
+    return corrections.get("countries", {}), corrections.get("country_dict", {}), corrections["sport_dict"]
+
+
+def run_directory(output_dir: str, flag: str, start_year: int, end_year: int) -> str:
+    """
+    Returns the sub directory of the output directory where a run writes its figures and its checkpoint
+
+    :param output_dir: Directory where the figures are written
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :return: Name of the directory of the run
+
+    >>> run_directory("reports", "Polity score", 1896, 2016)
+    'reports/POLITY_SCORE_1896-2016'
+    """
+    name = "{}_{}-{}".format(re.sub(r"[^A-Za-z0-9]+", "_", flag.upper()).strip("_"), start_year, end_year)
+    return os.path.join(output_dir, name)
+
+
+def _call(func, *args):
+    """
+    Calls the function with the given arguments
+
+    :param func: Function to be called
+    :param args: Arguments of the function
+    :return: Result of the function
+    """
+    return func(*args)
+
+
+def export_country(cube: pd.DataFrame, country: str, start_year: int, end_year: int, flag: str, output_dir: str,
+                   file_format: str) -> str:
+    """
+    Writes the figure of every metric for the given country to a sub directory of the output directory.
+
+    :param cube: Country year cube built with build_country_year_cube. Process workers receive the handle of the
+    published cube, which is unpickled as the cube attached from its memory mapped file, once per worker.
+    :param country: Country for which the figures are exported
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param output_dir: Directory where the figures are written
+    :param file_format: "json" for plotly json files or "html" for self-contained html files
+    :return: The exported country
+    """
+    with instrumentation.span("export_country", country=country):
+        figures = []
+        for func in METRIC_FUNCTIONS:
+            fig = func(None, None, country, start_year, end_year, flag, cube, False)
+            if fig is None:
+                raise ValueError("{} could not be plotted for {}".format(func.__name__, country))
+            figures.append((func.__name__, fig))
+        country_dir = os.path.join(output_dir, re.sub(r"[^A-Za-z0-9]+", "_", country).strip("_"))
+        os.makedirs(country_dir, exist_ok=True)
+        with instrumentation.span("write_figures", file_format=file_format):
+            for name, fig in figures:
+                path = os.path.join(country_dir, "{}.{}".format(name, file_format))
+                if file_format == "html":
+                    fig.write_html(path, include_plotlyjs=True)
+                else:
+                    fig.write_json(path)
+        return country
+
+
+@instrumentation.instrumented
+def export_reports(cube: pd.DataFrame, output_dir: str, start_year: int, end_year: int, flag: str,
+                   file_format: str = "json", countries: list = None, executor: str = "process",
+                   max_workers: int = None) -> list:
+    """
+    Exports the figures of every metric for every country in the country year cube, or only for the given countries,
+    on a pool of threads or processes. The figures are written to the directory of the run, see run_directory, and
+    countries listed in the checkpoint file of the run for the format are skipped and every exported country is added
+    to it.
+
+    :param cube: Country year cube built with build_country_year_cube
+    :param output_dir: Directory where the figures are written
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param file_format: "json" for plotly json files or "html" for self-contained html files
+    :param countries: List of countries to be exported, by default every country in the cube
+    :param executor: "thread" to export on a thread pool or "process" to export on a process pool
+    :param max_workers: Maximum number of threads or processes
+    :return: List of countries that could not be exported along with the error
+
+    >>> import tempfile
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "USA"], "Year": [1948, 1948], "Age": [25.0, 22.0],
+    ...                                 "Name": [6, 5], "Sex_F": [2, 2], "Sex_M": [4, 3], "Medal_Bronze": [1, 0],
+    ...                                 "Medal_Silver": [1, 0], "Medal_Gold": [0, 2], "Season_Summer": [6, 5],
+    ...                                 "Season_Winter": [0, 0]})
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["UK", "USA"], "year": [1948, 1948],
+    ...                                "polity2": [10, 10], "value": [1.5, 2.5]})
+    >>> cube_test = helper_function.build_country_year_cube(olympic_df_test, polity_df_test)
+    >>> output = tempfile.mkdtemp()
+    >>> export_reports(cube_test, output, 1896, 2016, "GDP", executor="thread")
+    []
+    >>> sorted(os.listdir(os.path.join(output, "GDP_1896-2016", "USA")))[:2]
+    ['country_male_female_ratio.json', 'plot_country_age_polity.json']
+    >>> export_reports(cube_test, output, 1896, 2016, "POLITY SCORE", countries=["UK"], executor="thread")
+    []
+    >>> sorted(os.listdir(output))
+    ['GDP_1896-2016', 'POLITY_SCORE_1896-2016']
+    >>> export_reports(cube_test, output, 1896, 2016, "GDP", countries=["UK", "NARNIA"], executor="thread")
+    The given string country does not exist in the list
+    [('NARNIA', ValueError())]
+    """
+    output_dir = run_directory(output_dir, flag, start_year, end_year)
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = os.path.join(output_dir, CHECKPOINT_FILE.format(file_format))
+    completed = set()
+    if os.path.exists(checkpoint):
+        with open(checkpoint) as file:
+            completed = set(line.strip() for line in file if line.strip())
+    if countries is None:
+        countries = list(dict.fromkeys(cube.index))
+    pending = [country for country in countries if country not in completed]
+
+    pools = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+    failed = []
+    # Process workers attach the cube from a memory mapped file instead of each unpickling a copy of it, hence only
+    # the handle of the published cube is sent with every task
+    shared = shared_datasets.publish_frame(cube) if executor == "process" else None
+    try:
+        with pools[executor](max_workers=max_workers) as pool, open(checkpoint, "a") as checkpoint_file:
+            # On a thread pool the context is copied for every country so that the instrumentation spans are nested
+            # under this run
+            futures = {pool.submit(contextvars.copy_context().run if executor == "thread" else _call, export_country,
+                                   cube if shared is None else shared, country, start_year, end_year, flag,
+                                   output_dir, file_format): country
+                       for country in pending}
+            for future in as_completed(futures):
+                try:
+                    checkpoint_file.write(future.result() + "\n")
+                    checkpoint_file.flush()
+                except Exception as e:
+                    failed.append((futures[future], e))
+    finally:
+        if shared is not None:
+            shared.release()
+    return failed
+
+
+def main(argv: list = None):
+    """
+    Command line entry point. Loads the prepared datasets from the cache, builds the country year cube and exports the
+    figures of every country.
+
+    :param argv: List of command line arguments, by default the arguments of the script
+    :return:
+    """
+    parser = argparse.ArgumentParser(description="Export the olympic metric figures of every country")
+    parser.add_argument("--corrections", required=True,
+                        help="json file with the countries, country_dict and sport_dict correction dictionaries")
+    parser.add_argument("--output", default="reports", help="directory where the figures are written")
+    parser.add_argument("--format", default="json", choices=["json", "html"], help="format of the figure files")
+    parser.add_argument("--flag", default=constants.POLITY_SCORE, help="POLITY SCORE or GDP")
+    parser.add_argument("--start-year", type=int, default=1896)
+    parser.add_argument("--end-year", type=int, default=2016)
+    parser.add_argument("--countries", nargs="*", help="countries to export, by default every country")
+    parser.add_argument("--executor", default="process", choices=["thread", "process"])
+    parser.add_argument("--workers", type=int, help="number of threads or processes")
+    parser.add_argument("--olympic-file", default="athlete_events.csv")
+    parser.add_argument("--region-file", default="noc_regions.csv")
+    parser.add_argument("--polity-file", default="p5v2018.xls")
+    parser.add_argument("--mapper-file", default="Mapper_GDP.xlsx")
+    parser.add_argument("--gdp-file", default="WEOOct2021all_new.xlsx")
+    parser.add_argument("--cache-dir", default=constants.CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    countries, country_dict, sport_dict = load_corrections(args.corrections)
+    prepared = data_cache.prepare_datasets_cached(args.olympic_file, args.region_file, args.polity_file,
+                                                  args.mapper_file, args.gdp_file, countries, country_dict,
+                                                  sport_dict, args.cache_dir)
+    if prepared is None:
+        raise SystemExit(1)
+    olympic_df, polity_df, _ = prepared
+    cube = helper_function.build_country_year_cube(olympic_df, polity_df)
+    failed = export_reports(cube, args.output, args.start_year, args.end_year, args.flag, args.format,
+                            args.countries, args.executor, args.workers)
+    for country, error in failed:
+        print("There was an error in exporting {}: {!r}".format(country, error))
+    print(constants.PLOT_END)
+
+
+if __name__ == "__main__":
+    main()
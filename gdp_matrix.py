@@ -0,0 +1,140 @@
+"""
+Gdp matrix is a module that holds the WEO series as a dense array indexed by the series, the country and the year,
+instead of a long table melted from the yearly columns of the workbook. The values of any rows are looked up at once
+by converting their country and year to positions in the array and gathering them, which replaces the merge of the
+political dataset with the melted table. Several WEO series, for example the GDP in purchasing power parity, the GDP
+per capita and the population, are held in the same array so that they are read and joined in a single pass.
+"""
+import numpy as np
+import pandas as pd
+import constants
+
+
+class GdpMatrix:
+    """
+    Dense array of the WEO series. Countries are the upper case WEO country names, as in the Map column of the mapper
+    file, and years are consecutive from the first year of the WEO dataset.
+
+    >>> gdp_test = pd.DataFrame({"ISO": ["USA", "USA", "GBR"],
+    ...                          "Country": ["United States", "United States", "United Kingdom"],
+    ...                          "WEO Subject Code": ["NGDPD", "LP", "NGDPD"],
+    ...                          "Scale": ["Billions", "Millions", "Billions"],
+    ...                          2015: [18238.3, 320.7, 2934.9], 2016: [18745.1, 323.1, 2699.7]})
+    >>> matrix = build_gdp_matrix(gdp_test, ["value", "population"])
+    >>> matrix.lookup(["UNITED STATES", "UNITED KINGDOM", "FRANCE"], [2016, 2015, 2016])
+         value  population
+    0  18.7451       323.1
+    1   2.9349         NaN
+    2      NaN         NaN
+    """
+
+    def __init__(self, countries: pd.Index, iso: np.ndarray, years: np.ndarray, values: np.ndarray, series: list):
+        """
+        :param countries: Upper case WEO country names
+        :param iso: ISO code of each country
+        :param years: Consecutive years of the array
+        :param values: Array of shape (series, countries, years) of the values
+        :param series: Names of the series, keys of constants.WEO_SERIES
+        """
+        self.countries = countries
+        self.iso = iso
+        self.years = years
+        self.values = values
+        self.series = series
+
+    def positions(self, countries, years) -> tuple:
+        """
+        Converts countries and years to positions in the array
+
+        :param countries: Upper case country names of the rows
+        :param years: Years of the rows
+        :return: Arrays of the country and year positions, -1 for the countries and years not in the array
+        """
+        country_positions = self.countries.get_indexer(np.asarray(countries, dtype=object))
+        years = pd.to_numeric(pd.Series(np.asarray(years, dtype=object)), errors="coerce").to_numpy(dtype=float)
+        year_positions = years - (self.years[0] if len(self.years) else 0)
+        valid = (year_positions >= 0) & (year_positions < len(self.years)) & (year_positions % 1 == 0)
+        return country_positions, np.where(valid, year_positions, -1).astype(np.int64)
+
+    def lookup(self, countries, years) -> pd.DataFrame:
+        """
+        Gathers the values of every series for the given rows
+
+        :param countries: Upper case country names of the rows
+        :param years: Years of the rows
+        :return: Dataframe with one column for each series, with missing values for the rows not in the array
+        """
+        country_positions, year_positions = self.positions(countries, years)
+        found = (country_positions >= 0) & (year_positions >= 0)
+        gathered = np.full((len(self.series), len(found)), np.nan)
+        gathered[:, found] = self.values[:, country_positions[found], year_positions[found]]
+        return pd.DataFrame(dict(zip(self.series, gathered)))
+
+    def join(self, frame: pd.DataFrame, country_column: str, year_column: str) -> pd.DataFrame:
+        """
+        Adds the ISO, Country and variable columns, which are the ISO code, the WEO country name and the year of the
+        matched WEO values, and one column for each series to the rows of the frame
+
+        :param frame: Dataframe with a country and a year column
+        :param country_column: Column with the upper case WEO country name
+        :param year_column: Column with the year
+        :return: The frame with the columns added
+        """
+        country_positions, year_positions = self.positions(frame[country_column], frame[year_column])
+        found = (country_positions >= 0) & (year_positions >= 0)
+        frame = frame.copy()
+        for column, values in (("ISO", self.iso), ("Country", np.asarray(self.countries, dtype=object)),
+                               ("variable", self.years.astype(object))):
+            joined = np.full(len(frame), np.nan, dtype=object)
+            joined[found] = values[country_positions[found] if column != "variable" else year_positions[found]]
+            frame[column] = joined
+        lookup = self.lookup(frame[country_column], frame[year_column])
+        for name in self.series:
+            frame[name] = lookup[name].to_numpy()
+        return frame
+
+
+def build_gdp_matrix(gdp_df: pd.DataFrame, series: list = None) -> GdpMatrix:
+    """
+    Builds the array of the given series from the rows of the WEO dataset. When a country has several rows for a
+    series the first one is kept.
+
+    :param gdp_df: Rows of the WEO dataset with the ISO, Country, WEO Subject Code and Scale columns and the yearly
+    columns
+    :param series: Names of the series, keys of constants.WEO_SERIES, by default constants.GDP_SERIES
+    :return: The array of the series
+    """
+    series = series or constants.GDP_SERIES
+    year_columns = sorted(column for column in gdp_df.columns if isinstance(column, int))
+    years = np.arange(year_columns[0], year_columns[-1] + 1) if year_columns else np.array([], dtype=int)
+    gdp_df = gdp_df[gdp_df['Country'].notnull()]
+    codes, countries = pd.factorize(gdp_df['Country'].str.upper())
+    iso = np.empty(len(countries), dtype=object)
+    iso[codes[::-1]] = gdp_df['ISO'].to_numpy()[::-1]
+    values = np.full((len(series), len(countries), len(years)), np.nan)
+    for position, name in enumerate(series):
+        subject_code, scale, divisor = constants.WEO_SERIES[name]
+        rows = ((gdp_df['WEO Subject Code'] == subject_code) & (gdp_df['Scale'] == scale)).to_numpy()
+        rows &= ~pd.Series(codes).where(rows).duplicated().to_numpy()
+        values[position][np.ix_(codes[rows], np.asarray(year_columns) - years[0])] = \
+            gdp_df.loc[rows, year_columns].to_numpy().astype(float) / divisor
+    return GdpMatrix(pd.Index(countries, dtype=object), iso, years, values, list(series))
+
+
+def add_per_capita(frame: pd.DataFrame, columns: list, population: str = "population") -> pd.DataFrame:
+    """
+    Adds the given columns per million inhabitants, for example the medals per million inhabitants of the country year
+    cube built with the population series
+
+    :param frame: Dataframe with the columns and the population in millions
+    :param columns: Columns to be divided by the population
+    :param population: Column of the population in millions
+    :return: The frame with a <column>_per_million column for each column
+
+    >>> add_per_capita(pd.DataFrame({"TotalMedals": [12, 3], "population": [4.0, 0.0]}), ["TotalMedals"])
+       TotalMedals  population  TotalMedals_per_million
+    0           12         4.0                      3.0
+    1            3         0.0                      NaN
+    """
+    divisor = frame[population].where(frame[population] > 0)
+    return frame.assign(**{"{}_per_million".format(column): frame[column] / divisor for column in columns})
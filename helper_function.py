@@ -1,17 +1,53 @@
 """
 Helper function is a module containing functions to assist the olympic data analysis performed in the jupyter notebook.
+The plotting functions are defined in the plotting module, which is imported only when one of them is first used, so
+that the data functions can be used without importing plotly.
 """
-from multiprocessing import Process
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from functools import partial
+import time
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import warnings
 import constants
-warnings.filterwarnings('ignore')
+import country_alias
+import excel_reader
+import gdp_matrix
+import instrumentation
 
+# Functions of the plotting module available as attributes of this module
+PLOTTING_FUNCTIONS = ["plot_country_medal_polity", "plot_perc_of_medals_to_participant",
+                      "plot_country_medal_to_participants_ratio", "plot_country_age_polity",
+                      "plot_country_season_wise_participants", "country_male_female_ratio", "configure_correct_plot",
+                      "plot_countries", "plot_figure", "plot_subplot", "plot_grid", "plot_graphs_for_country",
+                      "plot_gdp_subplot"]
+# Keys of the groups of the olympic dataset
+OLYMPIC_GROUP_KEYS = ['region', 'Year', 'NOC', 'City', 'Sport', 'Event']
+# Count columns of the olympic dataset, with the column and the value that each of them counts
+COUNT_COLUMNS = {"Sex_F": ("Sex", "F"), "Sex_M": ("Sex", "M"), "Medal_Bronze": ("Medal", "Bronze"),
+                 "Medal_Silver": ("Medal", "Silver"), "Medal_Gold": ("Medal", "Gold"),
+                 "Season_Summer": ("Season", "Summer"), "Season_Winter": ("Season", "Winter")}
+# Columns of the olympic dataset with the number of distinct teams that won each kind of medal, by medal column. They
+# are used by correct_team_medals_won to count the medals of the team games.
+TEAM_MEDAL_COLUMNS = {"Medal_Bronze": "TeamMedal_Bronze", "Medal_Silver": "TeamMedal_Silver",
+                      "Medal_Gold": "TeamMedal_Gold"}
 
-def prepare_olympic_dataset(olympic_file_name: str, region_file_name: str) -> tuple:
+
+def __getattr__(name: str):
+    """
+    Returns the plotting function of the given name, importing the plotting module on first use
+
+    :param name: Name of the attribute
+    :return: The plotting function
+    """
+    if name in PLOTTING_FUNCTIONS:
+        import plotting
+        return getattr(plotting, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+@instrumentation.instrumented
+def prepare_olympic_dataset(olympic_file_name: str, region_file_name: str, chunksize: int = None) -> tuple:
     """
     This function prepares the required olympics dataframe for analysis from the dataset at
     https://www.kaggle.com/heesoo37/120-years-of-olympic-history-athletes-and-results
@@ -21,9 +57,12 @@ def prepare_olympic_dataset(olympic_file_name: str, region_file_name: str) -> tu
     Categorical variables like sex, medal, season are split into individual columns
     We then group by the 'region', 'Year', 'NOC', 'City', 'Sport', 'Event'
     and sum up the other numeric columns for further analysis
+    If chunksize is given, the olympic data is streamed in chunks of that many rows and every chunk is folded into
+    running group aggregates, so that the memory used does not grow with the size of the olympic data file.
 
     :param olympic_file_name: File name that contains olympics data
     :param region_file_name: File name that contains country to country code mapping
+    :param chunksize: Number of rows of the olympic data read at a time, by default the whole file is read at once
     :return: Final data set with data in required format for analysis and the country code dataset
 
     >>> prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
@@ -41,7 +80,7 @@ def prepare_olympic_dataset(olympic_file_name: str, region_file_name: str) -> tu
     114148     ZIMBABWE  2016  ZIM  ...          0           1.0             0
     114149     ZIMBABWE  2016  ZIM  ...          0           1.0             0
     <BLANKLINE>
-    [114150 rows x 15 columns],      NOC       region                 notes
+    [114150 rows x 18 columns],      NOC       region                 notes
     0    AFG  AFGHANISTAN                   NaN
     1    AHO      CURACAO  Netherlands Antilles
     2    ALB      ALBANIA                   NaN
@@ -61,29 +100,190 @@ def prepare_olympic_dataset(olympic_file_name: str, region_file_name: str) -> tu
     """
     try:
         # Read the respective datasets
-        olympic_df = pd.read_csv(olympic_file_name)
         noc_df = pd.read_csv(region_file_name)
+        if chunksize is not None:
+            noc_df["region"] = noc_df["region"].str.upper()
+            return aggregate_olympic_chunks(pd.read_csv(olympic_file_name, chunksize=chunksize), noc_df), noc_df
+        olympic_df = pd.read_csv(olympic_file_name)
     except FileNotFoundError:
         print("File not found. Please enter the correct file name")
         return
-    olympic_df["Team"] = olympic_df["Team"].str.upper()
+    return aggregate_olympic_dataset(olympic_df, noc_df)
+
+
+def aggregate_olympic_dataset(olympic_df: pd.DataFrame, noc_df: pd.DataFrame) -> tuple:
+    """
+    This function prepares the olympics dataframe from the rows already read from the athlete events and country code
+    files, see prepare_olympic_dataset
+
+    :param olympic_df: Rows of the athlete events file
+    :param noc_df: Rows of the country code file
+    :return: Final data set with data in required format for analysis and the country code dataset
+
+    >>> olympic_test = pd.DataFrame({"Name": ["A", "B", "C"], "Sex": ["M", "F", "M"], "Age": [20.0, 30.0, 25.0],
+    ...                              "Team": ["gb"] * 3, "NOC": ["GBR"] * 3, "Year": [1948] * 3,
+    ...                              "Season": ["Summer", "Summer", "Winter"], "City": ["London"] * 3,
+    ...                              "Sport": ["Rowing"] * 3, "Event": ["Eights"] * 3,
+    ...                              "Medal": ["Gold", "Silver", "Bronze"]})
+    >>> aggregate_olympic_dataset(olympic_test, pd.DataFrame({"NOC": ["GBR"], "region": ["UK"]}))[0][
+    ...     ["region", "Age", "Name", "Sex_F", "Medal_Gold"]]
+      region   Age  Name  Sex_F  Medal_Gold
+    0     UK  25.0     3      1           1
+    """
     noc_df["region"] = noc_df["region"].str.upper()
-    # Combine the datasets based on country code
-    olympic_noc = olympic_df.merge(noc_df, left_on="NOC", right_on="NOC", how="inner")
-    olympic_noc = pd.get_dummies(olympic_noc, columns=["Sex", "Medal", "Season"])
-    # aggregate the columns to form a meaningful dataset for analysis
-    final_df = olympic_noc.groupby(['region', 'Year', 'NOC', 'City', 'Sport', 'Event'
-                                    ]).agg({"Age": np.mean,
-                                            "Name": 'count',
-                                            'Sex_F': 'sum',
-                                            'Sex_M': 'sum',
-                                            'Medal_Bronze': 'sum',
-                                            'Medal_Silver': 'sum',
-                                            'Medal_Gold': 'sum', 'Season_Summer': 'sum',
-                                            'Season_Winter': 'sum'}).reset_index()
+    # Combine the datasets based on country code, with the same rows as an inner merge
+    rows, positions = country_alias.match_aliases(olympic_df["NOC"], noc_df["NOC"])
+    matched = positions >= 0
+    rows, positions = rows[matched], positions[matched]
+    keys = [noc_df["region"].to_numpy()[positions]] + [olympic_df[key].to_numpy()[rows]
+                                                         for key in OLYMPIC_GROUP_KEYS[1:]]
+    # aggregate the columns to form a meaningful dataset for analysis. Every row gets the number of its group, and
+    # each column is reduced over the group numbers at once instead of expanding the categories into dummy columns
+    groups, first_rows = factorize_groups(keys)
+    kept = groups >= 0
+    rows, groups = rows[kept], groups[kept]
+    final_df = pd.DataFrame({key: values[first_rows] for key, values in zip(OLYMPIC_GROUP_KEYS, keys)})
+    age = olympic_df["Age"].to_numpy(dtype=float)[rows]
+    known = ~np.isnan(age)
+    age_count = np.bincount(groups[known], minlength=len(first_rows))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        final_df["Age"] = np.where(age_count > 0, np.bincount(groups[known], age[known], len(first_rows)) / age_count,
+                                   np.nan)
+    final_df["Name"] = np.bincount(groups[olympic_df["Name"].notnull().to_numpy()[rows]], minlength=len(first_rows))
+    categories = {}
+    for name, (column, value) in COUNT_COLUMNS.items():
+        if column not in categories:
+            codes, uniques = pd.factorize(olympic_df[column])
+            categories[column] = codes[rows], pd.Index(uniques)
+        codes, uniques = categories[column]
+        code = uniques.get_indexer([value])[0]
+        counts = np.bincount(groups[codes == code], minlength=len(first_rows)) if code >= 0 else \
+            np.zeros(len(first_rows), dtype=np.int64)
+        final_df[name] = _narrow_counts(counts)
+    if "Team" in olympic_df.columns:
+        # Number of distinct teams of the group that won each kind of medal, a missing team being a team of its own
+        team_codes, teams = pd.factorize(olympic_df["Team"])
+        team_codes = np.where(team_codes < 0, len(teams), team_codes)[rows]
+        medal_codes, medal_uniques = categories["Medal"]
+        for name, team_name in TEAM_MEDAL_COLUMNS.items():
+            code = medal_uniques.get_indexer([COUNT_COLUMNS[name][1]])[0]
+            won = (medal_codes == code) & (code >= 0)
+            pairs = np.unique(groups[won] * (len(teams) + 1) + team_codes[won])
+            final_df[team_name] = _narrow_counts(np.bincount(pairs // (len(teams) + 1), minlength=len(first_rows)))
     return final_df, noc_df
 
 
+def factorize_groups(keys: list) -> tuple:
+    """
+    Numbers the groups of the rows with the same values of the keys, in the sorted order of the keys like groupby. The
+    keys are factorized one at a time and combined into a single integer per row, without building any intermediate
+    dataframe. Rows with a missing key are not part of any group, like in groupby.
+
+    :param keys: List of the arrays of key values, all of the same length
+    :return: Array with the group number of each row, -1 for rows with a missing key, and array with the position of
+    the first row of each group
+
+    >>> groups, first_rows = factorize_groups([np.array(["USA", "UK", "USA", None]),
+    ...                                        np.array([1948, 1952, 1948, 1948])])
+    >>> groups.tolist(), first_rows.tolist()
+    ([1, 0, 1, -1], [1, 0])
+    """
+    length = len(keys[0]) if keys else 0
+    combined = np.zeros(length, dtype=np.int64)
+    missing = np.zeros(length, dtype=bool)
+    size = 1
+    for key in keys:
+        codes, uniques = pd.factorize(key, sort=True)
+        missing |= codes < 0
+        if size * max(len(uniques), 1) >= 2 ** 62:
+            # Renumber the groups found so far to keep the combined number within 64 bits
+            _, combined = np.unique(combined, return_inverse=True)
+            size = combined.max() + 1 if length else 1
+        combined = combined * max(len(uniques), 1) + codes
+        size *= max(len(uniques), 1)
+    _, first_rows, numbers = np.unique(combined[~missing], return_index=True, return_inverse=True)
+    groups = np.full(length, -1, dtype=np.int64)
+    groups[~missing] = numbers
+    return groups, np.flatnonzero(~missing)[first_rows]
+
+
+def _narrow_counts(counts) -> np.ndarray:
+    """
+    Returns the counts as unsigned 8 bit integers, the type of the dummy column sums, when they fit in it
+
+    :param counts: Array of counts
+    :return: Array of counts of the narrowest type
+    """
+    counts = np.asarray(counts)
+    return counts.astype('uint8' if counts.max(initial=0) <= np.iinfo(np.uint8).max else 'uint64')
+
+
+@instrumentation.instrumented
+def aggregate_olympic_chunks(chunks, noc_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function aggregates the olympic data one chunk at a time. Every chunk is merged with the country code data and
+    reduced to sums and counts for each 'region', 'Year', 'NOC', 'City', 'Sport', 'Event' group, which are added to the
+    running totals of the previous chunks. The average age is computed from the summed ages and age counts at the end.
+    The result is the same as the dataset returned by prepare_olympic_dataset.
+
+    :param chunks: Iterable of olympic data chunks, like the reader returned by pd.read_csv with chunksize
+    :param noc_df: Country code dataset with the region in upper case
+    :return: Final data set with data in required format for analysis
+
+    >>> chunks_test = [pd.DataFrame({"Name": ["A", "B"], "Sex": ["M", "F"], "Age": [20.0, np.nan], "NOC": ["GBR"] * 2,
+    ...                              "Year": [1948] * 2, "Season": ["Summer"] * 2, "City": ["London"] * 2,
+    ...                              "Sport": ["Rowing"] * 2, "Event": ["Rowing Men's Eights"] * 2,
+    ...                              "Medal": ["Gold", np.nan]}),
+    ...                pd.DataFrame({"Name": ["C"], "Sex": ["M"], "Age": [30.0], "NOC": ["GBR"], "Year": [1948],
+    ...                              "Season": ["Summer"], "City": ["London"], "Sport": ["Rowing"],
+    ...                              "Event": ["Rowing Men's Eights"], "Medal": ["Gold"]})]
+    >>> noc_test = pd.DataFrame({"NOC": ["GBR"], "region": ["UK"]})
+    >>> aggregate_olympic_chunks(chunks_test, noc_test)[["region", "Age", "Name", "Sex_F", "Medal_Gold"]]
+      region   Age  Name  Sex_F  Medal_Gold
+    0     UK  25.0     3      1           2
+    >>> aggregate_olympic_chunks([], noc_test).columns.tolist()[5:9]
+    ['Event', 'Age', 'Name', 'Sex_F']
+    >>> len(aggregate_olympic_chunks([chunks_test[1].assign(NOC="FRA")], noc_test))
+    0
+    """
+    keys = OLYMPIC_GROUP_KEYS
+    dummies = COUNT_COLUMNS
+    running = None
+    # Distinct teams that won a medal in every group, which cannot be summed over the chunks like the counts
+    medal_teams = []
+    for chunk in chunks:
+        chunk = chunk.merge(noc_df[["NOC", "region"]], left_on="NOC", right_on="NOC", how="inner")
+        if "Team" in chunk.columns:
+            medal_teams.append(chunk.loc[chunk["Medal"].notnull(), keys + ["Team", "Medal"]].fillna(
+                {"Team": ""}).drop_duplicates())
+        partial = chunk[keys].assign(Age=chunk["Age"], Age_count=chunk["Age"].notnull().astype(np.int64),
+                                     Name=chunk["Name"].notnull().astype(np.int64),
+                                     **{name: (chunk[column] == value).astype(np.int64)
+                                        for name, (column, value) in dummies.items()})
+        partial = partial.groupby(keys, sort=False).sum()
+        running = partial if running is None else pd.concat([running, partial]).groupby(level=keys, sort=False).sum()
+    if running is None:
+        # No chunk was read, the dataset has the columns and no rows
+        running = pd.DataFrame({name: pd.Series(dtype=np.int64) for name in ["Age", "Age_count", "Name", *dummies]},
+                               index=pd.MultiIndex.from_arrays([[]] * len(keys), names=keys))
+    running = running.sort_index()
+    # Mean of the ages that are present, missing if no age is present in the group
+    running["Age"] = (running["Age"] / running["Age_count"]).where(running["Age_count"] > 0)
+    # The dummy columns are unsigned 8 bit integers, and their sums keep that type when the totals fit in it
+    for name in dummies:
+        running[name] = _narrow_counts(running[name])
+    columns = ["Age", "Name"] + list(dummies)
+    if medal_teams:
+        teams = pd.concat(medal_teams).drop_duplicates().groupby(keys + ["Medal"]).size().unstack("Medal")
+        teams = teams.reindex(running.index).fillna(0)
+        for name, team_name in TEAM_MEDAL_COLUMNS.items():
+            medal = dummies[name][1]
+            running[team_name] = _narrow_counts(teams[medal] if medal in teams.columns else np.zeros(len(running)))
+        columns += list(TEAM_MEDAL_COLUMNS.values())
+    return running[columns].reset_index()
+
+
+@instrumentation.instrumented
 def prepare_polity_dataset(polity_file_name: str, noc_df: pd.DataFrame) -> pd.DataFrame:
     """
     This function prepares the required political dataframe from the dataset at 
@@ -117,34 +317,52 @@ def prepare_polity_dataset(polity_file_name: str, noc_df: pd.DataFrame) -> pd.Da
     File not found. Please enter the correct file name
     """
     try:
-        # Read the excel file
-        polity = pd.read_excel(polity_file_name, )
+        polity = read_polity_file(polity_file_name)
     except FileNotFoundError:
         print("File not found. Please enter the correct file name")
         return
-    polity = polity[polity.year >= 1890]  # Olympic dataset begins from 1890 while polity dataset from 1776.
-    # Hence we consider data from 1890 only
+    return clean_polity_dataset(polity, noc_df)
+
+
+def read_polity_file(polity_file_name: str) -> pd.DataFrame:
+    """
+    This function reads the rows of the polity dataset needed for the analysis
+
+    :param polity_file_name: File name of the polity dataset
+    :return: Rows of the polity dataset from 1890
+    """
+    # Stream the excel file keeping only the required columns.
+    # Olympic dataset begins from 1890 while polity dataset from 1776. Hence we consider data from 1890 only
+    return excel_reader.read_excel_filtered(polity_file_name,
+                                            ["scode", "country", "year", "polity", "polity2", "durable"],
+                                            {"year": lambda year: year >= 1890})
+
+
+def clean_polity_dataset(polity: pd.DataFrame, noc_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    This function cleans the rows read from the polity dataset. Only the years from 1890 are kept and the political data
+    is merged with the country code data to stay consistent with country names
+
+    :param polity: Rows of the polity dataset
+    :param noc_df: Country code dataset
+    :return: Final political dataset for further analysis
+    """
+    polity = polity[polity.year >= 1890].copy()
     polity["country"] = polity["country"].str.upper().str.strip()
-    # Join the Olympic and polity dataset where country name is same
-    polity_dff = polity.merge(noc_df, left_on="country", right_on="region", how="left")
-    # Join the Olympic and polity dataset where country code is same
-    polity_dff1 = polity_dff.merge(noc_df, left_on="scode", right_on="NOC", how="left")
-    # If country in polity dataset is null, then map the country from olympic dataset
-    polity_dff1['region_z'] = np.where(polity_dff1['region_x'].isnull(), polity_dff1['region_y'],
-                                       polity_dff1['region_x'])
-    polity_dff1['NOC_z'] = np.where(polity_dff1['NOC_x'].isnull(), polity_dff1['NOC_y'], polity_dff1['NOC_x'])
-    cols = ["scode", "country", "year", "polity", "polity2", "durable", "region_z", "NOC_z"]  # Filter columns
-    poltiy_dff2 = polity_dff1[cols]
-    # Rename columns
-    polity_dff2 = poltiy_dff2.rename(columns={"region_z": "alternate_region", "NOC_z": "alternate_noc"})
-    return polity_dff2
+    cols = ["scode", "country", "year", "polity", "polity2", "durable"]  # Filter columns
+    # Look up the country name among the olympic regions, and the country code among the olympic codes where the name
+    # is not found, in one pass over the alias index
+    return country_alias.resolve_polity_countries(country_alias.build_alias_index(noc_df), polity[cols])
 
 
+@instrumentation.instrumented
 def handle_countries_that_split(countries: dict, olympic_df: pd.DataFrame, noc_df: pd.DataFrame) -> pd.DataFrame:
     """
-    This function corrects the olympic dataset for countries that have split up during the war
+    This function corrects the olympic dataset for countries that have split up during the war. A correction can be
+    limited to a range of years, for example {"FRG": ["GERMANY WEST", 1949, 1990]}, in which case the country code
+    dataset is not corrected for it. All the corrections are made with one lookup in the country alias index.
     :param countries: Dictionary of countries that have split up with key as the country code and value as the
-    country name
+    country name, or as a list of the country name, the first year and the last year
     :param olympic_df: Olympic dataset
     :param noc_df: Country code dataset
     :return: Corrected olympic dataset
@@ -169,12 +387,37 @@ def handle_countries_that_split(countries: dict, olympic_df: pd.DataFrame, noc_d
     <BLANKLINE>
     [271116 rows x 16 columns]
     """
-    for key, value in countries.items():
-        olympic_df.loc[olympic_df["NOC"] == key, "region"] = value
-        noc_df.loc[noc_df["NOC"] == key, "region"] = value
+    index = country_alias.build_alias_index(noc_df, countries)
+    region = country_alias.resolve_splits(index, olympic_df["NOC"], olympic_df["Year"])
+    olympic_df["region"] = np.where(pd.isnull(region), olympic_df.get("region", np.nan), region)
+    correct_country_codes(countries, noc_df, index)
     return olympic_df
 
 
+def correct_country_codes(countries: dict, noc_df: pd.DataFrame, index: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    This function corrects the country code dataset for countries that have split up. The country code dataset has no
+    years, hence only the corrections that apply to every year are made.
+    :param countries: Dictionary of countries that have split up with key as the country code and value as the
+    country name, or as a list of the country name, the first year and the last year
+    :param noc_df: Country code dataset, which is corrected in place
+    :param index: Alias index built with country_alias.build_alias_index, built from the arguments if it is not given
+    :return: Corrected country code dataset
+
+    >>> noc_df_test = pd.DataFrame({"NOC": ["GDR", "FRG"], "region": ["GERMANY", "GERMANY"]})
+    >>> correct_country_codes({"GDR": "GERMANY EAST", "FRG": ["GERMANY WEST", 1949, 1990]}, noc_df_test)
+       NOC        region
+    0  GDR  GERMANY EAST
+    1  FRG       GERMANY
+    """
+    if index is None:
+        index = country_alias.build_alias_index(noc_df, countries)
+    region = country_alias.resolve_splits(index, noc_df["NOC"])
+    noc_df["region"] = np.where(pd.isnull(region), noc_df["region"], region)
+    return noc_df
+
+
+@instrumentation.instrumented
 def map_polity_region_dataset(country_dict: dict, polity_df: pd.DataFrame, country_mapper: dict) -> pd.DataFrame:
     """
     This function corrects the errors in country mapping in polity dataset and olympic dataset.
@@ -210,15 +453,28 @@ def map_polity_region_dataset(country_dict: dict, polity_df: pd.DataFrame, count
     return polity_dff3
 
 
+@instrumentation.instrumented
 def correct_team_medals_won(olympics_df: pd.DataFrame, sport_dict: dict) -> pd.DataFrame:
     """
     This function corrects the error in medal won for team games. When a country wins a team games like basketball,
     the olympic dataset considers it as 14 medals won, whereas its just 1 medal win. Hence we correct this issue using
-    a dictionary that lists all the olympic team sports.
+    a dictionary that lists all the olympic team sports. Team games are identified once for each distinct sport and
+    event, and the medals of team games are counted as one medal per team. The teams are told apart by the Team column
+    of the athlete rows, see aggregate_olympic_dataset.
     :param olympics_df: Olympic dataset
     :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
     :return: Corrected Olympic dataset
 
+    >>> doubles_test = pd.DataFrame({"Name": ["A", "B", "C", "D"], "Sex": ["M"] * 4, "Age": [25.0] * 4,
+    ...                              "Team": ["France-1", "France-1", "France-2", "France-2"], "NOC": ["FRA"] * 4,
+    ...                              "Year": [1900] * 4, "Season": ["Summer"] * 4, "City": ["Paris"] * 4,
+    ...                              "Sport": ["Tennis"] * 4, "Event": ["Tennis Men's Doubles"] * 4,
+    ...                              "Medal": ["Bronze"] * 4})
+    >>> doubles_df, _ = aggregate_olympic_dataset(doubles_test, pd.DataFrame({"NOC": ["FRA"], "region": ["France"]}))
+    >>> correct_team_medals_won(doubles_df, {"Tennis": True})[["region", "Name", "Medal_Bronze", "TeamGame"]]
+       region  Name  Medal_Bronze  TeamGame
+    0  FRANCE     4             2      True
+
     >>> olympic_df, noc = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
     >>> sport_dict_test = {'Rugby': True, \
     'Alpinism':False, 'Speed Skating':False, 'Ice Hockey':True, 'Nordic Combined':False, \
@@ -248,72 +504,165 @@ def correct_team_medals_won(olympics_df: pd.DataFrame, sport_dict: dict) -> pd.D
     [12 rows x 16 columns]
 
     """
-    # Find out if the olympic game is a team game or not
-    olympics_df['TeamGame'] = olympics_df.apply(
-        lambda x: True if ((sport_dict[x.Sport]) & ('Single' not in x.Event) & ('One' not in x.Event) | (
-                'Relay' in x.Event)) else False, axis=1)
-    olympics_df.loc[((olympics_df.TeamGame == True) & (
-            olympics_df.Medal_Bronze > 0)), "Medal_Bronze"] = olympics_df.Medal_Bronze / olympics_df.Name
-    olympics_df.loc[
-        (olympics_df.TeamGame == True) & (
-                olympics_df.Medal_Gold > 0), 'Medal_Gold'] = olympics_df.Medal_Gold / olympics_df.Name
-    olympics_df.loc[(olympics_df.TeamGame == True) & (
-            olympics_df.Medal_Silver > 0), 'Medal_Silver'] = olympics_df.Medal_Silver / olympics_df.Name
-    olympics_df[['Medal_Bronze', 'Medal_Gold', 'Medal_Silver']] = olympics_df[
-        ['Medal_Bronze', 'Medal_Gold', 'Medal_Silver']].astype('uint8')
+    # Find out if the olympic game is a team game or not, once for each distinct sport and event
+    codes, pairs = pd.MultiIndex.from_frame(olympics_df[['Sport', 'Event']]).factorize()
+    events = pairs.get_level_values(1)
+    team_sport = np.array([sport_dict[sport] for sport in pairs.get_level_values(0)], dtype=bool)
+    team_game = (team_sport & ~events.str.contains('Single', regex=False) & ~events.str.contains('One', regex=False)) \
+        | events.str.contains('Relay', regex=False)
+    olympics_df['TeamGame'] = np.asarray(team_game)[codes]
+    # Each member of a winning team is counted as a medal. The medals of a team game are the number of distinct teams
+    # of the country that won them, counted from the Team column of the athlete rows, so that two doubles teams of a
+    # country winning bronze count as two medals. Without these counts, a country is taken to have won at most one
+    # medal of a kind in a team event.
+    medal_columns = ['Medal_Bronze', 'Medal_Gold', 'Medal_Silver']
+    team_columns = [TEAM_MEDAL_COLUMNS[column] for column in medal_columns]
+    medals = olympics_df[medal_columns].to_numpy()
+    if all(column in olympics_df.columns for column in team_columns):
+        team_medals = olympics_df[team_columns].to_numpy()
+        olympics_df = olympics_df.drop(columns=team_columns)
+    else:
+        team_medals = np.minimum(medals, 1)
+    olympics_df[medal_columns] = np.where(olympics_df['TeamGame'].to_numpy()[:, None], team_medals, medals)
     return olympics_df
 
 
-def plot_country_medal_polity(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                              start_year: int, end_year: int, flag):
+@instrumentation.instrumented
+def build_country_year_cube(olympic_df: pd.DataFrame, polity_df: pd.DataFrame,
+                            athletes_df: pd.DataFrame = None) -> pd.DataFrame:
     """
-    This function plots the medals won by the given country for each year, between the given year range.
-    This plot is overlapped with the political score of the given country for each year, between the given year range
-    for easy analysis.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of country medal polity for the two countries in the list.
+    This function builds the country year cube which holds every metric that is plotted, that is the medals,
+    participants, gender, season and average age from the olympic dataset along with the polity score and GDP from the
+    political dataset, for every country and year present in both datasets. The other WEO series of the political
+    dataset, such as the population, are kept as well. The cube is indexed by the country and sorted by country and
+    year, so that the rows of a country can be sliced without copying the data. The participants in the Name column
+    count athlete entries, and the distinct athletes are added in the Athletes column when they are given.
 
     :param olympic_df: Olympics dataset
     :param polity_df: Political dataset
+    :param athletes_df: Distinct athletes of each region and Year, see distinct_athletes.count_distinct_athletes
+    :return: The country year cube
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "UK", "UK", "USA"], "Year": [1948, 1948, 1952, 1948],
+    ...                                 "Age": [20.0, 30.0, 24.0, 22.0], "Name": [2, 4, 3, 5], "Sex_F": [1, 1, 0, 2],
+    ...                                 "Sex_M": [1, 3, 3, 3], "Medal_Bronze": [0, 1, 0, 0],
+    ...                                 "Medal_Silver": [1, 0, 0, 0], "Medal_Gold": [0, 0, 1, 2],
+    ...                                 "Season_Summer": [2, 4, 3, 5], "Season_Winter": [0, 0, 0, 0]})
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["UK", "UK", "USA"], "year": [1948, 1952, 1948],
+    ...                                "polity2": [10, 10, 10], "value": [np.nan, np.nan, np.nan]})
+    >>> build_country_year_cube(olympic_df_test, polity_df_test)[["Year", "Name", "TotalMedals", "Age", "polity2"]]
+            Year  Name  TotalMedals   Age  polity2
+    region                                        
+    UK      1948     6            2  25.0     10.0
+    UK      1952     3            1  24.0     10.0
+    USA     1948     5            2  22.0     10.0
+    >>> narrow_test = olympic_df_test.astype({"Medal_Bronze": "uint8", "Medal_Silver": "uint8", "Medal_Gold": "uint8"})
+    >>> narrow_test[["Medal_Bronze", "Medal_Silver", "Medal_Gold"]] = 120
+    >>> build_country_year_cube(narrow_test, polity_df_test).TotalMedals.tolist()
+    [720, 360, 360]
+    >>> athletes_df_test = pd.DataFrame({"region": ["UK", "USA"], "Year": [1948, 1948], "Athletes": [4, 5]})
+    >>> build_country_year_cube(olympic_df_test, polity_df_test, athletes_df_test).Athletes.tolist()
+    [4, 0, 5]
+    """
+    sum_columns = ['Medal_Bronze', 'Medal_Silver', 'Medal_Gold', 'Name', 'Sex_F', 'Sex_M', 'Season_Summer',
+                   'Season_Winter']
+    # The sums are widened as the count columns may be narrow unsigned types, which would wrap around when the medals
+    # are added up below
+    olympic_year = olympic_df.groupby(['region', 'Year'], observed=True)[sum_columns].sum().astype(np.int64)
+    olympic_year['Age'] = olympic_df.groupby(['region', 'Year'], observed=True)['Age'].mean()
+    olympic_year['TotalMedals'] = olympic_year.Medal_Bronze + olympic_year.Medal_Silver + olympic_year.Medal_Gold
+    if athletes_df is not None:
+        athletes = athletes_df.groupby(['region', 'Year'], observed=True)['Athletes'].sum()
+        olympic_year['Athletes'] = athletes.reindex(olympic_year.index, fill_value=0).astype(np.int64)
+    polity_columns = [column for column in ['polity2'] + list(constants.WEO_SERIES) if column in polity_df.columns]
+    polity_year = polity_df.assign(year=polity_df['year'].astype(int)).groupby(
+        ['alternate_region', 'year'], observed=True)[polity_columns].mean()
+    polity_year.index.names = ['region', 'Year']
+    cube = olympic_year.join(polity_year, how='inner')
+    return cube.reset_index(level='Year')
+
+
+@instrumentation.instrumented
+def update_country_year_cube(cube: pd.DataFrame, olympic_df: pd.DataFrame, polity_df: pd.DataFrame,
+                             affected: pd.MultiIndex, athletes_df: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    This function recomputes the rows of the country year cube for the affected countries and years only, after new
+    rows were added to the olympic or political dataset. The other rows of the cube are kept as they are.
+
+    :param cube: Country year cube built with build_country_year_cube
+    :param olympic_df: Updated olympics dataset
+    :param polity_df: Updated political dataset
+    :param affected: Index of the (region, Year) pairs that changed
+    :param athletes_df: Updated distinct athletes of each region and Year, needed if the cube has the Athletes column
+    :return: The updated country year cube
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "USA"], "Year": [1948, 1948], "Age": [25.0, 22.0],
+    ...                                 "Name": [6, 5], "Sex_F": [2, 2], "Sex_M": [4, 3], "Medal_Bronze": [1, 0],
+    ...                                 "Medal_Silver": [1, 0], "Medal_Gold": [0, 2], "Season_Summer": [6, 5],
+    ...                                 "Season_Winter": [0, 0]})
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["UK", "USA", "UK"], "year": [1948, 1948, 1952],
+    ...                                "polity2": [10, 10, 10], "value": [np.nan, np.nan, np.nan]})
+    >>> cube_test = build_country_year_cube(olympic_df_test, polity_df_test)
+    >>> new_row = pd.DataFrame({"region": ["UK"], "Year": [1952], "Age": [24.0], "Name": [3], "Sex_F": [0],
+    ...                         "Sex_M": [3], "Medal_Bronze": [0], "Medal_Silver": [0], "Medal_Gold": [1],
+    ...                         "Season_Summer": [3], "Season_Winter": [0]})
+    >>> update_country_year_cube(cube_test, pd.concat([olympic_df_test, new_row]), polity_df_test,
+    ...                          pd.MultiIndex.from_tuples([("UK", 1952)]))[["Year", "Name", "TotalMedals"]]
+            Year  Name  TotalMedals
+    region
+    UK      1948     6            2
+    UK      1952     3            1
+    USA     1948     5            2
+    """
+    olympic_keys = pd.MultiIndex.from_arrays([olympic_df['region'], olympic_df['Year']])
+    polity_keys = pd.MultiIndex.from_arrays([polity_df['alternate_region'], polity_df['year'].astype(int)])
+    if athletes_df is not None:
+        athlete_keys = pd.MultiIndex.from_arrays([athletes_df['region'], athletes_df['Year']])
+        athletes_df = athletes_df[athlete_keys.isin(affected)]
+    rows = build_country_year_cube(olympic_df[olympic_keys.isin(affected)], polity_df[polity_keys.isin(affected)],
+                                   athletes_df)
+    cube_keys = pd.MultiIndex.from_arrays([cube.index, cube['Year']])
+    cube = pd.concat([cube[~cube_keys.isin(affected)], rows])
+    return cube.set_index('Year', append=True).sort_index().reset_index(level='Year')
+
+
+def country_year_slice(cube: pd.DataFrame, country: str, start_year: int, end_year: int) -> pd.DataFrame:
+    """
+    This function returns the rows of the country year cube for the given country between the given year range.
+    The rows are sliced by position, hence no data is copied.
+
+    :param cube: Country year cube built with build_country_year_cube
     :param country: Country for which the results to be plotted
     :param start_year: The start year for the plot
     :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010, 'GDP')
-    =================================================================================================
-    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    =================================================================================================
-    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    =================================================================================================
-
-    """
-    if type(country) == str:
-        country = [country]
-    label = constants.NUMBER_LABEL
-    agg_dict = {"Medal_Bronze": 'sum', 'Medal_Silver': 'sum', 'Medal_Gold': 'sum', 'polity2': np.mean, 'value': np.mean}
-    input_list = [["Bronze", "Year", "Medal_Bronze"], ["Silver", "Year", "Medal_Silver"],
-                  ["Gold", "Year", "Medal_Gold"]]
-    details = ["Medals Won vs "+flag.upper(), "Year", "Medals Won"]
-    configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
-                           details, label, None)
-    print("=================================================================================================")
+    :return: The rows of the cube for the given country and year range
+    """
+    try:
+        rows = cube.index.get_loc(country)
+    except KeyError:
+        print("The given string country does not exist in the list")
+        raise ValueError
+    if not isinstance(rows, slice):
+        rows = slice(rows, rows + 1)
+    years = cube['Year'].to_numpy()[rows]
+    start = rows.start + np.searchsorted(years, start_year, side='left')
+    stop = rows.start + np.searchsorted(years, end_year, side='right')
+    return cube.iloc[start:stop]
 
 
+@instrumentation.instrumented
 def modify_data_for_plot(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                         start_year: int, end_year: int, agg_dict: dict) -> pd.DataFrame:
+                         start_year: int, end_year: int, agg_dict: dict, cube: pd.DataFrame = None) -> pd.DataFrame:
     """
-    This function prepares the model to be plotted based on the aggregations mentioned in agg_dict
+    This function prepares the model to be plotted based on the aggregations mentioned in agg_dict. The values are
+    looked up in the country year cube, which is built from the datasets if it is not given.
     :param olympic_df: Olympics dataset
     :param polity_df: Political dataset
     :param country: Country for which the results to be plotted
     :param start_year: The start year for the plot
     :param end_year: The end year for the plot
     :param agg_dict: The values to aggregate the dataset on
+    :param cube: Country year cube built with build_country_year_cube
     :return: The dataset with values to be plotted
     >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
     >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
@@ -323,252 +672,61 @@ def modify_data_for_plot(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, coun
     ...
     ValueError
     """
-    if country not in olympic_df.region.unique():
-        print("The given string country does not exist in the list")
-        raise ValueError
-    temp_df = olympic_df.copy(deep=True)
-    temp_politify = polity_df[polity_df['alternate_region'] == country]
-    plot_df = temp_politify.merge(temp_df, left_on="year", right_on="Year", how="left")
-    plot_df = plot_df[(plot_df.region == country) & ((plot_df.Year >= start_year) &
-                                                     (plot_df.Year <= end_year))].groupby(
-        ['Year']).agg(agg_dict) \
-        .reset_index()
-
-    return plot_df
+    if cube is None:
+        cube = build_country_year_cube(olympic_df, polity_df)
+    plot_df = country_year_slice(cube, country, start_year, end_year)
+    return plot_df[plot_columns(cube, agg_dict)].reset_index(drop=True)
 
 
-def plot_perc_of_medals_to_participant(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                                       start_year: int, end_year: int, flag: str):
+@instrumentation.instrumented
+def modify_data_for_countries(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, countries: list,
+                              start_year: int, end_year: int, agg_dict: dict, cube: pd.DataFrame = None) -> list:
     """
-    This function plots the % of medals won by total participant in each country by each year.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of % of medals won by total participant for the two countries in the list.
-
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010, 'GDP')
-    =================================================================================================
-    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    =================================================================================================
-    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    =================================================================================================
-
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    """
-    if type(country) == str:
-        country = [country]
-    label = constants.PERCENTAGE_LABEL
-    agg_dict1 = {"Medal_Bronze": 'sum', "Medal_Silver": 'sum', "Medal_Gold": 'sum', "Name": 'sum', 'polity2': np.mean,
-                 'value': np.mean}
-    input_list1 = [["Bronze", "Year", "Bronze_perc"], ["Silver", "Year", "Silver_perc"],
-                   ["Gold", "Year", "Gold_perc"]]
-    details1 = ["Medals Won as a % of Total Participants vs "+flag.upper(), "Year", "Medals Won"]
-    normalization_list = [["Bronze_perc", "Medal_Bronze", "Name"], ["Silver_perc", "Medal_Silver", "Name"],
-                          ["Gold_perc", "Medal_Gold", "Name"]]
-    configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict1, flag,
-                           input_list1, details1, label, normalization_list)
-    print("=================================================================================================")
-
-
-def plot_country_medal_to_participants_ratio(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                                             start_year: int, end_year: int, flag: str):
-    """
-    This function plots the medals won to the participant ratio of the given country for each year,
-    between the given year range. This plot is overlapped with the political score of the given country for each year,
-    between the given year range for easier analysis.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of medals won to participant ratio for the two countries in the list.
-
+    This function prepares the model to be plotted for several countries at once. The rows of all the countries are
+    selected from the country year cube in a single lookup and then split by country, hence the cost depends only on
+    the number of rows returned.
     :param olympic_df: Olympics dataset
     :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
+    :param countries: List of countries for which the results to be plotted
     :param start_year: The start year for the plot
     :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_country_medal_to_participants_ratio(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010,\
-    'POLITY SCORE')
-    =================================================================================================
-    """
-    if type(country) == str:
-        country = [country]
-    label = constants.NUMBER_LABEL
-    agg_dict = {"TotalMedals": 'sum', "Name": 'sum', 'polity2': np.mean, 'value': np.mean}
-    temp_df = olympic_df.copy(deep=True)
-    temp_df['TotalMedals'] = olympic_df.Medal_Bronze + olympic_df.Medal_Silver + olympic_df.Medal_Gold
-    plot_df1 = modify_data_for_plot(temp_df, polity_df, country[0], start_year, end_year, agg_dict)
-    plot_df1['medalParticipantRatio'] = round((plot_df1.TotalMedals / plot_df1.Name) * 100, 2)
-    input_list = [["Medal to Participants Ratio", "Year", "medalParticipantRatio"]]
-    details = ["Medal to Participants Ratio", "Year", "Medal to Participants Ratio"]
-    if len(country) == 2:
-        plot_df2 = modify_data_for_plot(temp_df, polity_df, country[1], start_year, end_year, agg_dict)
-        plot_df2['medalParticipantRatio'] = round((plot_df2.TotalMedals / plot_df2.Name) * 100, 2)
-        if flag.upper() == constants.GDP:
-            plot_gdp_subplot(input_list, plot_df1, plot_df2, details, country, label)
-        elif flag.upper() == constants.POLITY_SCORE:
-            plot_subplot(input_list, plot_df1, plot_df2, details, country, label)
-        else:
-            print(constants.CORRECT_METRIC_ERROR)
-    else:
-        plot_figure(input_list, plot_df1, details, label, flag)
-    print("=================================================================================================")
-
-
-def plot_country_age_polity(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                            start_year: int, end_year: int, flag: str):
+    :param agg_dict: The values to aggregate the dataset on
+    :param cube: Country year cube built with build_country_year_cube
+    :return: List of datasets with values to be plotted, one for each country
     """
-    This function plots the average age of the participants in olympic from the given country for each year,
-    between the given year range. This plot is overlapped with the political score of the given country for each year,
-    between the given year range for easier analysis.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of country age for the two countries in the list.
-
-
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_country_age_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'GDP')
-    =================================================================================================
-    """
-    if type(country) == str:
-        country = [country]
-    label = constants.NUMBER_LABEL
-    agg_dict = {"Age": 'mean', 'polity2': np.mean, 'value': np.mean}
-    input_list = [["Average Age", "Year", "Age"]]
-    details = ["Average Age vs "+flag.upper(), "Year", "Average Age"]
-    configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
-                           details, label, None)
-    print("=================================================================================================")
-
-
-def plot_country_season_wise_participants(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                                          start_year: int, end_year: int, flag: str):
-    """
-    This function plots the season wise participants in olympic from the given country for each year,
-    between the given year range. This plot is overlapped with the political score of the given country for each year,
-    between the given year range for easier analysis.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of season wise for the two countries in the list.
-
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_country_season_wise_participants(olympic_df_test, polity_df_test, ['UK','FRANCE'], 1929, 2010, 'dummy')
-    ENTER THE CORRECT METRIC !
-    =================================================================================================
-    """
-    if type(country) == str:
-        country = [country]
-    label = constants.NUMBER_LABEL
-    agg_dict = {"Name": 'sum', 'polity2': np.mean,
-                'Season_Summer': 'sum', 'Season_Winter': 'sum', 'value': np.mean}
-    input_list = [["Summer Season", "Year", "Season_Summer"], ["Winter Season", "Year", "Season_Winter"]]
-    details = ["Number of Participants vs "+flag.upper(), "Year", "Number of Participants"]
-    configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
-                           details, label, None)
-    print("=================================================================================================")
-
-
-def country_male_female_ratio(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
-                              start_year: int, end_year: int, flag: str):
-    """
-    This function plots the male to female ratio of the participants in olympic from the given country for each year,
-    between the given year range. This plot is overlapped with the political score of the given country for each year,
-    between the given year range for easier analysis.
-    The flag varaible controls if it's GDP plot along with polity plot.
-    The plot can be for a single country or two countries can be compared together. If the country variable is a list,
-    it plots subplot of male to female ratio for the two countries in the list.
+    if cube is None:
+        cube = build_country_year_cube(olympic_df, polity_df)
+    if any(country not in cube.index for country in countries):
+        print("The given string country does not exist in the list")
+        raise ValueError
+    rows = cube.loc[list(dict.fromkeys(countries))]
+    rows = rows.loc[(rows.Year >= start_year) & (rows.Year <= end_year), plot_columns(cube, agg_dict)]
+    groups = dict(tuple(rows.groupby(level=0, sort=False, observed=True)))
+    return [groups.get(country, rows.iloc[0:0]).reset_index(drop=True) for country in countries]
 
 
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> country_male_female_ratio(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    =================================================================================================
+def plot_columns(cube: pd.DataFrame, agg_dict: dict) -> list:
     """
-    if type(country) == str:
-        country = [country]
-    label = constants.PERCENTAGE_LABEL
-    agg_dict = {"Sex_M": 'sum', 'Sex_F': 'sum', "Name": 'sum', 'polity2': np.mean, 'value': np.mean}
-    normalization_dict = [["normalize_female", "Sex_F", "Name"], ["normalize_male", "Sex_M", "Name"]]
-    input_list = [["Female Participants", "Year", "normalize_female"], ["Male Participants", "Year", "normalize_male"]]
-    details = ["Participating Gender vs "+flag.upper(), "Year", "Gender of participation"]
-    configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag,
-                           input_list, details, label, normalization_dict)
-    print("=================================================================================================")
+    Returns the columns of the country year cube to be plotted for the given aggregations. The WEO series, such as the
+    GDP column, are not in a cube built without GDP data, which is enough for polity score plots, hence they are left
+    out when they are missing.
 
+    :param cube: Country year cube built with build_country_year_cube
+    :param agg_dict: The values to aggregate the dataset on
+    :return: List of the Year column and the columns of the aggregations
 
-def configure_correct_plot(olympic_df, polity_df, countries, start_year, end_year, agg_dict, flag,
-                           input_list, details, label, normalized_list):
+    >>> cube_test = pd.DataFrame({"Year": [1948], "Medal_Gold": [1], "polity2": [10]})
+    >>> plot_columns(cube_test, {"Medal_Gold": "sum", "polity2": "mean", "value": "mean"})
+    ['Year', 'Medal_Gold', 'polity2']
+    >>> plot_columns(cube_test, {"Medal_Gold": "sum", "Medals": "sum"})
+    Traceback (most recent call last):
+    ...
+    ValueError: The columns ['Medals'] are not in the country year cube
     """
-    Based on the requirements decides if plot should be GDP or Polity and for multiple countries or single country
-
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param countries: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param agg_dict: The values to aggregate the dataset on
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :param input_list: List of values that need to be added as a trace in the graph
-    :param details: List of plot details like title and so on.
-    :param label: variable that indicates if y axis is percentage or number
-    :param normalized_list : Contains the list of column values to be normalized to plot
-    :return:
-    """
-    plot_df1 = modify_data_for_plot(olympic_df, polity_df, countries[0], start_year, end_year, agg_dict)
-    if normalized_list is not None:
-        plot_df1 = create_normalized_columns(plot_df1, normalized_list)
-    if len(countries) > 2:
-        print("YOU CAN GIVE ONLY TWO COUNTRIES AT A TIME")
-        raise
-    if len(countries) == 2:
-        plot_df2 = modify_data_for_plot(olympic_df, polity_df, countries[1], start_year, end_year, agg_dict)
-        if normalized_list is not None:
-            plot_df2 = create_normalized_columns(plot_df2, normalized_list)
-        if flag.upper() == constants.GDP:
-            plot_gdp_subplot(input_list, plot_df1, plot_df2, details, countries, label)
-        elif flag.upper() == constants.POLITY_SCORE:
-            plot_subplot(input_list, plot_df1, plot_df2, details, countries, label)
-        else:
-            print(constants.CORRECT_METRIC_ERROR)
-    else:
-        plot_figure(input_list, plot_df1, details, label, flag)
+    missing = [column for column in agg_dict if column not in cube.columns and column not in constants.WEO_SERIES]
+    if missing:
+        raise ValueError("The columns {} are not in the country year cube".format(missing))
+    return ['Year'] + [column for column in agg_dict if column in cube.columns]
 
 
 def create_normalized_columns(plot_df: pd.DataFrame, normalized_list: list) -> pd.DataFrame:
@@ -584,278 +742,120 @@ def create_normalized_columns(plot_df: pd.DataFrame, normalized_list: list) -> p
     return plot_df
 
 
-def plot_figure(input_list: list, plot_df: pd.DataFrame, details: list, axis: str, flag: str):
-    """
-    This function plots the figure using plotly library. For the given values in input list,
-    it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details list.
-    :param input_list: List of values that need to be added as a trace in the graph
-    :param plot_df: The dataframe containing values to be plotted
-    :param details: List of plot details like title and so on.
-    :param axis: Variable to indicate if y axis is a count or a percentage
-    :param flag: Variable to indicate if it's polity score plot or GDP plot
-    :return:
-    >>> input_list_test = [["Female Participants", "Year", "Sex_F"], ["Male Participants", "Year", "Sex_M"]]
-    >>> details_test = ["Participating gender vs Polity Score", "Year", "Gender of participation"]
-    >>> plot_df_test = pd.read_csv("noc_regions.csv")
-    >>> plot_figure(input_list_test, plot_df_test, details_test, 'percentage', 'GDP')
-    There was an error in plotting graph 'Year'
-    """
-    if flag == constants.GDP:
-        fig = make_subplots(rows=1, cols=2, specs=[[{"secondary_y": True}, {"secondary_y": True}]])
+# This function was inspired from:
+# https://stackoverflow.com/questions/18864859/python-executing-multiple-functions-simultaneously
+def perform_parallel(*functions, executor: str = "thread", max_workers: int = None) -> list:
+    """
+    This functions parallel processes the functions passed to it. The functions are passed without being called,
+    for example with functools.partial, and are run on a pool of threads or processes. The result, the error and the
+    time taken by each function are returned in the order in which the functions were passed.
+
+    :param functions: List of functions to be executed in parallel
+    :param executor: "thread" to run the functions on a thread pool or "process" to run them on a process pool
+    :param max_workers: Maximum number of threads or processes, by default one for each function
+    :return: List of dictionaries with the name, result, error and seconds taken by each function
+
+    >>> tasks = perform_parallel(partial(sum, [1, 2]), partial(max, [4, 3]), partial(int, "x"))
+    >>> [(task["name"], task["result"]) for task in tasks]
+    [('sum', 3), ('max', 4), ('int', None)]
+    >>> tasks[2]["error"]
+    ValueError("invalid literal for int() with base 10: 'x'")
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError("executor should be one of {}".format(["thread", "process"]))
+    if executor == "thread":
+        pool_class = ThreadPoolExecutor
     else:
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        # Imported here as it imports multiprocessing, which only process pools need
+        from concurrent.futures import ProcessPoolExecutor
+        pool_class = ProcessPoolExecutor
+    with pool_class(max_workers=max_workers or max(len(functions), 1)) as pool:
+        # Threads start with an empty context, hence the context is copied so that the instrumentation spans of the
+        # functions are nested under the span of the caller
+        futures = [pool.submit(contextvars.copy_context().run, _timed_call, func) if executor == "thread"
+                   else pool.submit(_timed_call, func) for func in functions]
+        return [future.result() for future in futures]
 
-    color_list = ['#ffa500', '#3cb371', '#4169e1', '#abe5f0']
-    try:
-        for index, value in enumerate(input_list):
-            fig.add_trace(
-                go.Bar(name=value[0],
-                       x=plot_df[value[1]],
-                       y=plot_df[value[2]], marker_color=color_list[index]), row=1, col=1,
-                secondary_y=False
-            )
-            if flag == constants.GDP:
-                fig.add_trace(
-                    go.Bar(name=value[0],
-                           x=plot_df[value[1]],
-                           y=plot_df[value[2]], marker_color=color_list[index], showlegend=False), row=1, col=2,
-                    secondary_y=False
-                )
-        fig.add_trace(
-            go.Line(x=plot_df["Year"], y=plot_df["polity2"], name="Polity (-10 to +10)", marker_color='#051c2c'),
-            row=1, col=1, secondary_y=True
-        )
-        if flag == constants.GDP:
-            fig.add_trace(
-                go.Line(x=plot_df["Year"], y=plot_df["value"], name="GDP x 10^9 USD", marker_color='#051c2c'),
-                row=1, col=2, secondary_y=True
-            )
-        # Add figure title
-        fig.update_layout(
-            title_text=details[0])
-
-        # Set x-axis title
-        fig.update_xaxes(title_text=details[1])
-        if axis == constants.PERCENTAGE_LABEL:
-            if flag == constants.GDP:
-                fig['layout']['yaxis3']['tickformat'] = ',.0%'
-            fig['layout']['yaxis1']['tickformat'] = ',.0%'
-        else:
-            pass
-        # Set y-axes titles
-        fig.update_yaxes(title_text="<b>"+details[2]+"</b>", secondary_y=False)
-        fig['layout']['yaxis2']['title'] = '<b>Polity</b>'
-        if flag == constants.GDP:
-            fig['layout']['yaxis4']['title'] = '<b>GDP measure</b>'
-        fig.show()
-    except Exception as e:
-        print("There was an error in plotting graph {}".format(e))
-
-
-def plot_subplot(input_list: list, plot_df: pd.DataFrame, plot_df2: pd.DataFrame, details: list,
-                 name_of_countries: list, axis: str):
-    """
-    This function plots the two figure side by side for each country using plotly library. For the given values in input
-    list, it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details
-    list.
-    :param input_list: List of values that need to be added as a trace in the graph
-    :param plot_df: The dataframe containing values to be plotted
-    :param plot_df2: The dataframe for another country, containing values to be plotted
-    :param details: List of plot details like title and so on.
-    :param name_of_countries: List of countries to be plot side by side for better comparison
-    :param axis: Variable to indicate if y axis is a count or a percentage
-    :return:
-    """
-    fig = make_subplots(rows=1, cols=2, subplot_titles=(name_of_countries[0], name_of_countries[1]),
-                        specs=[[{"secondary_y": True}, {"secondary_y": True}]])
-    color_list = ['#8b4513', '#808080', '#ffd700', '#abe5f0']
+
+def _timed_call(func) -> dict:
+    """
+    Calls the function and records its result or error along with the time taken
+
+    :param func: Function to be called without arguments
+    :return: Dictionary with the name, result, error and seconds taken by the function
+    """
+    name = func.func.__name__ if isinstance(func, partial) else getattr(func, "__name__", repr(func))
+    start = time.perf_counter()
+    result, error = None, None
     try:
-        for index, value in enumerate(input_list):
-            fig.add_trace(
-                go.Bar(name=value[0],
-                       x=plot_df[value[1]],
-                       y=plot_df[value[2]], marker_color=color_list[index]), row=1, col=1,
-
-                secondary_y=False
-            )
-            fig.add_trace(
-                go.Bar(name=value[0],
-                       x=plot_df2[value[1]],
-                       y=plot_df2[value[2]], marker_color=color_list[index], showlegend=False), row=1, col=2,
-
-                secondary_y=False
-            )
-        fig.add_trace(
-            go.Line(x=plot_df["Year"], y=plot_df["polity2"], name="Polity", marker_color='#051c2c'),
-            row=1, col=1,
-            secondary_y=True
-        )
-        fig.add_trace(
-            go.Line(x=plot_df2["Year"], y=plot_df2["polity2"], name="Polity", marker_color='#051c2c', showlegend=False),
-            row=1, col=2,
-            secondary_y=True
-        )
-
-        # Add figure title
-        fig.update_layout(
-            title_text=details[0], width=1050, height=400
-        )
-
-        # Set x-axis title
-        fig.update_xaxes(title_text=details[1])
-        if axis == constants.PERCENTAGE_LABEL:
-            fig['layout']['yaxis1']['tickformat'] = ',.0%'
-            fig['layout']['yaxis3']['tickformat'] = ',.0%'
-        else:
-            pass
-
-        # Set y-axes titles
-        fig.update_yaxes(title_text="<b>" + details[2] + "</b>", secondary_y=False)
-        fig.update_yaxes(title_text="<b>Polity Score</b>", secondary_y=True)
-        fig.show()
+        result = func()
     except Exception as e:
-        print("There was an error in plotting graph {}".format(e))
+        error = e
+    return {"name": name, "result": result, "error": error, "seconds": time.perf_counter() - start}
 
 
-def plot_graphs_for_country(olympic_df, polity_df, country, start_year, end_year, flag):
+@instrumentation.instrumented
+def map_polity_gdp(polity_df: pd.DataFrame, mapper: str, gdp_string: str, series: list = None) -> pd.DataFrame:
     """
-    This function plots details regarding olympics, politics and GDP for different metrics like Medals, Geneder ratio,
-    Number of participants etc., It employs parallel processing to make the plots perform better.
-    >>> olympic_df_test, noc_df = prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
-    >>> polity_df_test = prepare_polity_dataset("p5v2018.xls", noc_df)
-    >>> polity_df_test = map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
-    >>> plot_graphs_for_country(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
-    ... # doctest: +ELLIPSIS
-    =================================================================================================
-    ...
-    =================================================================================================
+    Prepares the dataset to include GDP data. GDP data is combined with politics data based on country column.
 
-    :param olympic_df: Olympics dataset
-    :param polity_df: Political dataset
-    :param country: Country for which the results to be plotted
-    :param start_year: The start year for the plot
-    :param end_year: The end year for the plot
-    :param flag: variable to indicate if it's polity score plot or GDP plot
-    :return:
-    """
-    perform_parallel(plot_country_medal_polity(olympic_df, polity_df, country, start_year, end_year, flag),
-                     plot_perc_of_medals_to_participant(olympic_df, polity_df, country, start_year, end_year, flag),
-                     plot_country_medal_to_participants_ratio(olympic_df, polity_df, country, start_year, end_year,
-                                                              flag),
-                     plot_country_age_polity(olympic_df, polity_df, country, start_year, end_year, flag),
-                     country_male_female_ratio(olympic_df, polity_df, country, start_year, end_year, flag),
-                     plot_country_season_wise_participants(olympic_df, polity_df, country, start_year, end_year, flag))
-
-
-def plot_gdp_subplot(input_list: list, plot_df: pd.DataFrame, plot_df2: pd.DataFrame, details: list,
-                     name_of_countries: list, axis: str):
-    """
-    This function plots the two figure side by side for each country using plotly library. For the given values in input
-    list, it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details
-     list.
-    :param input_list: List of values that need to be added as a trace in the graph
-    :param plot_df: The dataframe containing values to be plotted
-    :param plot_df2: The dataframe for second country
-    :param details: List of plot details like title and so on.
-    :param name_of_countries: List of countries to plot side by side
-    :param axis: Variable to indicate if y axis is a count or a percentage
-    :return:
-    """
-    fig = make_subplots(rows=1, cols=2, subplot_titles=(name_of_countries[0], name_of_countries[1]),
-                        specs=[[{"secondary_y": True}, {"secondary_y": True}]])
-    color_list = ['#8b4513', '#808080', '#ffd700', '#abe5f0']
-    try:
-        for index, value in enumerate(input_list):
-            fig.add_trace(
-                go.Bar(name=value[0],
-                       x=plot_df[value[1]],
-                       y=plot_df[value[2]], marker_color=color_list[index]), row=1, col=1,
-
-                secondary_y=False
-            )
-            fig.add_trace(
-                go.Bar(name=value[0],
-                       x=plot_df2[value[1]],
-                       y=plot_df2[value[2]], marker_color=color_list[index], showlegend=False), row=1, col=2,
-
-                secondary_y=False
-            )
-        fig.add_trace(
-            go.Line(x=plot_df["Year"], y=plot_df["value"], name="GDP x 10^9 USD", marker_color='#051c2c'),
-            row=1, col=1, secondary_y=True
-        )
-        fig.add_trace(
-            go.Line(x=plot_df2["Year"], y=plot_df2["value"], name="GDP x 10^9 USD", marker_color='#051c2c',
-                    showlegend=False),
-            row=1, col=2, secondary_y=True
-        )
-
-        # Add figure title
-        fig.update_layout(
-            title_text=details[0], width=1050, height=400
-        )
-
-        # Set x-axis title
-        fig.update_xaxes(title_text=details[1])
-        if axis == constants.PERCENTAGE_LABEL:
-            fig['layout']['yaxis1']['tickformat'] = ',.0%'
-            fig['layout']['yaxis3']['tickformat'] = ',.0%'
-        else:
-            pass
-
-        # Set y-axes titles
-        fig.update_yaxes(title_text="<b>" + details[2] + "</b>", secondary_y=False)
-        fig.update_yaxes(title_text="<b>GDP Measure</b>", secondary_y=True)
-        fig.show()
-    except Exception as e:
-        print("There was an error in plotting graph {}".format(e))
+    :param polity_df: Politics Dataframe
+    :param mapper: name of the mapper dataset file
+    :param gdp_string: name of the GDP dataset file
+    :param series: Names of the WEO series to add, keys of constants.WEO_SERIES, by default the GDP in the value column
+    :return: Final dataset with GDP column added.
+    """
+    return merge_polity_gdp(polity_df, read_gdp_file(gdp_string, series), pd.read_excel(mapper), series)
 
 
-# This function was inspired from:
-# https://stackoverflow.com/questions/18864859/python-executing-multiple-functions-simultaneously
-def perform_parallel(*functions):
+def read_gdp_file(gdp_string: str, series: list = None) -> pd.DataFrame:
     """
-    This functions parallel processes the functions passed to it.
+    Reads the rows of the given series and the yearly columns of the WEO dataset
 
-    :param functions: List of functions to be executed in parallel
-    :return:
+    :param gdp_string: name of the GDP dataset file
+    :param series: Names of the WEO series, keys of constants.WEO_SERIES, by default constants.GDP_SERIES
+    :return: Rows of the series of the WEO dataset
     """
-    process_list = []
-    for func in functions:
-        process = Process(target=func)
-        process.start()
-        process_list.append(process)
-    for process in process_list:
-        process.join()
+    subject_codes = {constants.WEO_SERIES[name][0] for name in series or constants.GDP_SERIES}
+    # Importing GDP Data keeping only the rows of the series and the yearly columns while reading
+    return excel_reader.read_excel_filtered(gdp_string, lambda column: column in ('ISO', 'Country', 'WEO Subject Code',
+                                                                                  'Scale') or isinstance(column, int),
+                                            {"WEO Subject Code": subject_codes})
 
 
-def map_polity_gdp(polity_df: pd.DataFrame, mapper: str, gdp_string: str) -> pd.DataFrame:
+def merge_polity_gdp(polity_df: pd.DataFrame, gdp_df: pd.DataFrame, mapp: pd.DataFrame,
+                     series: list = None) -> pd.DataFrame:
     """
-    Prepares the dataset to include GDP data. GDP data is combined with politics data based on country column.
+    Combines the WEO rows already read from the WEO and mapper files with the politics data, see map_polity_gdp. The
+    values are gathered from the country by year array of every series instead of merging with the melted WEO rows.
 
     :param polity_df: Politics Dataframe
-    :param mapper: name of the mapper dataset file
-    :param gdp_string: name of the GDP dataset file
+    :param gdp_df: Rows of the WEO dataset, as returned by read_gdp_file
+    :param mapp: Rows of the mapper file
+    :param series: Names of the WEO series to add, keys of constants.WEO_SERIES, by default the GDP in the value column
     :return: Final dataset with GDP column added.
-    """
-    # Importing GDP Data and doing preprocessing
-    gdp = pd.read_excel(gdp_string)
-    df1 = gdp[(gdp.Scale == "Billions") & (gdp["WEO Subject Code"] == "NGDPD")]
-    df1 = df1.drop(
-        columns={'WEO Country Code', 'WEO Subject Code', 'Subject Descriptor', 'Subject Notes', 'Scale', 'Units',
-                 'Country/Series-specific Notes', 'Estimates Start After'})
-    df2 = df1.melt(id_vars=['ISO', 'Country'])
-    df2['Country'] = df2['Country'].str.upper()
+
+    >>> polity_df_test = pd.DataFrame({"scode": ["USA", "USA", "UKG"], "country": ["United States", "United States",
+    ...                                "United Kingdom"], "year": [2015, 2030, 2015], "polity2": [10, 10, 10]})
+    >>> mapp_test = pd.DataFrame({"scode": ["USA", "UKG"], "country": ["UNITED STATES", "UNITED KINGDOM"],
+    ...                           "Map": ["United States", "United Kingdom"]})
+    >>> gdp_df_test = pd.DataFrame({"ISO": ["USA", "USA"], "Country": ["United States"] * 2,
+    ...                             "WEO Subject Code": ["NGDPD", "LP"], "Scale": ["Billions", "Millions"],
+    ...                             2015: [18238.3, 320.7]})
+    >>> merge_polity_gdp(polity_df_test.assign(country=polity_df_test.country.str.upper()), gdp_df_test, mapp_test,
+    ...                  ["value", "population"])[["country", "year", "ISO", "value", "population"]]
+              country  year  ISO    value  population
+    0   UNITED STATES  2015  USA  18.2383       320.7
+    1   UNITED STATES  2030  NaN      NaN         NaN
+    2  UNITED KINGDOM  2015  NaN      NaN         NaN
+    """
+    matrix = gdp_matrix.build_gdp_matrix(gdp_df, series)
 
     # Importing Mapping File
-    mapp = pd.read_excel(mapper)
+    mapp = mapp.copy()
     mapp['country'] = mapp['country'].str.strip().str.upper()
     mapp['Map'] = mapp['Map'].str.strip().str.upper()
 
     # Final polity with GDP data
     polity_map = polity_df.merge(mapp, left_on=['country'], right_on=['country'], how='left')
-    gdp_with_polity = polity_map.merge(df2, left_on=['Map', 'year'], right_on=['Country', 'variable'], how="left")
-    gdp_with_polity['value'] = gdp_with_polity['value'].astype(float)
-    gdp_with_polity['value'] = gdp_with_polity['value'] / 1000
-
-    return gdp_with_polity
+    return matrix.join(polity_map, 'Map', 'year')
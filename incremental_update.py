@@ -0,0 +1,96 @@
+"""
+Incremental update is a module that adds new olympic games or new years of political data to the prepared datasets.
+Only the new rows go through the cleaning and correction steps, and the result is merged into the existing datasets
+along with the (region, Year) pairs that changed, so that the country year cube is recomputed only for those pairs.
+"""
+import pandas as pd
+import helper_function
+
+
+def append_olympic_rows(olympic_df: pd.DataFrame, new_athletes: pd.DataFrame, noc_df: pd.DataFrame,
+                        countries: dict, sport_dict: dict) -> tuple:
+    """
+    Adds the rows of new games to the prepared olympic dataset. The new athlete rows are aggregated, corrected for
+    countries that split up and for team games, and then merged into the dataset. The new rows must not belong to a
+    'region', 'Year', 'NOC', 'City', 'Sport', 'Event' group that is already in the dataset, since the groups of the
+    dataset cannot be split back into athlete rows.
+
+    :param olympic_df: Prepared olympic dataset
+    :param new_athletes: New rows in the format of the athlete events file
+    :param noc_df: Country code dataset returned by the preparation of the olympic dataset
+    :param countries: Dictionary of countries that have split up with key as the country code and value as the
+    country name
+    :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
+    :return: Updated olympic dataset and the index of the (region, Year) pairs that changed
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK"], "Year": [1948], "NOC": ["GBR"], "City": ["London"],
+    ...                                 "Sport": ["Rowing"], "Event": ["Rowing Men's Eights"], "Age": [25.0],
+    ...                                 "Name": [9], "Sex_F": [0], "Sex_M": [9], "Medal_Bronze": [0],
+    ...                                 "Medal_Silver": [0], "Medal_Gold": [1], "Season_Summer": [9],
+    ...                                 "Season_Winter": [0], "TeamGame": [True]})
+    >>> new_test = pd.DataFrame({"Name": ["A", "B"], "Sex": ["M", "M"], "Age": [20.0, 30.0], "NOC": ["GBR"] * 2,
+    ...                          "Year": [1952] * 2, "Season": ["Summer"] * 2, "City": ["Helsinki"] * 2,
+    ...                          "Sport": ["Rowing"] * 2, "Event": ["Rowing Men's Coxless Pairs"] * 2,
+    ...                          "Medal": ["Gold", "Gold"]})
+    >>> noc_test = pd.DataFrame({"NOC": ["GBR"], "region": ["UK"]})
+    >>> updated, affected = append_olympic_rows(olympic_df_test, new_test, noc_test, {}, {"Rowing": True})
+    >>> updated[["region", "Year", "Name", "Medal_Gold"]]
+      region  Year  Name  Medal_Gold
+    0     UK  1948     9           1
+    1     UK  1952     2           1
+    >>> affected.tolist()
+    [('UK', 1952)]
+    """
+    delta = helper_function.aggregate_olympic_chunks([new_athletes], noc_df)
+    delta = helper_function.handle_countries_that_split(countries, delta, noc_df.copy())
+    delta = helper_function.correct_team_medals_won(delta, sport_dict)
+    keys = helper_function.OLYMPIC_GROUP_KEYS
+    existing = pd.MultiIndex.from_frame(olympic_df[keys])
+    if pd.MultiIndex.from_frame(delta[keys]).isin(existing).any():
+        raise ValueError("The new rows belong to groups already present in the olympic dataset")
+    olympic_df = pd.concat([olympic_df, delta], ignore_index=True)
+    olympic_df = olympic_df.sort_values(keys, kind='stable', ignore_index=True)
+    affected = pd.MultiIndex.from_frame(delta[['region', 'Year']]).unique()
+    return olympic_df, affected
+
+
+def append_polity_rows(polity_df: pd.DataFrame, new_polity: pd.DataFrame, noc_df: pd.DataFrame,
+                       country_dict: dict, gdp_df: pd.DataFrame, mapp: pd.DataFrame, gdp_series: list = None) -> tuple:
+    """
+    Adds new years of political data, or a revision of existing years, to the prepared political dataset. The new
+    rows are cleaned, mapped to the olympic regions and joined with the GDP data, and then replace the rows of the
+    same country and year in the dataset. The WEO and mapper files are read once by the caller, with read_gdp_file and
+    pd.read_excel, and reused for every update.
+
+    :param polity_df: Prepared political dataset with the GDP column
+    :param new_polity: New rows with the scode, country, year, polity, polity2 and durable columns of the polity dataset
+    :param noc_df: Country code dataset returned by the preparation of the olympic dataset
+    :param country_dict: Dictionary of country name in polity dataset and country code of olympic dataset
+    :param gdp_df: Rows of the WEO dataset, as returned by helper_function.read_gdp_file
+    :param mapp: Rows of the mapper file
+    :param gdp_series: Names of the WEO series of the political dataset, by default the GDP in the value column
+    :return: Updated political dataset and the index of the (region, Year) pairs that changed
+
+    >>> noc_test = pd.DataFrame({"NOC": ["GBR"], "region": ["UK"]})
+    >>> mapp_test = pd.DataFrame({"scode": ["UKG"], "country": ["UK"], "Map": ["United Kingdom"]})
+    >>> gdp_df_test = pd.DataFrame({"ISO": ["GBR"], "Country": ["United Kingdom"], "WEO Subject Code": ["NGDPD"],
+    ...                             "Scale": ["Billions"], 2015: [2934.9], 2016: [2699.7]})
+    >>> new_test = pd.DataFrame({"scode": ["UKG"], "country": ["UK"], "year": [2016], "polity": [10], "polity2": [10],
+    ...                          "durable": [100]})
+    >>> updated, affected = append_polity_rows(new_test.iloc[:0], new_test, noc_test, {}, gdp_df_test, mapp_test)
+    >>> updated[["country", "year", "polity2", "value"]]
+      country  year  polity2   value
+    0      UK  2016       10  2.6997
+    >>> affected.tolist()
+    [('UK', 2016)]
+    """
+    delta = helper_function.clean_polity_dataset(new_polity, noc_df)
+    delta = helper_function.map_polity_region_dataset(country_dict, delta, dict(zip(noc_df.NOC, noc_df.region)))
+    delta = helper_function.merge_polity_gdp(delta, gdp_df, mapp, gdp_series)
+    replaced = pd.MultiIndex.from_arrays([delta['country'], delta['year'].astype(int)])
+    existing = pd.MultiIndex.from_arrays([polity_df['country'], polity_df['year'].astype(int)])
+    affected_rows = pd.concat([polity_df[existing.isin(replaced)], delta])
+    polity_df = pd.concat([polity_df[~existing.isin(replaced)], delta], ignore_index=True)
+    affected = pd.MultiIndex.from_arrays([affected_rows['alternate_region'],
+                                          affected_rows['year'].astype(int)]).dropna().unique()
+    return polity_df, affected
@@ -0,0 +1,230 @@
+"""
+Instrumentation is a module that records the wall time, CPU time, peak memory and number of rows of the pipeline stages
+as nested spans, for example an export run, the countries exported in it, the metrics plotted for each country and the
+aggregation and rendering steps of each metric. It is disabled by default, and until enable() is called an
+instrumented function costs a single check per call.
+
+Spans of functions run on a thread pool are nested under the span that started the pool. Functions run on a process
+pool are not recorded, since the spans stay in the worker process.
+"""
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import sys
+import threading
+import time
+import pandas as pd
+try:
+    import resource
+except ImportError:
+    # The resource module is not available on windows, the peak memory is then not recorded
+    resource = None
+
+_enabled = False
+_verbose = False
+_origin = time.perf_counter()
+_spans = []
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def enable(verbose: bool = False):
+    """
+    Starts recording the spans of the instrumented functions. The spans recorded before are discarded.
+
+    :param verbose: Variable to indicate if every span should be printed when it ends
+    :return:
+    """
+    global _enabled, _verbose
+    reset()
+    _enabled, _verbose = True, verbose
+
+
+def disable():
+    """
+    Stops recording the spans. The spans recorded so far are kept until the next call to enable or reset.
+
+    :return:
+    """
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """
+    Discards the recorded spans
+
+    :return:
+    """
+    global _origin
+    with _lock:
+        _spans.clear()
+    _origin = time.perf_counter()
+
+
+def _peak_rss_mb():
+    """
+    Returns the peak resident memory of the process in MB, or None when it cannot be read
+
+    :return: Peak resident memory in MB
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The peak is reported in bytes on macOS and in kilobytes on linux
+    return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10, 2)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """
+    Records the block of code as a span nested under the current span. Errors raised in the block are recorded in the
+    span and raised again.
+
+    :param name: Name of the span
+    :param attributes: Values stored along with the span, for example the country
+    :return: Dictionary of the span, or None if the instrumentation is disabled
+
+    >>> enable()
+    >>> with span("export", country="UK"):
+    ...     with span("render") as record:
+    ...         set_rows(3)
+    >>> [(record["name"], record["parent"] is not None, record["rows"]) for record in trace()]
+    [('render', True, 3), ('export', False, None)]
+    >>> disable()
+    """
+    if not _enabled:
+        yield None
+        return
+    parent = _current.get()
+    record = {"id": next(_ids), "parent": parent and parent["id"], "depth": parent["depth"] + 1 if parent else 0,
+              "name": name, "thread": threading.get_ident(),
+              "start": time.perf_counter() - _origin, "wall": None, "cpu": None, "peak_rss_mb": None,
+              "rss_growth_mb": None, "rows": None, "error": None, "attributes": attributes}
+    token = _current.set(record)
+    rss_before = _peak_rss_mb()
+    cpu_before = time.thread_time()
+    try:
+        yield record
+    except Exception as e:
+        record["error"] = repr(e)
+        raise
+    finally:
+        record["cpu"] = time.thread_time() - cpu_before
+        record["wall"] = time.perf_counter() - _origin - record["start"]
+        record["peak_rss_mb"] = _peak_rss_mb()
+        if rss_before is not None:
+            record["rss_growth_mb"] = round(record["peak_rss_mb"] - rss_before, 2)
+        _current.reset(token)
+        with _lock:
+            _spans.append(record)
+        if _verbose:
+            # The line is printed in a single write so that the lines of spans ending on other threads do not mix
+            print("{}{} {:.3f}s\n".format("  " * record["depth"], name, record["wall"]), end="")
+
+
+def set_rows(rows: int):
+    """
+    Stores the number of rows processed in the current span
+
+    :param rows: Number of rows
+    :return:
+    """
+    record = _current.get()
+    if record is not None:
+        record["rows"] = rows
+
+
+def record_error(error: Exception):
+    """
+    Stores an error that was handled inside the current span, so that errors which are printed and not raised still
+    show up in the trace
+
+    :param error: The handled error
+    :return:
+    """
+    record = _current.get()
+    if record is not None:
+        record["error"] = repr(error)
+
+
+def instrumented(func):
+    """
+    Decorator recording every call of the function as a span named after the function. The number of rows of the
+    returned dataframe, of the first dataframe of a returned tuple or of all the dataframes of a returned list is stored
+    in the span.
+
+    :param func: Function to be instrumented
+    :return: The instrumented function
+
+    >>> @instrumented
+    ... def double(frame):
+    ...     return pd.concat([frame, frame])
+    >>> enable()
+    >>> len(double(pd.DataFrame({"a": [1, 2]})))
+    4
+    >>> summary()[["calls", "rows", "errors"]]  # doctest: +NORMALIZE_WHITESPACE
+            calls  rows  errors
+    name
+    double      1     4       0
+    >>> disable()
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        with span(func.__name__):
+            result = func(*args, **kwargs)
+            output = result[0] if isinstance(result, tuple) and result else result
+            if isinstance(output, (pd.DataFrame, pd.Series)):
+                set_rows(len(output))
+            elif isinstance(output, list) and output and all(isinstance(frame, pd.DataFrame) for frame in output):
+                set_rows(sum(len(frame) for frame in output))
+            return result
+    return wrapper
+
+
+def trace() -> list:
+    """
+    Returns the recorded spans in the order in which they ended
+
+    :return: List of dictionaries with the id, parent, depth, name, thread, start, wall, cpu, peak_rss_mb,
+    rss_growth_mb, rows, error and attributes of each span
+    """
+    with _lock:
+        return list(_spans)
+
+
+def summary() -> pd.DataFrame:
+    """
+    Summarises the recorded spans by name, the span with the largest total wall time first
+
+    :return: Dataframe with the number of calls, the total and mean wall time, the total CPU time, the highest peak
+    memory, the total rows and the number of errors of every span name
+    """
+    spans = pd.DataFrame(trace(), columns=["name", "wall", "cpu", "peak_rss_mb", "rows", "error"])
+    table = spans.groupby("name").agg(calls=("wall", "size"), wall_total=("wall", "sum"), wall_mean=("wall", "mean"),
+                                      cpu_total=("cpu", "sum"), peak_rss_mb=("peak_rss_mb", "max"),
+                                      rows=("rows", "sum"), errors=("error", "count"))
+    table["rows"] = table["rows"].astype("int64")
+    return table.sort_values("wall_total", ascending=False)
+
+
+def dump_trace(file_name: str):
+    """
+    Writes the recorded spans as a json file in the trace event format, which can be opened in chrome://tracing or
+    https://ui.perfetto.dev to see the nested spans on a timeline
+
+    :param file_name: Name of the json file
+    :return:
+    """
+    events = [{"name": record["name"], "ph": "X", "pid": 0, "tid": record["thread"],
+               "ts": round(record["start"] * 1e6), "dur": round(record["wall"] * 1e6),
+               "args": {key: record[key] for key in ("id", "parent", "depth", "cpu", "peak_rss_mb", "rss_growth_mb",
+                                                     "rows", "error", "attributes")}}
+              for record in trace()]
+    with open(file_name, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file, default=str)
@@ -0,0 +1,204 @@
+"""
+Interactive plots is a module for driving the metric plots from notebook sliders without rebuilding the figures. Each
+figure is built once over every year of the country year cube and kept as a plotly FigureWidget. A change of the year
+range slices the full range series already computed and updates the traces of the existing figure in one batch update,
+and a change of country replaces the trace data in place. Slider events are debounced, so only the last event of a
+quick succession of events is applied.
+
+ipywidgets and anywidget are needed for the widgets, they are imported only when the widgets are created.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import helper_function
+
+METRIC_FUNCTIONS = [helper_function.plot_country_medal_polity, helper_function.plot_perc_of_medals_to_participant,
+                    helper_function.plot_country_medal_to_participants_ratio, helper_function.plot_country_age_polity,
+                    helper_function.country_male_female_ratio, helper_function.plot_country_season_wise_participants]
+
+
+class InteractivePlot:
+    """
+    Figure of one metric that is updated in place when the year range or the country changes.
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "UK", "USA"], "Year": [1948, 1952, 1948],
+    ...                                 "Age": [25.0, 24.0, 22.0], "Name": [6, 3, 5], "Sex_F": [2, 0, 2],
+    ...                                 "Sex_M": [4, 3, 3], "Medal_Bronze": [1, 0, 0], "Medal_Silver": [1, 0, 0],
+    ...                                 "Medal_Gold": [0, 1, 2], "Season_Summer": [6, 3, 5], "Season_Winter": [0, 0, 0]})
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["UK", "UK", "USA"], "year": [1948, 1952, 1948],
+    ...                                "polity2": [10, 10, 10], "value": [1.5, 1.6, 2.5]})
+    >>> cube_test = helper_function.build_country_year_cube(olympic_df_test, polity_df_test)
+    >>> plot = InteractivePlot(helper_function.plot_country_medal_polity, cube_test, "UK", "GDP", debounce=0,
+    ...                        widget=False)
+    >>> gold = plot.figure.data[4]
+    >>> gold.name, gold.x.tolist(), gold.y.tolist()
+    ('Gold', [1948, 1952], [0, 1])
+    >>> plot.set_year_range(1950, 2016)
+    >>> plot.figure.data[4].x.tolist(), plot.figure.data[4].y.tolist()
+    ([1952], [1])
+    >>> plot.set_year_range(1896, 2016)
+    >>> plot.set_country("USA")
+    >>> plot.figure.data[4].x.tolist(), plot.figure.data[4].y.tolist()
+    ([1948], [2])
+    """
+
+    def __init__(self, metric_function, cube: pd.DataFrame, country, flag: str, start_year: int = 1896,
+                 end_year: int = 2016, debounce: float = 0.15, widget: bool = True):
+        """
+        :param metric_function: Metric plot function of helper_function, like plot_country_medal_polity
+        :param cube: Country year cube built with build_country_year_cube
+        :param country: Country, or list of countries, to be plotted
+        :param flag: variable to indicate if it's polity score plot or GDP plot
+        :param start_year: The start year for the plot
+        :param end_year: The end year for the plot
+        :param debounce: Seconds without a new event after which the last event is applied, 0 to apply every event
+        :param widget: Variable to indicate if the figure should be a FigureWidget, otherwise a plain Figure is used
+        """
+        self.metric_function = metric_function
+        self.cube = cube
+        self.flag = flag
+        self.debounce = debounce
+        self.country = country
+        self.start_year, self.end_year = start_year, end_year
+        self._lock = threading.Lock()
+        self._timer = None
+        self._pending_country = None
+        full_figure = self._full_figure(country)
+        self.figure = go.FigureWidget(full_figure) if widget else go.Figure(full_figure)
+        self._series = self._full_series(full_figure)
+        self._apply_year_range()
+
+    def _full_figure(self, country) -> go.Figure:
+        """
+        Builds the figure of the metric over every year of the cube
+
+        :param country: Country, or list of countries, to be plotted
+        :return: The figure
+        """
+        figure = self.metric_function(None, None, country, self.cube.Year.min(), self.cube.Year.max(), self.flag,
+                                      self.cube, False)
+        if figure is None:
+            raise ValueError("{} could not be plotted for {}".format(self.metric_function.__name__, country))
+        return figure
+
+    @staticmethod
+    def _full_series(figure: go.Figure) -> list:
+        """
+        Returns the years and values of every trace of the figure
+
+        :param figure: Figure built over every year of the cube
+        :return: List of the year array and value array of every trace
+        """
+        return [(np.asarray(trace.x), np.asarray(trace.y)) for trace in figure.data]
+
+    def set_year_range(self, start_year: int, end_year: int):
+        """
+        Shows the given range of years. The traces are sliced from the full range series and updated in place.
+
+        :param start_year: The start year for the plot
+        :param end_year: The end year for the plot
+        :return:
+        """
+        with self._lock:
+            self.start_year, self.end_year = start_year, end_year
+        self._schedule()
+
+    def set_country(self, country):
+        """
+        Shows the given country, or list of countries. The full range series of the country are computed from the cube
+        and replace the trace data of the figure.
+
+        :param country: Country, or list of countries, to be plotted
+        :return:
+        """
+        with self._lock:
+            self._pending_country = country
+        self._schedule()
+
+    def _schedule(self):
+        """
+        Applies the pending changes once no new event arrived for the debounce time
+
+        :return:
+        """
+        if self.debounce <= 0:
+            self._apply()
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._apply)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _apply(self):
+        """
+        Applies the pending country change, if any, and the current year range
+
+        :return:
+        """
+        with self._lock:
+            country, self._pending_country = self._pending_country, None
+        if country is not None:
+            self._replace_country(country)
+        self._apply_year_range()
+
+    def _replace_country(self, country):
+        """
+        Replaces the traces of the figure with the traces of the given country
+
+        :param country: Country, or list of countries, to be plotted
+        :return:
+        """
+        full_figure = self._full_figure(country)
+        self.country = country
+        self._series = self._full_series(full_figure)
+        with self.figure.batch_update():
+            if len(full_figure.data) == len(self.figure.data):
+                for trace, new_trace in zip(self.figure.data, full_figure.data):
+                    trace.name = new_trace.name
+            else:
+                # A different number of countries changes the subplots, hence the traces and layout are replaced
+                self.figure.data = ()
+                self.figure.add_traces(full_figure.data)
+            self.figure.layout = full_figure.layout
+
+    def _apply_year_range(self):
+        """
+        Slices the full range series to the current year range and updates all the traces in one batch update
+
+        :return:
+        """
+        with self.figure.batch_update():
+            for trace, (years, values) in zip(self.figure.data, self._series):
+                shown = (years >= self.start_year) & (years <= self.end_year)
+                trace.x = years[shown]
+                trace.y = values[shown]
+
+
+def interactive_dashboard(cube: pd.DataFrame, country: str, flag: str, start_year: int = 1896, end_year: int = 2016,
+                          metric_functions: list = None, debounce: float = 0.15):
+    """
+    Returns a notebook widget with a year range slider, a country selector and the figure of every metric. The
+    figures are built once, after which moving the slider or changing the country updates them in place.
+
+    :param cube: Country year cube built with build_country_year_cube
+    :param country: Country shown first
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param start_year: The start year shown first
+    :param end_year: The end year shown first
+    :param metric_functions: List of metric plot functions, by default every metric
+    :param debounce: Seconds without a new slider event after which the last event is applied
+    :return: ipywidgets box holding the controls and the figures
+    """
+    import ipywidgets
+    plots = [InteractivePlot(func, cube, country, flag, start_year, end_year, debounce)
+             for func in metric_functions or METRIC_FUNCTIONS]
+    years = ipywidgets.IntRangeSlider(value=[start_year, end_year], min=int(cube.Year.min()),
+                                      max=int(cube.Year.max()), step=2, description="Years",
+                                      continuous_update=True)
+    countries = ipywidgets.Dropdown(options=sorted(dict.fromkeys(cube.index)), value=country, description="Country")
+    years.observe(lambda change: [plot.set_year_range(*change["new"]) for plot in plots], names="value")
+    countries.observe(lambda change: [plot.set_country(change["new"]) for plot in plots], names="value")
+    return ipywidgets.VBox([ipywidgets.HBox([countries, years])] + [plot.figure for plot in plots])
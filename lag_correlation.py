@@ -0,0 +1,121 @@
+"""
+Lag correlation is a module that measures whether the olympic performance of a country follows a change of its
+government or economy. Every metric of the country year cube is laid out as a dense matrix holding the games of each
+country one after the other, the changes between consecutive games of the country are taken for the polity score or
+GDP and for the metrics, and the correlation of the political or economic change with the change of the metric k games
+later is computed for every country and every lag at once with batched numpy operations. The games of a country are
+its own games only: since 1994 the Summer and Winter games alternate every two years, and laying every country out on
+the years of all the games would leave gaps between the games of a country taking part in one season only.
+"""
+import numpy as np
+import pandas as pd
+import constants
+
+METRICS = ["TotalMedals", "Medal_Gold", "Name", "Age"]
+
+
+def games_matrix(cube: pd.DataFrame, columns: list) -> tuple:
+    """
+    Lays out the columns of the country year cube as dense matrices with one row for every country, holding the games
+    of the country in the order of the years, with NaN after the last games of the country. Consecutive positions of a
+    row are hence consecutive games of the country, whatever the season of the games of the other countries.
+
+    :param cube: Country year cube built with build_country_year_cube
+    :param columns: Columns of the cube to be laid out
+    :return: Array of shape (columns, countries, games), the countries and the array of shape (countries, games) of the
+    years of the games of every country
+
+    >>> cube_test = pd.DataFrame({"Year": [1988, 1992, 1996, 2000, 1994, 1998], "TotalMedals": [2, 1, 3, 4, 5, 7]},
+    ...                          index=pd.Index(["UK"] * 4 + ["NORWAY"] * 2, name="region"))
+    >>> matrix, countries, years = games_matrix(cube_test, ["TotalMedals"])
+    >>> matrix[0].tolist(), countries.tolist()
+    ([[5.0, 7.0, nan, nan], [2.0, 1.0, 3.0, 4.0]], ['NORWAY', 'UK'])
+    >>> np.diff(matrix[0], axis=-1).tolist()
+    [[2.0, nan, nan], [-1.0, 2.0, 1.0]]
+    >>> years.tolist()
+    [[1994.0, 1998.0, nan, nan], [1988.0, 1992.0, 1996.0, 2000.0]]
+    """
+    country_codes, countries = pd.factorize(cube.index, sort=True)
+    order = np.lexsort((cube.Year.to_numpy(), country_codes))
+    sorted_codes = country_codes[order]
+    # Position of every row among the games of its country
+    positions = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes)
+    width = positions.max() + 1 if len(order) else 0
+    matrix = np.full((len(columns), len(countries), width), np.nan)
+    matrix[:, sorted_codes, positions] = cube[columns].to_numpy(dtype=float)[order].T
+    years = np.full((len(countries), width), np.nan)
+    years[sorted_codes, positions] = cube.Year.to_numpy()[order]
+    return matrix, np.asarray(countries), years
+
+
+def lagged_correlations(driver: np.ndarray, metrics: np.ndarray, max_lag: int) -> tuple:
+    """
+    Correlates the changes of the driver with the changes of every metric 0 to max_lag games later, for every country.
+    Only the pairs of games where both changes are known are used.
+
+    :param driver: Array of shape (countries, games) of the polity score or GDP
+    :param metrics: Array of shape (metrics, countries, games) of the olympic metrics
+    :param max_lag: Largest lag, in number of games of the country
+    :return: Arrays of shape (lags, metrics, countries) of the correlations and of the number of pairs used
+
+    >>> driver_test = np.array([[0.0, 1.0, 1.0, 3.0, 3.0]])
+    >>> metrics_test = np.array([[[5.0, 5.0, 7.0, 7.0, 11.0]]])
+    >>> correlation, pairs = lagged_correlations(driver_test, metrics_test, 1)
+    >>> correlation.round(2).ravel().tolist(), pairs.ravel().tolist()
+    ([-0.82, 1.0], [4, 3])
+    """
+    driver_delta = np.diff(driver, axis=-1)
+    metric_delta = np.diff(metrics, axis=-1)
+    steps = driver_delta.shape[-1]
+    lags = np.arange(max_lag + 1)
+    # Position of the metric change k games after each driver change, out of range positions are masked
+    positions = np.arange(steps)[None, :] + lags[:, None]
+    in_range = positions < steps
+    x = np.where(in_range[:, None, None, :], driver_delta[None, None, :, :], np.nan)
+    y = np.where(in_range[:, None, None, :], metric_delta[:, :, np.minimum(positions, steps - 1)].transpose(2, 0, 1, 3),
+                 np.nan)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    pairs = valid.sum(axis=-1)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = np.where(valid, x - x.sum(axis=-1, keepdims=True) / pairs[..., None], 0.0)
+        y = np.where(valid, y - y.sum(axis=-1, keepdims=True) / pairs[..., None], 0.0)
+        correlation = (x * y).sum(axis=-1) / np.sqrt((x * x).sum(axis=-1) * (y * y).sum(axis=-1))
+    return correlation, pairs
+
+
+def lag_correlation_table(cube: pd.DataFrame, flag: str = constants.POLITY_SCORE, metrics: list = None,
+                          max_lag: int = 3, min_pairs: int = 4) -> pd.DataFrame:
+    """
+    Computes the correlation of the changes of the polity score or GDP with the changes of the olympic metrics 0 to
+    max_lag games later, for every country, and ranks them by their absolute value
+
+    :param cube: Country year cube built with build_country_year_cube
+    :param flag: variable to indicate if the polity score or the GDP changes are used
+    :param metrics: Columns of the cube to be correlated, by default the medals, gold medals, participants and age
+    :param max_lag: Largest lag, in number of games of the country
+    :param min_pairs: Smallest number of pairs of changes for a correlation to be kept
+    :return: Dataframe with the region, metric, lag, correlation and pairs columns
+
+    >>> cube_test = pd.DataFrame({"Year": [1948, 1952, 1956, 1960, 1964], "polity2": [0, 1, 1, 3, 3],
+    ...                           "value": [0.0, 1.0, 1.0, 3.0, 3.0],
+    ...                           "TotalMedals": [5, 5, 7, 7, 11]}, index=pd.Index(["UK"] * 5, name="region"))
+    >>> lag_correlation_table(cube_test, metrics=["TotalMedals"], min_pairs=3).round(2)
+      region       metric  lag  correlation  pairs
+    0     UK  TotalMedals    1         1.00      3
+    1     UK  TotalMedals    0        -0.82      4
+    >>> lag_correlation_table(cube_test, "gdp", ["TotalMedals"], min_pairs=3).correlation.round(2).tolist()
+    [1.0, -0.82]
+    """
+    metrics = metrics or [metric for metric in METRICS if metric in cube.columns]
+    driver_column = 'value' if flag.upper() == constants.GDP else 'polity2'
+    matrix, countries, _ = games_matrix(cube, [driver_column] + metrics)
+    correlation, pairs = lagged_correlations(matrix[0], matrix[1:], max_lag)
+    lags, metric_positions, country_positions = np.indices(correlation.shape)
+    table = pd.DataFrame({"region": countries[country_positions.ravel()],
+                          "metric": np.asarray(metrics)[metric_positions.ravel()], "lag": lags.ravel(),
+                          "correlation": correlation.ravel(), "pairs": pairs.ravel()})
+    table = table[(table.pairs >= min_pairs) & table.correlation.notnull()]
+    order = np.argsort(-table.correlation.abs().to_numpy(), kind="stable")
+    return table.iloc[order].reset_index(drop=True)
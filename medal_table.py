@@ -0,0 +1,121 @@
+"""
+Medal table is a module that ranks the countries of every Games against each other, instead of relating each metric of
+a country only to the country itself. The medals and participants of the olympic dataset are summed for every country
+and Games, a Games being the year and the season, and the totals of the Games, the share of the medals and of the
+participants of every country and its rank are computed for all the Games at once. The countries are ranked by gold,
+then silver, then bronze medals like the official medal tables, and also by total medals.
+"""
+import numpy as np
+import pandas as pd
+import helper_function
+
+MEDAL_COLUMNS = ["Medal_Gold", "Medal_Silver", "Medal_Bronze"]
+RANK_COLUMNS = ["Rank", "TotalRank"]
+
+
+def build_medal_table(olympic_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Builds the medal table of every Games
+
+    :param olympic_df: Olympics dataset, with the medals of the team games corrected by correct_team_medals_won
+    :return: Dataframe with one row for every country and Games, with the region, Year, Season, medals, TotalMedals,
+    participants in the Name column, medals and participants of the Games, MedalShare, ParticipantShare, Rank by gold,
+    silver and bronze medals and TotalRank by total medals, sorted by Games and Rank
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "UK", "USA", "FRANCE", "USA"],
+    ...                                 "Year": [1948, 1948, 1948, 1948, 1948], "Medal_Gold": [1, 0, 1, 0, 0],
+    ...                                 "Medal_Silver": [0, 2, 0, 0, 0], "Medal_Bronze": [0, 0, 1, 1, 1],
+    ...                                 "Name": [3, 4, 5, 2, 2], "Season_Summer": [3, 4, 5, 2, 0],
+    ...                                 "Season_Winter": [0, 0, 0, 0, 2]})
+    >>> build_medal_table(olympic_df_test)[["region", "Season", "TotalMedals", "MedalShare", "Rank", "TotalRank"]]
+       region  Season  TotalMedals  MedalShare  Rank  TotalRank
+    0      UK  Summer            3    0.500000     1          1
+    1     USA  Summer            2    0.333333     2          2
+    2  FRANCE  Summer            1    0.166667     3          3
+    3     USA  Winter            1    1.000000     1          1
+    """
+    season = np.where(olympic_df["Season_Winter"].to_numpy() > 0, "Winter", "Summer")
+    groups, first_rows = helper_function.factorize_groups([olympic_df["region"].to_numpy(),
+                                                           olympic_df["Year"].to_numpy(), season])
+    kept = groups >= 0
+    table = pd.DataFrame({"region": olympic_df["region"].to_numpy()[first_rows],
+                          "Year": olympic_df["Year"].to_numpy()[first_rows], "Season": season[first_rows]})
+    # Every column is summed over the country and Games of the rows at once
+    for column in MEDAL_COLUMNS + ["Name"]:
+        table[column] = np.bincount(groups[kept], weights=olympic_df[column].to_numpy()[kept],
+                                    minlength=len(first_rows)).astype(np.int64)
+    table["TotalMedals"] = table[MEDAL_COLUMNS].sum(axis=1)
+
+    games, _ = helper_function.factorize_groups([table["Year"].to_numpy(), table["Season"].to_numpy()])
+    for column, total in (("TotalMedals", "GamesMedals"), ("Name", "GamesParticipants")):
+        table[total] = np.bincount(games, weights=table[column].to_numpy())[games].astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table["MedalShare"] = table["TotalMedals"] / table["GamesMedals"].where(table["GamesMedals"] > 0)
+        table["ParticipantShare"] = table["Name"] / table["GamesParticipants"].where(table["GamesParticipants"] > 0)
+    table["Rank"] = _rank_within(games, [table[column].to_numpy() for column in MEDAL_COLUMNS])
+    table["TotalRank"] = _rank_within(games, [table["TotalMedals"].to_numpy()])
+    return table.sort_values(["Year", "Season", "Rank", "region"], kind="stable").reset_index(drop=True)
+
+
+def top_countries(table: pd.DataFrame, k: int = 10, year: int = None, season: str = None,
+                  by: str = "Rank") -> pd.DataFrame:
+    """
+    Returns the k best countries of every Games, or of the Games of the given year and season. Countries tied with the
+    k-th country are returned as well.
+
+    :param table: Medal table built with build_medal_table
+    :param k: Number of countries of every Games
+    :param year: Year of the Games, every year if it is not given
+    :param season: Season of the Games, "Summer" or "Winter", every season if it is not given
+    :param by: Rank column used, "Rank" for the official order or "TotalRank" for the total medals
+    :return: Rows of the medal table of the best countries, sorted by Games and rank
+
+    >>> olympic_df_test = pd.DataFrame({"region": ["UK", "USA", "FRANCE"], "Year": [1948, 1948, 1948],
+    ...                                 "Medal_Gold": [1, 2, 0], "Medal_Silver": [0, 0, 0], "Medal_Bronze": [5, 0, 1],
+    ...                                 "Name": [3, 5, 2], "Season_Summer": [3, 5, 2], "Season_Winter": [0, 0, 0]})
+    >>> table_test = build_medal_table(olympic_df_test)
+    >>> top_countries(table_test, 1, 1948, "Summer")[["region", "Medal_Gold", "TotalMedals"]]
+      region  Medal_Gold  TotalMedals
+    0    USA           2            2
+    >>> top_countries(table_test, 1, by="TotalRank")[["region", "Medal_Gold", "TotalMedals"]]
+      region  Medal_Gold  TotalMedals
+    1     UK           1            6
+    """
+    if by not in RANK_COLUMNS:
+        raise ValueError("{} is not a rank column, the rank columns are {}".format(by, RANK_COLUMNS))
+    selected = table[by].to_numpy() <= k
+    if year is not None:
+        selected &= table["Year"].to_numpy() == year
+    if season is not None:
+        selected &= table["Season"].to_numpy() == season.capitalize()
+    top = table[selected]
+    return top if by == "Rank" else top.sort_values(["Year", "Season", by], kind="stable")
+
+
+def _rank_within(groups: np.ndarray, values: list) -> np.ndarray:
+    """
+    Ranks the rows within their group by the given values in descending order, the first values taking precedence.
+    Tied rows get the lowest rank of the tie.
+
+    :param groups: Group number of each row
+    :param values: List of the arrays of values, the most significant first
+    :return: Array with the rank of each row, starting from 1
+
+    >>> _rank_within(np.array([0, 0, 0, 1]), [np.array([2, 5, 2, 1])]).tolist()
+    [2, 1, 2, 1]
+    """
+    if not len(groups):
+        return np.array([], dtype=np.int64)
+    order = np.lexsort([-value for value in reversed(values)] + [groups])
+    sorted_groups = groups[order]
+    changed = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    for value in values:
+        sorted_value = value[order]
+        changed[1:] |= sorted_value[1:] != sorted_value[:-1]
+    positions = np.arange(len(order))
+    group_starts = np.maximum.accumulate(np.where(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]], positions, 0))
+    # Every row takes the position of the first row of its tie within its group
+    tie_starts = np.maximum.accumulate(np.where(changed, positions, 0))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = tie_starts - group_starts + 1
+    return ranks
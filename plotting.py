@@ -0,0 +1,679 @@
+"""
+Plotting is a module containing the plotting functions of the olympic data analysis performed in the jupyter notebook.
+The functions take their values from the country year cube of helper_function. They are also available as attributes of
+helper_function, which imports this module, and plotly, only when a plotting function is first used.
+"""
+import copy
+from functools import partial
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import constants
+import helper_function
+import instrumentation
+import shared_datasets
+
+# Skeletons of the figures already built, by metric, flag, axis and number of subplots, see plot_figure
+_templates = {}
+
+
+@instrumentation.instrumented
+def plot_country_medal_polity(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                              start_year: int, end_year: int, flag, cube: pd.DataFrame = None,
+                              show: bool = True):
+    """
+    This function plots the medals won by the given country for each year, between the given year range.
+    This plot is overlapped with the political score of the given country for each year, between the given year range
+    for easy analysis.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of country medal polity for the countries in the list.
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010, 'GDP')
+    =================================================================================================
+    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    =================================================================================================
+    >>> plot_country_medal_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    =================================================================================================
+
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.NUMBER_LABEL
+    agg_dict = {"Medal_Bronze": 'sum', 'Medal_Silver': 'sum', 'Medal_Gold': 'sum', 'polity2': np.mean, 'value': np.mean}
+    input_list = [["Bronze", "Year", "Medal_Bronze"], ["Silver", "Year", "Medal_Silver"],
+                  ["Gold", "Year", "Medal_Gold"]]
+    details = ["Medals Won vs "+flag.upper(), "Year", "Medals Won"]
+    fig = configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
+                                 details, label, None, cube, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+@instrumentation.instrumented
+def plot_perc_of_medals_to_participant(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                                       start_year: int, end_year: int, flag: str, cube: pd.DataFrame = None,
+                                       show: bool = True):
+    """
+    This function plots the % of medals won by total participant in each country by each year.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of % of medals won by total participant for the countries in the list.
+
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010, 'GDP')
+    =================================================================================================
+    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    =================================================================================================
+    >>> plot_perc_of_medals_to_participant(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    =================================================================================================
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.PERCENTAGE_LABEL
+    agg_dict1 = {"Medal_Bronze": 'sum', "Medal_Silver": 'sum', "Medal_Gold": 'sum', "Name": 'sum', 'polity2': np.mean,
+                 'value': np.mean}
+    input_list1 = [["Bronze", "Year", "Bronze_perc"], ["Silver", "Year", "Silver_perc"],
+                   ["Gold", "Year", "Gold_perc"]]
+    details1 = ["Medals Won as a % of Total Participants vs "+flag.upper(), "Year", "Medals Won"]
+    normalization_list = [["Bronze_perc", "Medal_Bronze", "Name"], ["Silver_perc", "Medal_Silver", "Name"],
+                          ["Gold_perc", "Medal_Gold", "Name"]]
+    fig = configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict1, flag,
+                                 input_list1, details1, label, normalization_list, cube, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+@instrumentation.instrumented
+def plot_country_medal_to_participants_ratio(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                                             start_year: int, end_year: int, flag: str, cube: pd.DataFrame = None,
+                                             show: bool = True):
+    """
+    This function plots the medals won to the participant ratio of the given country for each year,
+    between the given year range. This plot is overlapped with the political score of the given country for each year,
+    between the given year range for easier analysis.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of medals won to participant ratio for the countries in the list.
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> plot_country_medal_to_participants_ratio(olympic_df_test, polity_df_test, ['UK', 'FRANCE'], 1929, 2010,\
+    'POLITY SCORE')
+    =================================================================================================
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.NUMBER_LABEL
+    agg_dict = {"TotalMedals": 'sum', "Name": 'sum', 'polity2': np.mean, 'value': np.mean}
+    plot_dfs = helper_function.modify_data_for_countries(olympic_df, polity_df, country, start_year, end_year,
+                                                         agg_dict, cube)
+    for plot_df in plot_dfs:
+        plot_df['medalParticipantRatio'] = round((plot_df.TotalMedals / plot_df.Name) * 100, 2)
+    input_list = [["Medal to Participants Ratio", "Year", "medalParticipantRatio"]]
+    details = ["Medal to Participants Ratio", "Year", "Medal to Participants Ratio"]
+    fig = plot_countries(input_list, plot_dfs, details, country, label, flag, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+@instrumentation.instrumented
+def plot_country_age_polity(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                            start_year: int, end_year: int, flag: str, cube: pd.DataFrame = None,
+                            show: bool = True):
+    """
+    This function plots the average age of the participants in olympic from the given country for each year,
+    between the given year range. This plot is overlapped with the political score of the given country for each year,
+    between the given year range for easier analysis.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of country age for the countries in the list.
+
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> plot_country_age_polity(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'GDP')
+    =================================================================================================
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.NUMBER_LABEL
+    agg_dict = {"Age": 'mean', 'polity2': np.mean, 'value': np.mean}
+    input_list = [["Average Age", "Year", "Age"]]
+    details = ["Average Age vs "+flag.upper(), "Year", "Average Age"]
+    fig = configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
+                                 details, label, None, cube, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+@instrumentation.instrumented
+def plot_country_season_wise_participants(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                                          start_year: int, end_year: int, flag: str, cube: pd.DataFrame = None,
+                                          show: bool = True):
+    """
+    This function plots the season wise participants in olympic from the given country for each year,
+    between the given year range. This plot is overlapped with the political score of the given country for each year,
+    between the given year range for easier analysis.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of season wise for the countries in the list.
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> plot_country_season_wise_participants(olympic_df_test, polity_df_test, ['UK','FRANCE'], 1929, 2010, 'dummy')
+    ENTER THE CORRECT METRIC !
+    =================================================================================================
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.NUMBER_LABEL
+    agg_dict = {"Name": 'sum', 'polity2': np.mean,
+                'Season_Summer': 'sum', 'Season_Winter': 'sum', 'value': np.mean}
+    input_list = [["Summer Season", "Year", "Season_Summer"], ["Winter Season", "Year", "Season_Winter"]]
+    details = ["Number of Participants vs "+flag.upper(), "Year", "Number of Participants"]
+    fig = configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag, input_list,
+                                 details, label, None, cube, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+@instrumentation.instrumented
+def country_male_female_ratio(olympic_df: pd.DataFrame, polity_df: pd.DataFrame, country,
+                              start_year: int, end_year: int, flag: str, cube: pd.DataFrame = None,
+                              show: bool = True):
+    """
+    This function plots the male to female ratio of the participants in olympic from the given country for each year,
+    between the given year range. This plot is overlapped with the political score of the given country for each year,
+    between the given year range for easier analysis.
+    The flag varaible controls if it's GDP plot along with polity plot.
+    The plot can be for a single country or several countries can be compared together. If the country variable is a
+    list, it plots a grid of subplots of male to female ratio for the countries in the list.
+
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> country_male_female_ratio(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    =================================================================================================
+    """
+    if type(country) == str:
+        country = [country]
+    label = constants.PERCENTAGE_LABEL
+    agg_dict = {"Sex_M": 'sum', 'Sex_F': 'sum', "Name": 'sum', 'polity2': np.mean, 'value': np.mean}
+    normalization_dict = [["normalize_female", "Sex_F", "Name"], ["normalize_male", "Sex_M", "Name"]]
+    input_list = [["Female Participants", "Year", "normalize_female"], ["Male Participants", "Year", "normalize_male"]]
+    details = ["Participating Gender vs "+flag.upper(), "Year", "Gender of participation"]
+    fig = configure_correct_plot(olympic_df, polity_df, country, start_year, end_year, agg_dict, flag,
+                                 input_list, details, label, normalization_dict, cube, show)
+    if show:
+        print(constants.PLOT_END)
+    return fig
+
+
+def configure_correct_plot(olympic_df, polity_df, countries, start_year, end_year, agg_dict, flag,
+                           input_list, details, label, normalized_list, cube=None, show=True):
+    """
+    Based on the requirements decides if plot should be GDP or Polity and for multiple countries or single country.
+    The values of all the countries are looked up together in the country year cube.
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param countries: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param agg_dict: The values to aggregate the dataset on
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param details: List of plot details like title and so on.
+    :param label: variable that indicates if y axis is percentage or number
+    :param normalized_list : Contains the list of column values to be normalized to plot
+    :param cube: Country year cube built with build_country_year_cube
+    :param show: variable to indicate if the figure should be shown
+    :return: The plotted figure
+    """
+    plot_dfs = helper_function.modify_data_for_countries(olympic_df, polity_df, countries, start_year, end_year,
+                                                         agg_dict, cube)
+    if normalized_list is not None:
+        plot_dfs = [helper_function.create_normalized_columns(plot_df, normalized_list) for plot_df in plot_dfs]
+    return plot_countries(input_list, plot_dfs, details, countries, label, flag, show)
+
+
+def plot_countries(input_list: list, plot_dfs: list, details: list, countries: list, axis: str, flag: str,
+                   show: bool = True, webgl: bool = None):
+    """
+    Plots a single figure for one country, or a grid of subplots with one subplot for each country along with the
+    polity score or the GDP based on the flag.
+
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param plot_dfs: List of dataframes containing values to be plotted, one for each country
+    :param details: List of plot details like title and so on.
+    :param countries: List of countries to be plotted
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param flag: Variable to indicate if it's polity score plot or GDP plot
+    :param show: Variable to indicate if the figure should be shown
+    :param webgl: Variable to indicate if compact WebGL traces are used, see plot_figure
+    :return: The plotted figure
+    """
+    if len(plot_dfs) == 1:
+        return plot_figure(input_list, plot_dfs[0], details, axis, flag, show, webgl)
+    if flag.upper() == constants.GDP:
+        return plot_grid(input_list, plot_dfs, details, countries, axis, ["value", "GDP x 10^9 USD", "GDP Measure"],
+                         show, webgl=webgl)
+    elif flag.upper() == constants.POLITY_SCORE:
+        return plot_grid(input_list, plot_dfs, details, countries, axis, ["polity2", "Polity", "Polity Score"], show,
+                         webgl=webgl)
+    else:
+        print(constants.CORRECT_METRIC_ERROR)
+
+
+@instrumentation.instrumented
+def plot_figure(input_list: list, plot_df: pd.DataFrame, details: list, axis: str, flag: str, show: bool = True,
+                webgl: bool = None):
+    """
+    This function plots the figure using plotly library. For the given values in input list,
+    it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details list.
+    The layout of the figure is built once for every metric, flag and axis, and the values of the country are stamped
+    into a copy of it.
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param plot_df: The dataframe containing values to be plotted
+    :param details: List of plot details like title and so on.
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param flag: Variable to indicate if it's polity score plot or GDP plot
+    :param show: Variable to indicate if the figure should be shown
+    :param webgl: Variable to indicate if the lines are drawn with WebGL and the bars without outline, by default when
+    the figure has more than constants.WEBGL_MIN_POINTS points
+    :return: The plotted figure
+    >>> input_list_test = [["Female Participants", "Year", "Sex_F"], ["Male Participants", "Year", "Sex_M"]]
+    >>> details_test = ["Participating gender vs Polity Score", "Year", "Gender of participation"]
+    >>> plot_df_test = pd.read_csv("noc_regions.csv")
+    >>> plot_figure(input_list_test, plot_df_test, details_test, 'percentage', 'GDP')
+    There was an error in plotting graph 'Year'
+    """
+    try:
+        columns = []
+        for value in input_list:
+            columns += [(plot_df[value[1]], plot_df[value[2]])] * (2 if flag == constants.GDP else 1)
+        columns.append((plot_df["Year"], plot_df["polity2"]))
+        if flag == constants.GDP:
+            columns.append((plot_df["Year"], plot_df["value"]))
+        webgl = _use_webgl(webgl, columns)
+        template = _figure_template(("figure", _freeze(input_list), tuple(details), axis, flag, webgl),
+                                    partial(_build_figure, input_list, details, axis, flag, webgl))
+        fig = _stamp_figure(template, columns)
+        if show:
+            fig.show()
+        return fig
+    except Exception as e:
+        instrumentation.record_error(e)
+        print("There was an error in plotting graph {}".format(e))
+
+
+def _build_figure(input_list: list, details: list, axis: str, flag: str, webgl: bool) -> go.Figure:
+    """
+    Builds the figure of plot_figure without any values
+
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param details: List of plot details like title and so on.
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param flag: Variable to indicate if it's polity score plot or GDP plot
+    :param webgl: Variable to indicate if compact WebGL traces are used
+    :return: The figure without values
+    """
+    if flag == constants.GDP:
+        fig = make_subplots(rows=1, cols=2, specs=[[{"secondary_y": True}, {"secondary_y": True}]])
+    else:
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+    scatter, bar_line = (go.Scattergl, {"marker_line_width": 0}) if webgl else (go.Scatter, {})
+
+    color_list = ['#ffa500', '#3cb371', '#4169e1', '#abe5f0']
+    for index, value in enumerate(input_list):
+        fig.add_trace(
+            go.Bar(name=value[0], x=[], y=[], marker_color=color_list[index], **bar_line), row=1, col=1,
+            secondary_y=False
+        )
+        if flag == constants.GDP:
+            fig.add_trace(
+                go.Bar(name=value[0], x=[], y=[], marker_color=color_list[index], showlegend=False, **bar_line),
+                row=1, col=2, secondary_y=False
+            )
+    fig.add_trace(
+        scatter(x=[], y=[], name="Polity (-10 to +10)", marker_color='#051c2c'),
+        row=1, col=1, secondary_y=True
+    )
+    if flag == constants.GDP:
+        fig.add_trace(
+            scatter(x=[], y=[], name="GDP x 10^9 USD", marker_color='#051c2c'),
+            row=1, col=2, secondary_y=True
+        )
+    # Add figure title
+    fig.update_layout(
+        title_text=details[0])
+
+    # Set x-axis title
+    fig.update_xaxes(title_text=details[1])
+    if axis == constants.PERCENTAGE_LABEL:
+        if flag == constants.GDP:
+            fig['layout']['yaxis3']['tickformat'] = ',.0%'
+        fig['layout']['yaxis1']['tickformat'] = ',.0%'
+    # Set y-axes titles
+    fig.update_yaxes(title_text="<b>"+details[2]+"</b>", secondary_y=False)
+    fig['layout']['yaxis2']['title'] = '<b>Polity</b>'
+    if flag == constants.GDP:
+        fig['layout']['yaxis4']['title'] = '<b>GDP measure</b>'
+    return fig
+
+
+def plot_subplot(input_list: list, plot_df: pd.DataFrame, plot_df2: pd.DataFrame, details: list,
+                 name_of_countries: list, axis: str, show: bool = True):
+    """
+    This function plots the two figure side by side for each country using plotly library. For the given values in input
+    list, it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details
+    list.
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param plot_df: The dataframe containing values to be plotted
+    :param plot_df2: The dataframe for another country, containing values to be plotted
+    :param details: List of plot details like title and so on.
+    :param name_of_countries: List of countries to be plot side by side for better comparison
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param show: Variable to indicate if the figure should be shown
+    :return: The plotted figure
+    """
+    return plot_grid(input_list, [plot_df, plot_df2], details, name_of_countries, axis,
+                     ["polity2", "Polity", "Polity Score"], show)
+
+
+@instrumentation.instrumented
+def plot_grid(input_list: list, plot_dfs: list, details: list, name_of_countries: list, axis: str, line: list,
+              show: bool = True, cols: int = 2, webgl: bool = None):
+    """
+    This function plots a grid of figures with one subplot for each country using plotly library. For the given values
+    in input list, it adds a trace in every subplot. The line plotted on the secondary y axis of every subplot, like the
+    polity score or the GDP, is described by the line list. The plot details like title, x axis and y axis names are
+    fetched from the details list. The layout of the grid is built once for every metric, line, axis and number of
+    subplots, and the values and names of the countries are stamped into a copy of it.
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param plot_dfs: List of dataframes containing values to be plotted, one for each country
+    :param details: List of plot details like title and so on.
+    :param name_of_countries: List of countries to plot in the grid
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param line: List with the column, trace name and axis title of the line on the secondary y axis
+    :param show: Variable to indicate if the figure should be shown
+    :param cols: Number of subplots in each row of the grid
+    :param webgl: Variable to indicate if compact WebGL traces are used, see plot_figure
+    :return: The plotted figure
+    """
+    cols = min(cols, len(plot_dfs))
+    try:
+        columns = []
+        for plot_df in plot_dfs:
+            columns += [(plot_df[value[1]], plot_df[value[2]]) for value in input_list]
+            columns.append((plot_df["Year"], plot_df[line[0]]))
+        webgl = _use_webgl(webgl, columns)
+        template = _figure_template(("grid", _freeze(input_list), tuple(details), axis, tuple(line), len(plot_dfs),
+                                     cols, webgl),
+                                    partial(_build_grid, input_list, details, name_of_countries, axis, line, cols,
+                                            webgl))
+        fig = _stamp_figure(template, columns, name_of_countries)
+        if show:
+            fig.show()
+        return fig
+    except Exception as e:
+        instrumentation.record_error(e)
+        print("There was an error in plotting graph {}".format(e))
+
+
+def _build_grid(input_list: list, details: list, name_of_countries: list, axis: str, line: list, cols: int,
+                webgl: bool) -> go.Figure:
+    """
+    Builds the grid of plot_grid without any values
+
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param details: List of plot details like title and so on.
+    :param name_of_countries: List of countries to plot in the grid
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param line: List with the column, trace name and axis title of the line on the secondary y axis
+    :param cols: Number of subplots in each row of the grid
+    :param webgl: Variable to indicate if compact WebGL traces are used
+    :return: The grid without values
+    """
+    rows = -(-len(name_of_countries) // cols)
+    fig = make_subplots(rows=rows, cols=cols, subplot_titles=tuple(name_of_countries),
+                        specs=[[{"secondary_y": True} for _ in range(cols)] for _ in range(rows)])
+    scatter, bar_line = (go.Scattergl, {"marker_line_width": 0}) if webgl else (go.Scatter, {})
+    color_list = ['#8b4513', '#808080', '#ffd700', '#abe5f0']
+    for position in range(len(name_of_countries)):
+        row, col = position // cols + 1, position % cols + 1
+        for index, value in enumerate(input_list):
+            fig.add_trace(
+                go.Bar(name=value[0], x=[], y=[], marker_color=color_list[index], showlegend=position == 0,
+                       **bar_line),
+                row=row, col=col, secondary_y=False
+            )
+        fig.add_trace(
+            scatter(x=[], y=[], name=line[1], marker_color='#051c2c', showlegend=position == 0),
+            row=row, col=col, secondary_y=True
+        )
+
+    # Add figure title
+    fig.update_layout(
+        title_text=details[0], width=525 * cols, height=400 * rows
+    )
+
+    # Set x-axis title
+    fig.update_xaxes(title_text=details[1])
+    if axis == constants.PERCENTAGE_LABEL:
+        fig.update_yaxes(tickformat=',.0%', secondary_y=False)
+
+    # Set y-axes titles
+    fig.update_yaxes(title_text="<b>" + details[2] + "</b>", secondary_y=False)
+    fig.update_yaxes(title_text="<b>" + line[2] + "</b>", secondary_y=True)
+    return fig
+
+
+def _figure_template(key: tuple, build) -> dict:
+    """
+    Returns the skeleton of a figure, built the first time the key is used
+
+    :param key: Tuple of the metric, flag, axis and number of subplots of the figure
+    :param build: Function without arguments returning the figure without values
+    :return: Dictionary of the figure without values
+    """
+    if key not in _templates:
+        _templates[key] = build().to_dict()
+    return _templates[key]
+
+
+def _stamp_figure(template: dict, columns: list, titles: list = ()) -> go.Figure:
+    """
+    Returns a copy of the skeleton with the values of every trace. The copy is not validated again, as only the values
+    differ from the validated skeleton.
+
+    :param template: Dictionary of the figure without values
+    :param columns: List of the x and y values of every trace, in the order of the traces
+    :param titles: Titles of the subplots
+    :return: The figure with the values
+    """
+    figure = copy.deepcopy(template)
+    for trace, (x, y) in zip(figure["data"], columns):
+        trace["x"], trace["y"] = np.asarray(x), np.asarray(y)
+    for annotation, title in zip(figure["layout"].get("annotations", []), titles):
+        annotation["text"] = title
+    return go.Figure(figure, _validate=False)
+
+
+def clear_figure_templates():
+    """
+    Discards the skeletons of the figures, for example after the default plotly template was changed
+
+    :return:
+    """
+    _templates.clear()
+
+
+def _use_webgl(webgl: bool, columns: list) -> bool:
+    """
+    Decides if the figure is drawn with compact WebGL traces
+
+    :param webgl: Value given by the caller, None to decide from the number of points
+    :param columns: List of the x and y values of every trace
+    :return: True if WebGL traces are used
+    """
+    if webgl is None:
+        return sum(len(x) for x, _ in columns) > constants.WEBGL_MIN_POINTS
+    return webgl
+
+
+def _freeze(input_list: list) -> tuple:
+    """
+    Converts the list of traces to a tuple that can be used in the key of a skeleton
+
+    :param input_list: List of values that need to be added as a trace in the graph
+    :return: Tuple of tuples
+    """
+    return tuple(tuple(value) for value in input_list)
+
+
+@instrumentation.instrumented
+def plot_graphs_for_country(olympic_df, polity_df, country, start_year, end_year, flag, executor="thread",
+                            max_workers=None, cube=None):
+    """
+    This function plots details regarding olympics, politics and GDP for different metrics like Medals, Geneder ratio,
+    Number of participants etc., It employs parallel processing to make the plots perform better. The country year cube
+    is built once and shared by all the plots. The figures are built on a pool of threads or processes and shown in a
+    fixed order once all of them are ready.
+    >>> olympic_df_test, noc_df = helper_function.prepare_olympic_dataset("athlete_events.csv", "noc_regions.csv")
+    >>> polity_df_test = helper_function.prepare_polity_dataset("p5v2018.xls", noc_df)
+    >>> polity_df_test = helper_function.map_polity_gdp(polity_df_test, "Mapper_GDP.xlsx", "WEOOct2021all_new.xlsx")
+    >>> tasks = plot_graphs_for_country(olympic_df_test, polity_df_test, 'UK', 1929, 2010, 'Polity score')
+    ... # doctest: +ELLIPSIS
+    =================================================================================================
+    ...
+    =================================================================================================
+
+    :param olympic_df: Olympics dataset
+    :param polity_df: Political dataset
+    :param country: Country for which the results to be plotted
+    :param start_year: The start year for the plot
+    :param end_year: The end year for the plot
+    :param flag: variable to indicate if it's polity score plot or GDP plot
+    :param executor: "thread" to build the figures on a thread pool or "process" to build them on a process pool
+    :param max_workers: Maximum number of threads or processes
+    :param cube: Country year cube built with build_country_year_cube, built from the datasets if it is not given
+    :return: List of dictionaries with the name, figure, error and seconds taken by each plot. A plot that returned no
+    figure has an error as well.
+    """
+    if cube is None:
+        cube = helper_function.build_country_year_cube(olympic_df, polity_df)
+    metric_functions = [plot_country_medal_polity, plot_perc_of_medals_to_participant,
+                        plot_country_medal_to_participants_ratio, plot_country_age_polity,
+                        country_male_female_ratio, plot_country_season_wise_participants]
+    # The datasets are only needed to build the cube, hence only the cube is sent to the workers. Process workers
+    # attach it from a memory mapped file instead of unpickling a copy of it with every task.
+    shared = shared_datasets.publish_frame(cube) if executor == "process" else None
+    try:
+        tasks = helper_function.perform_parallel(*[partial(func, None, None, country, start_year, end_year, flag,
+                                                           cube if shared is None else shared, False)
+                                                   for func in metric_functions],
+                                                 executor=executor, max_workers=max_workers)
+    finally:
+        if shared is not None:
+            shared.release()
+    for task in tasks:
+        if task["error"] is None and task["result"] is None:
+            # The metric functions print the errors raised while drawing the figure and return no figure
+            task["error"] = RuntimeError("No figure was plotted")
+        if task["error"] is not None:
+            print("There was an error in {}: {!r}".format(task["name"], task["error"]))
+        elif task["result"] is not None:
+            task["result"].show()
+        print(constants.PLOT_END)
+    return tasks
+
+
+def plot_gdp_subplot(input_list: list, plot_df: pd.DataFrame, plot_df2: pd.DataFrame, details: list,
+                     name_of_countries: list, axis: str, show: bool = True):
+    """
+    This function plots the two figure side by side for each country using plotly library. For the given values in input
+    list, it adds a trace in the plot. The plot details like title, x axis and y axis names are fetched from the details
+     list.
+    :param input_list: List of values that need to be added as a trace in the graph
+    :param plot_df: The dataframe containing values to be plotted
+    :param plot_df2: The dataframe for second country
+    :param details: List of plot details like title and so on.
+    :param name_of_countries: List of countries to plot side by side
+    :param axis: Variable to indicate if y axis is a count or a percentage
+    :param show: Variable to indicate if the figure should be shown
+    :return: The plotted figure
+    """
+    return plot_grid(input_list, [plot_df, plot_df2], details, name_of_countries, axis,
+                     ["value", "GDP x 10^9 USD", "GDP Measure"], show)
@@ -0,0 +1,157 @@
+"""
+Regime spells is a module that finds the changes in government type of every country at once. The yearly polity2
+scores are classified as autocracy, anocracy or democracy, and consecutive years of the same regime are run length
+encoded into spells. The spells are indexed by their interval of years, so questions such as "which countries switched
+regime and reverted within N years" or "which countries were autocracies during the games of year Y" are answered
+with vectorized filters, and the olympic metrics of the matching countries are added with one join on the country year
+cube.
+"""
+import numpy as np
+import pandas as pd
+
+# Regime of the polity2 scores, as defined by the polity project: -10 to -6 autocracy, -5 to 5 anocracy and 6 to 10
+# democracy
+REGIMES = ["autocracy", "anocracy", "democracy"]
+REGIME_BINS = [-6, 6]
+
+
+def classify_regimes(polity2) -> pd.Categorical:
+    """
+    Classifies the polity2 scores as autocracy, anocracy or democracy
+
+    :param polity2: polity2 scores
+    :return: Categorical with the regime of each score, NaN for a missing score
+
+    >>> classify_regimes([-10, -6, -5, 5, 6, np.nan]).tolist()
+    ['autocracy', 'autocracy', 'anocracy', 'anocracy', 'democracy', nan]
+    """
+    polity2 = np.asarray(polity2, dtype=float)
+    codes = np.digitize(polity2, [REGIME_BINS[0] + 0.5, REGIME_BINS[1] - 0.5])
+    codes = np.where(np.isnan(polity2), -1, codes)
+    return pd.Categorical.from_codes(codes, categories=REGIMES)
+
+
+def build_spells(polity_df: pd.DataFrame, reversal_years: int = 10) -> pd.DataFrame:
+    """
+    Builds the regime spells of every country. The polity2 score of a country and year is the mean of its rows, like
+    in the country year cube. A spell is a run of consecutive years of the same regime, and it ends when the regime
+    changes or when years are missing. A spell of at most reversal_years between two spells of the same other regime
+    is marked as a short lived reversal.
+
+    :param polity_df: Political dataset with the alternate_region, year and polity2 columns
+    :param reversal_years: Maximum length in years of a short lived reversal
+    :return: Dataframe of spells indexed by their interval of years, with the region, regime, start_year, end_year,
+    years, mean_polity2, previous_regime, next_regime and short_lived columns
+
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["KOREA"] * 6 + ["UK"] * 2,
+    ...                                "year": [1958, 1959, 1960, 1961, 1962, 1963, 1960, 1961],
+    ...                                "polity2": [-7, -7, 6, 6, -7, -7, 10, 10]})
+    >>> build_spells(polity_df_test)[["region", "regime", "start_year", "end_year", "short_lived"]]
+                 region     regime  start_year  end_year  short_lived
+    [1958, 1959]  KOREA  autocracy        1958      1959        False
+    [1960, 1961]  KOREA  democracy        1960      1961         True
+    [1962, 1963]  KOREA  autocracy        1962      1963        False
+    [1960, 1961]     UK  democracy        1960      1961        False
+    """
+    yearly = polity_df.assign(year=polity_df['year'].astype(int)).groupby(
+        ['alternate_region', 'year'], observed=True)['polity2'].mean().reset_index().dropna(subset=['polity2'])
+    region = yearly['alternate_region'].to_numpy()
+    year = yearly['year'].to_numpy()
+    regime = classify_regimes(yearly['polity2']).codes
+    # A spell starts with a new country, a change of regime or a gap in the years
+    starts = np.ones(len(yearly), dtype=bool)
+    starts[1:] = (region[1:] != region[:-1]) | (regime[1:] != regime[:-1]) | (year[1:] != year[:-1] + 1)
+    spell = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    last = np.append(first[1:], len(yearly)) - 1
+    spells = pd.DataFrame({"region": region[first],
+                           "regime": pd.Categorical.from_codes(regime[first], categories=REGIMES),
+                           "start_year": year[first], "end_year": year[last], "years": year[last] - year[first] + 1,
+                           "mean_polity2": np.bincount(spell, yearly['polity2']) / np.bincount(spell)})
+    same_region_before = np.append(False, spells.region.to_numpy()[1:] == spells.region.to_numpy()[:-1])
+    same_region_after = np.append(same_region_before[1:], False)
+    spells["previous_regime"] = spells.regime.shift(1).where(same_region_before)
+    spells["next_regime"] = spells.regime.shift(-1).where(same_region_after)
+    spells["short_lived"] = (spells.previous_regime == spells.next_regime) & \
+        (spells.previous_regime != spells.regime) & (spells.years <= reversal_years)
+    spells.index = pd.IntervalIndex.from_arrays(spells.start_year, spells.end_year, closed="both")
+    return spells
+
+
+def switched_and_reverted(spells: pd.DataFrame, max_years: int, regime: str = None) -> pd.DataFrame:
+    """
+    Returns the spells in which a country switched to another regime and reverted to its previous regime within the
+    given number of years
+
+    :param spells: Spells built with build_spells
+    :param max_years: Maximum length in years of the spell before reverting
+    :param regime: Regime switched to, by default any regime
+    :return: Dataframe of the matching spells
+
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["KOREA"] * 6, "year": list(range(1958, 1964)),
+    ...                                "polity2": [-7, -7, 6, 6, -7, -7]})
+    >>> switched_and_reverted(build_spells(polity_df_test), 2)[["region", "previous_regime", "regime"]]
+                 region previous_regime     regime
+    [1960, 1961]  KOREA       autocracy  democracy
+    >>> len(switched_and_reverted(build_spells(polity_df_test), 1))
+    0
+    """
+    matches = (spells.previous_regime == spells.next_regime) & (spells.previous_regime != spells.regime) & \
+        (spells.years <= max_years)
+    if regime is not None:
+        matches &= spells.regime == regime
+    return spells[matches]
+
+
+def regimes_in_year(spells: pd.DataFrame, year: int, regime: str = None) -> pd.DataFrame:
+    """
+    Returns the spells of the countries in the given regime during the given year
+
+    :param spells: Spells built with build_spells
+    :param year: Year of the games
+    :param regime: Regime of the countries, by default any regime
+    :return: Dataframe of the spells that contain the year
+
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["KOREA"] * 4 + ["UK"] * 2,
+    ...                                "year": [1958, 1959, 1960, 1961, 1960, 1961], "polity2": [-7, -7, 6, 6, 10, 10]})
+    >>> regimes_in_year(build_spells(polity_df_test), 1960, "democracy").region.tolist()
+    ['KOREA', 'UK']
+    """
+    matches = spells.index.contains(year)
+    if regime is not None:
+        matches &= (spells.regime == regime).to_numpy()
+    return spells[matches]
+
+
+def spell_metrics(spells: pd.DataFrame, cube: pd.DataFrame, years_before: int = 0, years_after: int = 0,
+                  year: int = None) -> pd.DataFrame:
+    """
+    Adds the olympic metrics of the country year cube to the spells with one join. Each spell is matched with the
+    games of its country from years_before years before the spell starts to years_after years after it ends, or only
+    with the games of the given year.
+
+    :param spells: Spells built with build_spells, or the result of a query on them
+    :param cube: Country year cube built with build_country_year_cube
+    :param years_before: Years before the start of the spell for which the games are matched
+    :param years_after: Years after the end of the spell for which the games are matched
+    :param year: Year of the games to be matched, instead of the years of the spell
+    :return: Dataframe with one row for each spell and games, with the columns of the spell and of the cube
+
+    >>> polity_df_test = pd.DataFrame({"alternate_region": ["UK"] * 3, "year": [1947, 1948, 1949],
+    ...                                "polity2": [10, 10, 10]})
+    >>> cube_test = pd.DataFrame({"Year": [1948, 1952], "TotalMedals": [23, 11]}, index=pd.Index(["UK", "UK"],
+    ...                          name="region"))
+    >>> spell_metrics(build_spells(polity_df_test), cube_test, years_after=4)[["region", "regime", "Year",
+    ...                                                                         "TotalMedals"]]
+      region     regime  Year  TotalMedals
+    0     UK  democracy  1948           23
+    1     UK  democracy  1952           11
+    """
+    games = cube.reset_index()
+    if year is not None:
+        games = games[games.Year == year]
+    matched = spells.reset_index(drop=True).merge(games, on="region", how="inner")
+    if year is None:
+        matched = matched[(matched.Year >= matched.start_year - years_before) &
+                          (matched.Year <= matched.end_year + years_after)]
+    return matched.reset_index(drop=True)
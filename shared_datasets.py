@@ -0,0 +1,134 @@
+"""
+Shared datasets is a module for sharing the prepared datasets with worker processes without copying them. A dataframe
+is published once as an Arrow file in the cache directory, and every worker memory maps the file and reads the columns
+as read only numpy views of the mapped pages. The pages are shared by all the processes, hence the memory used stays
+flat as workers are added, and starting a worker no longer includes unpickling the dataframe.
+
+Text columns are stored dictionary encoded and are attached as categorical columns, while the index is attached with
+its original values.
+"""
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import constants
+
+SHARED_DIR = os.path.join(constants.CACHE_DIR, "shared")
+# Frames already attached by this process, by file name
+_attached = {}
+
+
+class SharedFrame:
+    """
+    Handle of a published dataframe. The handle is sent to worker processes instead of the dataframe: once unpickled
+    in a worker it is the dataframe attached from the memory mapped file. The file is removed by release, or at the
+    end of a with block.
+
+    >>> import pickle
+    >>> cube_test = pd.DataFrame({"Year": [1948, 1952], "TotalMedals": [23, 11], "polity2": [10.0, np.nan]},
+    ...                          index=pd.Index(["UK", "UK"], name="region"))
+    >>> with publish_frame(cube_test, tempfile.mkdtemp()) as shared:
+    ...     attached = pickle.loads(pickle.dumps(shared))
+    ...     attached.equals(cube_test), attached.Year.to_numpy().flags.writeable
+    (True, False)
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Name of the Arrow file of the dataframe
+        """
+        self.path = path
+
+    def attach(self) -> pd.DataFrame:
+        """
+        Returns the dataframe attached from the file, see attach_frame
+
+        :return: The attached dataframe
+        """
+        return attach_frame(self.path)
+
+    def release(self):
+        """
+        Removes the file of the dataframe. Processes that attached it keep their mapping until they exit.
+
+        :return:
+        """
+        _attached.pop(self.path, None)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __reduce__(self):
+        return attach_frame, (self.path,)
+
+
+def publish_frame(frame: pd.DataFrame, directory: str = SHARED_DIR) -> SharedFrame:
+    """
+    Writes the dataframe to an Arrow file that worker processes can memory map. Numeric columns are stored as they are,
+    missing values included, so that they can be attached without any conversion.
+
+    :param frame: Dataframe to be shared
+    :param directory: Directory of the Arrow file
+    :return: Handle of the published dataframe
+    """
+    os.makedirs(directory, exist_ok=True)
+    index_names = [] if isinstance(frame.index, pd.RangeIndex) else \
+        ["__index_{}__".format(level) for level in range(frame.index.nlevels)]
+    names, arrays = [], []
+    for level, name in enumerate(index_names):
+        names.append(name)
+        arrays.append(_to_arrow(frame.index.get_level_values(level)))
+    for name in frame.columns:
+        names.append(str(name))
+        arrays.append(_to_arrow(frame[name]))
+    metadata = {"index": json.dumps([index_names, list(frame.index.names)]), "columns": json.dumps(list(frame.columns))}
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+    descriptor, path = tempfile.mkstemp(suffix=".arrow", dir=directory)
+    with os.fdopen(descriptor, "wb") as file, pa.ipc.new_file(file, table.schema) as writer:
+        writer.write_table(table)
+    return SharedFrame(path)
+
+
+def attach_frame(path: str) -> pd.DataFrame:
+    """
+    Memory maps the Arrow file of a published dataframe and returns the dataframe with every numeric column as a read
+    only view of the mapped file. A file is attached once per process.
+
+    :param path: Name of the Arrow file
+    :return: The attached dataframe
+    """
+    if path not in _attached:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        metadata = table.schema.metadata
+        index_names, levels = json.loads(metadata[b"index"])
+        columns = json.loads(metadata[b"columns"])
+        # Every column is kept in its own block so that the columns are not copied into a consolidated block
+        frame = table.drop(index_names).to_pandas(split_blocks=True)
+        frame.columns = columns
+        if index_names:
+            arrays = [np.asarray(table.column(name).to_pandas()) for name in index_names]
+            frame.index = pd.Index(arrays[0], name=levels[0]) if len(arrays) == 1 else \
+                pd.MultiIndex.from_arrays(arrays, names=levels)
+        _attached[path] = frame
+    return _attached[path]
+
+
+def _to_arrow(values) -> pa.Array:
+    """
+    Converts a column to an Arrow array. Numeric values are kept as they are, NaN included, and other values are
+    dictionary encoded.
+
+    :param values: Series or index of the column
+    :return: Arrow array of the column
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+        return pa.array(np.asarray(values))
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(np.asarray(uniques, dtype=object)))
@@ -0,0 +1,101 @@
+"""
+Source loader is a module that reads every input file of the analysis at the same time on a pool of threads, so that
+the reading and parsing of the athlete events, country code, polity, mapper and WEO files overlap instead of running
+one after the other. The parsed frames are handed to the preparation functions of helper_function. The time taken to
+load each file is reported, and a file that cannot be loaded is reported with its name and the reason, instead of a
+message being printed and None being returned.
+"""
+from functools import partial
+import pandas as pd
+import helper_function
+import instrumentation
+
+# Function reading each source of the analysis
+SOURCE_READERS = {"olympic": pd.read_csv, "region": pd.read_csv, "polity": helper_function.read_polity_file,
+                  "mapper": pd.read_excel, "gdp": helper_function.read_gdp_file}
+
+
+class SourceLoadError(Exception):
+    """
+    Error raised when one or more sources could not be loaded. The report attribute holds the load report of every
+    source, with the error of each failed source.
+    """
+
+    def __init__(self, report: pd.DataFrame):
+        self.report = report
+        failed = report[report.error.notnull()]
+        lines = ["{} ({}): {}".format(row.source, row.file_name, row.error) for row in failed.itertuples()]
+        super().__init__("Could not load {} source(s):\n".format(len(failed)) + "\n".join(lines))
+
+
+@instrumentation.instrumented
+def load_sources(files: dict, executor: str = "thread", max_workers: int = None) -> tuple:
+    """
+    Reads the given sources concurrently
+
+    :param files: Dictionary with key as the source, one of the keys of SOURCE_READERS, and value as the file name
+    :param executor: "thread" to read the files on a thread pool or "process" to read them on a process pool
+    :param max_workers: Maximum number of threads or processes, by default one for each file
+    :return: Dictionary of the parsed frame of each source and the load report, with the source, file_name, seconds,
+    rows and error of each source
+
+    >>> frames, report = load_sources({"region": "noc_regions.csv", "mapper": "Mapper_GDP.xlsx"})
+    >>> report[["source", "rows", "error"]]
+       source  rows error
+    0  region   230  None
+    1  mapper   198  None
+    >>> load_sources({"region": "noc_regions.csv", "polity": "p5v2013.xls"})
+    Traceback (most recent call last):
+    ...
+    source_loader.SourceLoadError: Could not load 1 source(s):
+    polity (p5v2013.xls): [Errno 2] No such file or directory: 'p5v2013.xls'
+    """
+    unknown = set(files) - set(SOURCE_READERS)
+    if unknown:
+        raise ValueError("Unknown sources {}, the sources are {}".format(sorted(unknown), list(SOURCE_READERS)))
+    tasks = helper_function.perform_parallel(*[partial(SOURCE_READERS[source], file_name)
+                                               for source, file_name in files.items()],
+                                             executor=executor, max_workers=max_workers)
+    frames = {source: task["result"] for source, task in zip(files, tasks)}
+    report = pd.DataFrame({"source": list(files), "file_name": list(files.values()),
+                           "seconds": [task["seconds"] for task in tasks],
+                           "rows": [len(task["result"]) if task["error"] is None else None for task in tasks],
+                           "error": [None if task["error"] is None else str(task["error"]) for task in tasks]})
+    if report.error.notnull().any():
+        raise SourceLoadError(report)
+    return frames, report
+
+
+@instrumentation.instrumented
+def prepare_datasets_concurrently(olympic_file_name: str, region_file_name: str, polity_file_name: str, mapper: str,
+                                  gdp_string: str, countries: dict, country_dict: dict, sport_dict: dict,
+                                  executor: str = "thread", max_workers: int = None) -> tuple:
+    """
+    Loads every source concurrently and runs the complete preparation chain of the analysis on the parsed frames, with
+    the same result as prepare_olympic_dataset, prepare_polity_dataset, handle_countries_that_split,
+    map_polity_region_dataset, correct_team_medals_won and map_polity_gdp run one after the other
+
+    :param olympic_file_name: File name that contains olympics data
+    :param region_file_name: File name that contains country to country code mapping
+    :param polity_file_name: File name of the polity dataset
+    :param mapper: name of the mapper dataset file
+    :param gdp_string: name of the GDP dataset file
+    :param countries: Dictionary of countries that have split up with key as the country code and value as the
+    country name
+    :param country_dict: Dictionary of country name in polity dataset and country code of olympic dataset
+    :param sport_dict: Dictionary with key as the olympic sports and values indicating if its a team sport
+    :param executor: "thread" to read the files on a thread pool or "process" to read them on a process pool
+    :param max_workers: Maximum number of threads or processes, by default one for each file
+    :return: Olympic dataset, political dataset with GDP column, the country code dataset and the load report
+    """
+    frames, report = load_sources({"olympic": olympic_file_name, "region": region_file_name,
+                                   "polity": polity_file_name, "mapper": mapper, "gdp": gdp_string},
+                                  executor, max_workers)
+    olympic_df, noc_df = helper_function.aggregate_olympic_dataset(frames["olympic"], frames["region"])
+    polity_df = helper_function.clean_polity_dataset(frames["polity"], noc_df.copy())
+    olympic_df = helper_function.handle_countries_that_split(countries, olympic_df, noc_df)
+    polity_df = helper_function.map_polity_region_dataset(country_dict, polity_df,
+                                                          dict(zip(noc_df.NOC, noc_df.region)))
+    olympic_df = helper_function.correct_team_medals_won(olympic_df, sport_dict)
+    polity_df = helper_function.merge_polity_gdp(polity_df, frames["gdp"], frames["mapper"])
+    return olympic_df, polity_df, noc_df, report
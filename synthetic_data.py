@@ -0,0 +1,230 @@
+"""
+Synthetic data is a module that generates deterministic stand-ins for the athlete events, country code, polity, GDP
+mapper and IMF WEO files with the same columns as the real files. The size of the files is controlled by a scale
+factor, 1 being roughly the size of the real datasets, so that the pipeline can be benchmarked without the original
+downloads and at sizes larger than the real data.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+# Number of rows of the real athlete events file and number of WEO subjects reported for every country
+ATHLETE_ROWS = 271116
+WEO_SUBJECTS = 45
+SUMMER_YEARS = [1896, 1900, 1904, 1906, 1908, 1912, 1920, 1924, 1928, 1932, 1936, 1948, 1952, 1956, 1960, 1964, 1968,
+                1972, 1976, 1980, 1984, 1988, 1992, 1996, 2000, 2004, 2008, 2012, 2016]
+WINTER_YEARS = [1924, 1928, 1932, 1936, 1948, 1952, 1956, 1960, 1964, 1968, 1972, 1976, 1980, 1984, 1988, 1992, 1994,
+                1998, 2002, 2006, 2010, 2014]
+# Sport, event, team sport and season of the generated events. Single, One and Relay events are included to exercise
+# every branch of correct_team_medals_won
+SPORTS = [("Athletics", "Athletics Men's 100 metres", False, "Summer"),
+          ("Athletics", "Athletics Women's 4 x 100 metres Relay", False, "Summer"),
+          ("Swimming", "Swimming Men's 200 metres Freestyle", True, "Summer"),
+          ("Swimming", "Swimming Women's 4 x 100 metres Freestyle Relay", True, "Summer"),
+          ("Rowing", "Rowing Men's Single Sculls", True, "Summer"),
+          ("Rowing", "Rowing Men's Coxed Eights", True, "Summer"),
+          ("Basketball", "Basketball Men's Basketball", True, "Summer"),
+          ("Football", "Football Women's Football", True, "Summer"),
+          ("Gymnastics", "Gymnastics Men's Individual All-Around", False, "Summer"),
+          ("Sailing", "Sailing Mixed One Person Dinghy", True, "Summer"),
+          ("Wrestling", "Wrestling Men's Lightweight, Freestyle", False, "Summer"),
+          ("Ice Hockey", "Ice Hockey Men's Ice Hockey", True, "Winter"),
+          ("Alpine Skiing", "Alpine Skiing Women's Downhill", False, "Winter"),
+          ("Bobsleigh", "Bobsleigh Men's Four", True, "Winter")]
+FILE_NAMES = {"olympic": "athlete_events.csv", "region": "noc_regions.csv", "polity": "p5v2018.xlsx",
+              "mapper": "Mapper_GDP.xlsx", "gdp": "WEOOct2021all_new.xlsx"}
+
+
+def synthetic_sport_dict() -> dict:
+    """
+    Returns the dictionary of team sports for the generated events
+
+    :return: Dictionary with key as the olympic sports and values indicating if its a team sport
+
+    >>> synthetic_sport_dict()["Basketball"], synthetic_sport_dict()["Athletics"]
+    (True, False)
+    """
+    return {sport: team for sport, _, team, _ in SPORTS}
+
+
+def generate_noc_dataset(scale: float = 1) -> pd.DataFrame:
+    """
+    Generates the country code dataset. Every country has a unique code made of letters and the number of countries
+    grows with the scale factor, the real file having about 230 countries.
+
+    :param scale: Size of the generated data relative to the real datasets
+    :return: Country code dataset with the NOC, region and notes columns
+
+    >>> generate_noc_dataset(0.05).head(3)
+       NOC     region  notes
+    0  AAA  Country A    NaN
+    1  AAB  Country B    NaN
+    2  AAC  Country C    NaN
+    """
+    count = max(4, int(round(230 * scale)))
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    index = np.arange(count)
+    codes = ["".join(letters[[(i // 676) % 26, (i // 26) % 26, i % 26]]) for i in index]
+    names = ["Country " + _letter_name(i) for i in index]
+    return pd.DataFrame({"NOC": codes, "region": names, "notes": np.nan})
+
+
+def _letter_name(number: int) -> str:
+    """
+    Converts a number to a name made of letters, 0 being A, 25 being Z and 26 being BA
+
+    :param number: Number to be converted
+    :return: Name made of letters
+    """
+    name = ""
+    while True:
+        name = chr(ord("A") + number % 26) + name
+        number //= 26
+        if number == 0:
+            return name
+
+
+def generate_athlete_events(noc_df: pd.DataFrame, scale: float = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates the athlete events dataset. Athletes take part in several events, so the names repeat across rows, and
+    about one in seven rows won a medal.
+
+    :param noc_df: Country code dataset returned by generate_noc_dataset
+    :param scale: Size of the generated data relative to the real datasets
+    :param seed: Seed of the random generator
+    :return: Athlete events dataset with the columns of the real file
+
+    >>> athletes = generate_athlete_events(generate_noc_dataset(0.05), 0.001)
+    >>> athletes.shape
+    (271, 15)
+    >>> sorted(athletes.Medal.dropna().unique())
+    ['Bronze', 'Gold', 'Silver']
+    """
+    rng = np.random.default_rng(seed)
+    count = max(1, int(round(ATHLETE_ROWS * scale)))
+    events = rng.integers(len(SPORTS), size=count)
+    sport, event, _, season = (np.array(column, dtype=object) for column in zip(*SPORTS))
+    season = season[events]
+    summer = rng.choice(SUMMER_YEARS, size=count)
+    winter = rng.choice(WINTER_YEARS, size=count)
+    year = np.where(season == "Summer", summer, winter)
+    athlete_id = rng.integers(1, max(2, count // 2), size=count)
+    noc = noc_df["NOC"].to_numpy()[athlete_id % len(noc_df)]
+    age = rng.normal(25, 5, size=count).round().clip(10, 70)
+    age[rng.random(count) < 0.03] = np.nan
+    medal = rng.choice(np.array(["Gold", "Silver", "Bronze", None], dtype=object), size=count,
+                       p=[0.05, 0.05, 0.05, 0.85])
+    return pd.DataFrame({"ID": athlete_id, "Name": ["Athlete " + str(i) for i in athlete_id],
+                         "Sex": np.where(athlete_id % 3 == 0, "F", "M"), "Age": age,
+                         "Height": np.nan, "Weight": np.nan, "Team": noc,
+                         "NOC": noc, "Games": [str(y) + " " + s for y, s in zip(year, season)], "Year": year,
+                         "Season": season, "City": np.where(season == "Summer", "Athina", "Sankt Moritz"),
+                         "Sport": sport[events], "Event": event[events], "Medal": medal})
+
+
+def generate_polity_dataset(noc_df: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates the polity dataset for the countries of the country code dataset. Every country starts in a random year
+    and keeps its polity score for a random number of years before the score changes. A few years are marked with the
+    -66 interruption code.
+
+    :param noc_df: Country code dataset returned by generate_noc_dataset
+    :param seed: Seed of the random generator
+    :return: Polity dataset with the columns of the real file
+
+    >>> polity = generate_polity_dataset(generate_noc_dataset(0.05))
+    >>> polity.columns.tolist()[:6]
+    ['p5', 'cyear', 'ccode', 'scode', 'country', 'year']
+    >>> int(polity.polity2.between(-10, 10).mean() > 0.9)
+    1
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for ccode, (noc, region) in enumerate(zip(noc_df["NOC"], noc_df["region"])):
+        years = np.arange(int(rng.integers(1800, 1994)), 2019)
+        changes = rng.random(len(years)) < 0.06
+        changes[0] = True
+        scores = rng.integers(-10, 11, size=changes.sum())[np.cumsum(changes) - 1]
+        polity2 = np.where(rng.random(len(years)) < 0.01, -66, scores)
+        frames.append(pd.DataFrame({"p5": 0, "cyear": ccode * 10000 + years, "ccode": ccode, "scode": noc,
+                                    "country": region, "year": years, "flag": 0, "fragment": np.nan,
+                                    "democ": scores.clip(0), "autoc": (-scores).clip(0), "polity": polity2,
+                                    "polity2": polity2, "durable": np.nan}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def generate_gdp_mapper(noc_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Generates the mapping of polity country names to WEO country names
+
+    :param noc_df: Country code dataset returned by generate_noc_dataset
+    :return: Mapper dataset with the scode, country and Map columns
+
+    >>> generate_gdp_mapper(generate_noc_dataset(0.05)).iloc[0].tolist()
+    ['AAA', 'Country A', 'Country A']
+    """
+    return pd.DataFrame({"scode": noc_df["NOC"], "country": noc_df["region"], "Map": noc_df["region"]})
+
+
+def generate_weo_dataset(noc_df: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates the IMF WEO dataset for the countries of the country code dataset. Every country has the GDP in billions
+    of US dollars, the NGDPD subject, along with other subjects that are filtered out by map_polity_gdp.
+
+    :param noc_df: Country code dataset returned by generate_noc_dataset
+    :param seed: Seed of the random generator
+    :return: WEO dataset with the columns of the real file
+
+    >>> weo = generate_weo_dataset(generate_noc_dataset(0.05))
+    >>> weo.shape
+    (540, 57)
+    >>> int((weo["WEO Subject Code"] == "NGDPD").sum())
+    12
+    """
+    rng = np.random.default_rng(seed)
+    years = list(range(1980, 2027))
+    subjects = ["NGDPD"] + ["S{:02d}".format(i) for i in range(1, WEO_SUBJECTS)]
+    count = len(noc_df) * len(subjects)
+    start = rng.lognormal(3, 2, size=(len(noc_df), 1))
+    growth = np.cumprod(1 + rng.normal(0.03, 0.04, size=(len(noc_df), len(years))), axis=1)
+    values = rng.normal(100, 30, size=(count, len(years))).round(3)
+    gdp_rows = np.arange(0, count, len(subjects))
+    values[gdp_rows] = (start * growth * 1000).round(3)
+    weo = pd.DataFrame({"WEO Country Code": np.repeat(np.arange(len(noc_df)), len(subjects)),
+                        "ISO": np.repeat(noc_df["NOC"].to_numpy(), len(subjects)),
+                        "WEO Subject Code": subjects * len(noc_df),
+                        "Country": np.repeat(noc_df["region"].to_numpy(), len(subjects)),
+                        "Subject Descriptor": "Subject", "Subject Notes": "Notes",
+                        "Units": "U.S. dollars", "Scale": np.where(np.arange(count) % 3 == 0, "Billions", "Units"),
+                        "Country/Series-specific Notes": "Source: synthetic"})
+    weo = pd.concat([weo, pd.DataFrame(values, columns=years)], axis=1)
+    weo["Estimates Start After"] = 2020
+    return weo
+
+
+def generate_datasets(output_dir: str, scale: float = 1, seed: int = 0) -> dict:
+    """
+    Writes the synthetic athlete events, country code, polity, GDP mapper and WEO files to the output directory. The
+    same scale and seed always produce the same files.
+
+    :param output_dir: Directory where the files are written
+    :param scale: Size of the generated data relative to the real datasets
+    :param seed: Seed of the random generator
+    :return: Dictionary with key as the dataset name and value as the file name
+
+    >>> import tempfile
+    >>> files = generate_datasets(tempfile.mkdtemp(), 0.01)
+    >>> sorted(files)
+    ['gdp', 'mapper', 'olympic', 'polity', 'region']
+    >>> pd.read_csv(files["olympic"]).shape
+    (2711, 15)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files = {name: os.path.join(output_dir, file_name) for name, file_name in FILE_NAMES.items()}
+    noc_df = generate_noc_dataset(scale)
+    noc_df.to_csv(files["region"], index=False)
+    generate_athlete_events(noc_df, scale, seed).to_csv(files["olympic"], index=False)
+    generate_polity_dataset(noc_df, seed).to_excel(files["polity"], index=False)
+    generate_gdp_mapper(noc_df).to_excel(files["mapper"], index=False)
+    generate_weo_dataset(noc_df, seed).to_excel(files["gdp"], index=False)
+    return files